@@ -0,0 +1,306 @@
+"""
+Byzantine Strategies
+Pluggable behaviour of malicious C participants and a Monte Carlo harness
+
+A Byzantine C can only influence matching through the candidate it
+applies (a flipped pixel turns its vote from match to mismatch or back)
+and by not forwarding qubits to B (its vote is missing). A strategy
+therefore returns two (N × M) masks for the Byzantine columns:
+- flips: pixels where the C applies the complement of the candidate
+- drops: pixels whose qubit the C silently drops
+
+Built-in strategies: FlipAll (the original behaviour), RandomFlip,
+TargetedPixels, Coalition (colluding Cs attack where they can swing the
+majority) and SilentDrop.
+
+Without channel noise an honest vote equals the true match bit, so the
+harness estimates P(wrong majority) from vote matrices alone, without
+simulating qubits, over thousands of randomized trials (random secret
+match pattern and Byzantine set) in parallel worker processes.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+
+from qubit_assignment import build_assignment
+from sampled_estimate import wilson_interval
+from vote_matrix import VoteMatrix
+
+
+class Corruption(NamedTuple):
+    """Pixels each Byzantine C flips or drops, as (N, M) boolean masks"""
+    flips: np.ndarray
+    drops: np.ndarray
+
+
+class ByzantineStrategy:
+    """
+    Behaviour shared by all Byzantine C participants of a round
+    """
+
+    description = "honest"
+
+    def corrupt(self, byzantine_indices: np.ndarray, pixel_assignments: np.ndarray,
+                n_participants: int, rng: np.random.Generator) -> Corruption:
+        """
+        Choose the pixels the Byzantine participants flip or drop
+
+        Args:
+            byzantine_indices: Indices of the Byzantine C participants
+            pixel_assignments: (N, copies) C indices processing each qubit
+            n_participants: Number of C participants (M)
+            rng: Generator for randomized strategies
+
+        Returns:
+            Corruption with nonzero columns only for Byzantine participants
+        """
+        n_pixels = len(pixel_assignments)
+        flips = np.zeros((n_pixels, n_participants), dtype=bool)
+        drops = np.zeros((n_pixels, n_participants), dtype=bool)
+        byzantine_indices = np.asarray(byzantine_indices, dtype=np.intp)
+        if len(byzantine_indices):
+            self._corrupt(flips, drops, byzantine_indices, pixel_assignments, rng)
+        return Corruption(flips, drops)
+
+    def _corrupt(self, flips: np.ndarray, drops: np.ndarray, byzantine_indices: np.ndarray,
+                 pixel_assignments: np.ndarray, rng: np.random.Generator):
+        """Fill the masks in place (default: behave honestly)"""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class FlipAll(ByzantineStrategy):
+    """Observe the complement of the whole candidate"""
+
+    description = "observes flipped image"
+
+    def _corrupt(self, flips, drops, byzantine_indices, pixel_assignments, rng):
+        flips[:, byzantine_indices] = True
+
+
+class RandomFlip(ByzantineStrategy):
+    """Flip each pixel independently with probability p"""
+
+    def __init__(self, p: float = 0.5):
+        if not 0.0 <= p <= 1.0:
+            raise ValueError(f"Flip probability must be between 0 and 1, got {p}")
+        self.p = p
+        self.description = f"flips each pixel with probability {p:g}"
+
+    def _corrupt(self, flips, drops, byzantine_indices, pixel_assignments, rng):
+        flips[:, byzantine_indices] = rng.random((len(flips), len(byzantine_indices))) < self.p
+
+    def __repr__(self) -> str:
+        return f"RandomFlip({self.p:g})"
+
+
+class TargetedPixels(ByzantineStrategy):
+    """Flip only chosen pixels, or a random fraction shared by all Byzantine Cs"""
+
+    def __init__(self, pixel_indices: Sequence[int] = None, fraction: float = 0.1):
+        """
+        Args:
+            pixel_indices: Flat indices of the targeted pixels
+            fraction: Share of pixels targeted at random if no indices are given
+        """
+        if pixel_indices is None and not 0.0 <= fraction <= 1.0:
+            raise ValueError(f"Target fraction must be between 0 and 1, got {fraction}")
+        self.pixel_indices = None if pixel_indices is None else np.asarray(pixel_indices, dtype=np.intp)
+        self.fraction = fraction
+        if self.pixel_indices is None:
+            self.description = f"flips {fraction:.0%} of the pixels (targeted)"
+        else:
+            self.description = f"flips {len(self.pixel_indices)} targeted pixels"
+
+    def _targets(self, n_pixels: int, rng: np.random.Generator) -> np.ndarray:
+        if self.pixel_indices is not None:
+            return self.pixel_indices[self.pixel_indices < n_pixels]
+        return rng.choice(n_pixels, size=int(round(self.fraction * n_pixels)), replace=False)
+
+    def _corrupt(self, flips, drops, byzantine_indices, pixel_assignments, rng):
+        flips[np.ix_(self._targets(len(flips), rng), byzantine_indices)] = True
+
+    def __repr__(self) -> str:
+        if self.pixel_indices is None:
+            return f"TargetedPixels(fraction={self.fraction:g})"
+        return f"TargetedPixels({len(self.pixel_indices)} pixels)"
+
+
+class Coalition(ByzantineStrategy):
+    """
+    Colluding Cs flip only pixels where together they hold at least half of
+    the votes, so every flip can swing the majority and no vote is wasted
+    """
+
+    def __init__(self, fraction: float = 1.0):
+        """
+        Args:
+            fraction: Share of the attackable pixels the coalition flips
+        """
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError(f"Attack fraction must be between 0 and 1, got {fraction}")
+        self.fraction = fraction
+        self.description = "colludes on pixels where the coalition holds half the votes"
+
+    def _corrupt(self, flips, drops, byzantine_indices, pixel_assignments, rng):
+        is_byzantine = np.zeros(flips.shape[1], dtype=bool)
+        is_byzantine[byzantine_indices] = True
+        held = np.count_nonzero(is_byzantine[pixel_assignments], axis=1)
+        attackable = np.flatnonzero(2 * held >= pixel_assignments.shape[1])
+        if self.fraction < 1.0:
+            attackable = rng.choice(attackable, size=int(round(self.fraction * len(attackable))), replace=False)
+        flips[np.ix_(attackable, byzantine_indices)] = True
+
+    def __repr__(self) -> str:
+        return f"Coalition({self.fraction:g})"
+
+
+class SilentDrop(ByzantineStrategy):
+    """Do not forward qubits to B (each with probability p), casting no vote"""
+
+    def __init__(self, p: float = 1.0):
+        if not 0.0 <= p <= 1.0:
+            raise ValueError(f"Drop probability must be between 0 and 1, got {p}")
+        self.p = p
+        self.description = "drops its qubits" if p == 1.0 else f"drops each qubit with probability {p:g}"
+
+    def _corrupt(self, flips, drops, byzantine_indices, pixel_assignments, rng):
+        if self.p == 1.0:
+            drops[:, byzantine_indices] = True
+        else:
+            drops[:, byzantine_indices] = rng.random((len(drops), len(byzantine_indices))) < self.p
+
+    def __repr__(self) -> str:
+        return f"SilentDrop({self.p:g})"
+
+
+STRATEGIES = {
+    'flip_all': FlipAll,
+    'random_flip': RandomFlip,
+    'targeted': TargetedPixels,
+    'coalition': Coalition,
+    'silent_drop': SilentDrop,
+}
+
+
+class WrongMajorityEstimate(NamedTuple):
+    """Monte Carlo estimate of the probability that a pixel's majority is wrong"""
+    n_participants: int
+    n_byzantine: int
+    copies: int
+    strategy: str
+    trials: int
+    pixels_per_trial: int
+    wrong_majority_rate: float
+    ci_low: float
+    ci_high: float
+    failed_trial_rate: float   # trials with at least one wrong pixel
+
+
+TRIALS_PER_BATCH = 128
+
+
+def _run_trials(n_participants: int, n_byzantine: int, copies: int, strategy: ByzantineStrategy,
+                n_pixels: int, match_rate: float, n_trials: int, seed) -> np.ndarray:
+    """Wrong-majority pixel count of each of n_trials randomized trials"""
+    rng = np.random.default_rng(seed)
+    pixel_assignments = build_assignment(n_pixels, n_participants, copies).pixels_to_cs
+    assigned = np.zeros((n_pixels, n_participants), dtype=bool)
+    assigned[np.arange(n_pixels)[:, None], pixel_assignments] = True
+    wrong = np.zeros(n_trials, dtype=np.int64)
+    for trial in range(n_trials):
+        truth = rng.random(n_pixels) < match_rate
+        byzantine = rng.choice(n_participants, size=n_byzantine, replace=False)
+        flips, drops = strategy.corrupt(byzantine, pixel_assignments, n_participants, rng)
+        # Honest votes are the true match bit; a flipped candidate inverts the vote
+        votes = VoteMatrix(truth[:, None] ^ flips, assigned & ~drops)
+        wrong[trial] = np.count_nonzero(votes.majority() != truth)
+    return wrong
+
+
+def estimate_wrong_majority(n_participants: int, n_byzantine: int, copies: int = 3,
+                            strategy: ByzantineStrategy = None, n_trials: int = 2000,
+                            n_pixels: int = 256, match_rate: float = 0.5, confidence: float = 0.95,
+                            n_workers: int = 1, seed=None) -> WrongMajorityEstimate:
+    """
+    Estimate P(wrong majority) per pixel by randomized trials
+
+    Each trial draws which pixels truly match (with probability match_rate)
+    and a random Byzantine set, applies the strategy and takes the majority
+    of the (N × M) vote matrix; qubits are assigned as in distributed mode
+    (copies = M is full replication). Trials run in batches with their own
+    seeds, so results for a fixed seed do not depend on n_workers.
+    
+    Pixels of one trial share the Byzantine set and are not independent, so
+    the trial is the sampling unit: the interval is a Wilson interval with
+    the design-corrected effective sample size p(1-p) / Var(mean of the
+    per-trial wrong fractions), kept between n_trials and n_trials·n_pixels.
+
+    Args:
+        n_participants: Number of C participants (M)
+        n_byzantine: Number of Byzantine C participants
+        copies: C participants per qubit
+        strategy: Byzantine behaviour (default: FlipAll)
+        n_trials: Number of randomized trials
+        n_pixels: Pixels per trial
+        match_rate: Probability that a pixel truly matches
+        confidence: Confidence level of the interval
+        n_workers: Worker processes (spawned, as with the other pools)
+        seed: Root seed
+
+    Returns:
+        WrongMajorityEstimate
+    """
+    if not 0 <= n_byzantine <= n_participants:
+        raise ValueError(f"n_byzantine must be between 0 and {n_participants}")
+    if not 1 <= copies <= n_participants:
+        raise ValueError(f"copies must be between 1 and {n_participants}")
+    strategy = FlipAll() if strategy is None else strategy
+
+    batch_sizes = [min(TRIALS_PER_BATCH, n_trials - start) for start in range(0, n_trials, TRIALS_PER_BATCH)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    args = [(n_participants, n_byzantine, copies, strategy, n_pixels, match_rate, size, batch_seed)
+            for size, batch_seed in zip(batch_sizes, seeds)]
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            batches = list(pool.map(_run_trials, *zip(*args)))
+    else:
+        batches = [_run_trials(*batch_args) for batch_args in args]
+    wrong = np.concatenate(batches) if batches else np.zeros(0, dtype=np.int64)
+
+    n_done = len(wrong)
+    fractions = wrong / n_pixels if n_pixels else np.zeros(n_done)
+    p = float(fractions.mean()) if n_done else 0.0
+    if n_done and n_pixels:
+        mean_variance = fractions.var(ddof=1) / n_done if n_done > 1 else 0.0
+        n_effective = p * (1 - p) / mean_variance if mean_variance > 0 else n_done
+        n_effective = min(max(n_effective, n_done), n_done * n_pixels)
+        low, high = wilson_interval(p, n_effective, confidence)
+    else:
+        low, high = 0.0, 1.0
+
+    return WrongMajorityEstimate(n_participants, n_byzantine, copies, repr(strategy), n_done, n_pixels,
+                                 p, float(low), float(high),
+                                 float(np.count_nonzero(wrong) / n_done) if n_done else 0.0)
+
+
+def wrong_majority_sweep(participants: Sequence[int] = (5, 7, 9), byzantine_counts: Sequence[int] = (0, 1, 2),
+                         copies: Sequence[int] = (3,), strategy: ByzantineStrategy = None,
+                         **kwargs) -> List[WrongMajorityEstimate]:
+    """
+    Run estimate_wrong_majority over a grid of deployments
+
+    Combinations with more Byzantine participants or copies than
+    participants are skipped. Remaining keyword arguments are passed on.
+
+    Returns:
+        One WrongMajorityEstimate per (M, Byzantine count, copies)
+    """
+    return [estimate_wrong_majority(n_participants, n_byzantine, n_copies, strategy, **kwargs)
+            for n_participants in participants
+            for n_byzantine in byzantine_counts if n_byzantine <= n_participants
+            for n_copies in copies if n_copies <= n_participants]
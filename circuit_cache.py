@@ -0,0 +1,180 @@
+"""
+Compiled Circuit Cache
+Process-wide LRU cache of transpiled circuit skeletons
+
+Most simulator calls in this project run circuits that are structurally
+identical and differ only in parameter values (RBE decrypt-and-measure
+circuits) or in a single gate (teleportation circuits). This module keeps
+one transpiled copy per structure so repeated runs skip transpilation:
+- Keys describe structure: gates, qubits, clbits, conditions and parameters
+- Size is capped with least-recently-used eviction
+- Hit, miss and eviction counters are reported by stats()
+
+Transpiled circuits are shared between callers and must be treated as
+read-only; bind parameters with assign_parameters (which returns a copy)
+or pass them to the simulator as parameter_binds.
+"""
+
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+from qiskit import QuantumCircuit, transpile
+from qiskit.circuit import ParameterExpression
+
+
+class TranspileCache:
+    """
+    LRU cache mapping circuit structure to a transpiled circuit
+    """
+
+    def __init__(self, max_size: int = 256):
+        """
+        Initialize an empty cache
+
+        Args:
+            max_size: Maximum number of transpiled circuits kept
+        """
+        if max_size < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def structure_key(circuit: QuantumCircuit) -> Tuple:
+        """
+        Compute a hashable key describing the structure of a circuit
+
+        Unbound parameters are keyed by the Parameter objects themselves, so
+        a cached skeleton can be bound with the caller's parameters.
+
+        Args:
+            circuit: Circuit to describe
+
+        Returns:
+            Tuple of register sizes and per-instruction descriptions
+        """
+        instructions = []
+        for instruction in circuit.data:
+            operation = instruction.operation
+            params = tuple(param if isinstance(param, ParameterExpression) else repr(param)
+                           for param in operation.params)
+            qubits = tuple(circuit.find_bit(qubit).index for qubit in instruction.qubits)
+            clbits = tuple(circuit.find_bit(clbit).index for clbit in instruction.clbits)
+            instructions.append((operation.name, params, qubits, clbits,
+                                 TranspileCache._condition_key(circuit, operation)))
+        return (circuit.num_qubits, circuit.num_clbits, tuple(instructions))
+
+    @staticmethod
+    def _condition_key(circuit: QuantumCircuit, operation) -> Tuple:
+        """Describe a classical condition (c_if) of an operation, if any"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            condition = getattr(operation, 'condition', None)
+        if condition is None:
+            return ()
+        target, value = condition
+        if hasattr(target, 'name') and hasattr(target, 'size'):
+            return ('register', target.name, value)
+        return ('bit', circuit.find_bit(target).index, value)
+
+    def transpile(self, circuit: QuantumCircuit, backend, **transpile_options) -> QuantumCircuit:
+        """
+        Transpile a circuit, reusing a cached result for the same structure
+
+        Args:
+            circuit: Circuit to transpile
+            backend: Target backend (e.g. AerSimulator)
+            **transpile_options: Extra options passed to qiskit.transpile
+
+        Returns:
+            Transpiled circuit (shared, read-only)
+        """
+        key = self.structure_key(circuit)
+        return self.get_or_transpile(key, lambda: circuit, backend, **transpile_options)
+
+    def get_or_transpile(self, key: Hashable, build: Callable[[], QuantumCircuit],
+                         backend, **transpile_options) -> QuantumCircuit:
+        """
+        Get a transpiled skeleton by an explicit structural key
+
+        The circuit is only built (and transpiled) on a miss, so callers
+        that know their structure up front skip construction entirely.
+
+        Args:
+            key: Hashable description of the circuit structure
+            build: Function building the untranspiled circuit
+            backend: Target backend (e.g. AerSimulator)
+            **transpile_options: Extra options passed to qiskit.transpile
+
+        Returns:
+            Transpiled circuit (shared, read-only)
+        """
+        full_key = (self._backend_key(backend), key, tuple(sorted(transpile_options.items())))
+
+        with self._lock:
+            if full_key in self._entries:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return self._entries[full_key]
+            self.misses += 1
+
+        compiled = transpile(build(), backend, **transpile_options)
+
+        with self._lock:
+            self._entries[full_key] = compiled
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return compiled
+
+    @staticmethod
+    def _backend_key(backend) -> Tuple:
+        """Identify a backend configuration"""
+        name = getattr(backend, 'name', type(backend).__name__)
+        if callable(name):
+            name = name()
+        options = getattr(backend, 'options', None)
+        method = getattr(options, 'method', None) if options is not None else None
+        return (type(backend).__name__, name, method)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Report cache counters
+
+        Returns:
+            Dictionary with hits, misses, evictions, size, max_size and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drop all cached circuits and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+_default_cache = TranspileCache()
+
+
+def get_transpile_cache() -> TranspileCache:
+    """Get the process-wide transpile cache"""
+    return _default_cache
@@ -0,0 +1,154 @@
+"""
+Batched Noise Channels
+Kraus-channel noise on all pixel qubits at once
+
+The RBE protocol moves each encrypted qubit A → C → B. This module models
+noise on those hops as single-qubit Kraus channels applied to an (N, 2, 2)
+stack of density matrices in one NumPy computation, instead of one Aer
+density-matrix simulation per circuit:
+- depolarizing(p), amplitude_damping(gamma) and dephasing(p) channels
+- NoiseModel groups channels per stage: A → C transit, storage at C and
+  C → B transit, plus classical readout error in B's measurement
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+NOISE_STAGES = ('a_to_c', 'storage', 'c_to_b')
+
+
+class KrausChannel:
+    """
+    Single-qubit channel ρ → Σ_k K_k ρ K_k†
+    """
+
+    def __init__(self, name: str, kraus_ops: Sequence[np.ndarray]):
+        """
+        Initialize a channel from its Kraus operators
+
+        Args:
+            name: Label used in reports
+            kraus_ops: 2×2 operators satisfying Σ K†K = I
+        """
+        ops = np.asarray(kraus_ops, dtype=complex)
+        if ops.ndim != 3 or ops.shape[1:] != (2, 2):
+            raise ValueError("Kraus operators must be 2×2 matrices")
+        completeness = np.einsum('kji,kjl->il', ops.conj(), ops)
+        if not np.allclose(completeness, np.eye(2), atol=1e-10):
+            raise ValueError(f"Kraus operators of '{name}' are not trace preserving")
+        self.name = name
+        self.kraus_ops = ops
+        # Row-major vec(K ρ K†) = (K ⊗ K*) vec(ρ); summed over k
+        self.superoperator = sum(np.kron(K, K.conj()) for K in ops)
+
+    def apply(self, rhos: np.ndarray) -> np.ndarray:
+        """
+        Apply the channel to every density matrix
+
+        Args:
+            rhos: Density matrices, shape (N, 2, 2)
+
+        Returns:
+            Transformed density matrices, shape (N, 2, 2)
+        """
+        return (rhos.reshape(-1, 4) @ self.superoperator.T).reshape(rhos.shape)
+
+    def __repr__(self) -> str:
+        return f"KrausChannel('{self.name}', {len(self.kraus_ops)} operators)"
+
+
+def depolarizing(p: float) -> KrausChannel:
+    """Depolarizing channel: ρ → (1 - p)ρ + p·I/2"""
+    _check_probability(p)
+    X = np.array([[0, 1], [1, 0]])
+    Y = np.array([[0, -1j], [1j, 0]])
+    Z = np.array([[1, 0], [0, -1]])
+    return KrausChannel(f'depolarizing({p})', [np.sqrt(1 - 3 * p / 4) * np.eye(2),
+                                                np.sqrt(p / 4) * X, np.sqrt(p / 4) * Y, np.sqrt(p / 4) * Z])
+
+
+def amplitude_damping(gamma: float) -> KrausChannel:
+    """Amplitude damping: |1⟩ decays to |0⟩ with probability gamma"""
+    _check_probability(gamma)
+    return KrausChannel(f'amplitude_damping({gamma})', [np.array([[1, 0], [0, np.sqrt(1 - gamma)]]),
+                                                         np.array([[0, np.sqrt(gamma)], [0, 0]])])
+
+
+def dephasing(p: float) -> KrausChannel:
+    """Phase flip (dephasing): Z applied with probability p"""
+    _check_probability(p)
+    return KrausChannel(f'dephasing({p})', [np.sqrt(1 - p) * np.eye(2),
+                                             np.sqrt(p) * np.array([[1, 0], [0, -1]])])
+
+
+def _check_probability(p: float):
+    if not 0.0 <= p <= 1.0:
+        raise ValueError(f"Noise parameter must be between 0 and 1, got {p}")
+
+
+class NoiseModel:
+    """
+    Noise channels applied at each stage of a qubit's trip A → C → B
+    """
+
+    def __init__(self, a_to_c: List[KrausChannel] = (), storage: List[KrausChannel] = (),
+                 c_to_b: List[KrausChannel] = (), readout: Tuple[float, float] = (0.0, 0.0)):
+        """
+        Initialize a noise model
+
+        Args:
+            a_to_c: Channels on the transit from A to C (before the CNOT)
+            storage: Channels while C holds the qubit (before the CNOT)
+            c_to_b: Channels on the transit from C to B (after the CNOT)
+            readout: (P(read 1 | 0), P(read 0 | 1)) of B's measurement
+        """
+        for p in readout:
+            _check_probability(p)
+        self.readout = tuple(float(p) for p in readout)
+        self.stages: Dict[str, List[KrausChannel]] = {
+            'a_to_c': list(a_to_c),
+            'storage': list(storage),
+            'c_to_b': list(c_to_b),
+        }
+
+    @classmethod
+    def uniform(cls, channels: List[KrausChannel],
+                readout: Tuple[float, float] = (0.0, 0.0)) -> 'NoiseModel':
+        """Same channels on every stage"""
+        return cls(channels, channels, channels, readout)
+
+    def apply(self, stage: str, rhos: np.ndarray) -> np.ndarray:
+        """
+        Apply the channels of one stage in order
+
+        Args:
+            stage: One of NOISE_STAGES
+            rhos: Density matrices, shape (N, 2, 2)
+
+        Returns:
+            Transformed density matrices
+        """
+        if stage not in self.stages:
+            raise ValueError(f"Unknown noise stage '{stage}' (expected one of {NOISE_STAGES})")
+        for channel in self.stages[stage]:
+            rhos = channel.apply(rhos)
+        return rhos
+
+    def apply_readout(self, p_one: np.ndarray) -> np.ndarray:
+        """Probability that B reads 1, given the probability the qubit is |1⟩"""
+        p_flip_0, p_flip_1 = self.readout
+        return p_one * (1.0 - p_flip_1) + (1.0 - p_one) * p_flip_0
+
+    def signature(self) -> Tuple:
+        """Hashable description of the channels, used as a cache key"""
+        stages = tuple((stage, tuple(channel.superoperator.round(12).tobytes() for channel in channels))
+                       for stage, channels in self.stages.items())
+        return stages + (('readout', self.readout),)
+
+    def __repr__(self) -> str:
+        parts = [f"{stage}={[channel.name for channel in channels]}"
+                 for stage, channels in self.stages.items() if channels]
+        if any(self.readout):
+            parts.append(f"readout={self.readout}")
+        return f"NoiseModel({', '.join(parts) or 'noiseless'})"
@@ -0,0 +1,252 @@
+"""
+Packed Binary Images
+Bit-packed storage for binary (0/1) images
+
+Binary images are otherwise held as int64 arrays, 8 bytes per pixel. This
+module packs them 64 pixels per uint64 word, and the classical steps of
+the protocols work on the words directly:
+- XOR of two images is one word-wise XOR
+- Mismatch counting is a popcount of the XOR
+- Row slicing selects word rows, column slicing shifts words
+
+Each image row starts on a word boundary (pixel (r, c) is bit c % 64 of
+word (r, c // 64)); padding bits past the last column are always zero, so
+word-level operations never see stray pixels.
+"""
+
+from typing import Tuple, Union
+
+import numpy as np
+
+WORD_BITS = 64
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words: np.ndarray) -> int:
+        """Count set bits in an array of uint64 words"""
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+else:
+    # NumPy < 2.0: per-byte lookup table
+    _BYTE_POPCOUNT = np.array([bin(b).count('1') for b in range(256)], dtype=np.uint8)
+
+    def popcount(words: np.ndarray) -> int:
+        """Count set bits in an array of uint64 words"""
+        return int(_BYTE_POPCOUNT[np.ascontiguousarray(words).view(np.uint8)].sum(dtype=np.int64))
+
+
+class PackedBinaryImage:
+    """
+    Binary image stored as row-aligned uint64 words
+    """
+
+    def __init__(self, words: np.ndarray, shape: Tuple[int, int]):
+        """
+        Wrap packed words (see from_array for building from pixels)
+
+        Args:
+            words: uint64 array of shape (rows, ceil(cols / 64)) with zero
+                   padding bits
+            shape: Image shape (rows, cols)
+        """
+        rows, cols = shape
+        if words.dtype != np.uint64 or words.shape != (rows, self.words_per_row(cols)):
+            raise ValueError(f"Expected uint64 words of shape {(rows, self.words_per_row(cols))} "
+                             f"for image shape {shape}, got {words.dtype} {words.shape}")
+        self.words = words
+        self.shape = (rows, cols)
+
+    @staticmethod
+    def words_per_row(cols: int) -> int:
+        """Number of uint64 words holding one row of the given width"""
+        return -(-cols // WORD_BITS)
+
+    @classmethod
+    def from_array(cls, image: np.ndarray) -> 'PackedBinaryImage':
+        """
+        Pack a binary image (nonzero pixels become 1)
+
+        Args:
+            image: 2D binary array; a 1D array is packed as a single row
+
+        Returns:
+            Packed image
+        """
+        image = np.asarray(image)
+        if image.ndim == 1:
+            image = image.reshape(1, -1)
+        if image.ndim != 2:
+            raise ValueError(f"Expected a 1D or 2D image, got {image.ndim} dimensions")
+
+        rows, cols = image.shape
+        row_bytes = cls.words_per_row(cols) * 8
+        packed = np.zeros((rows, row_bytes), dtype=np.uint8)
+        packed[:, :(cols + 7) // 8] = np.packbits(image != 0, axis=1, bitorder='little')
+        words = packed.view('<u8').astype(np.uint64, copy=False)
+        return cls(words, (rows, cols))
+
+    @classmethod
+    def zeros(cls, shape: Tuple[int, int]) -> 'PackedBinaryImage':
+        """All-zero packed image"""
+        rows, cols = shape
+        return cls(np.zeros((rows, cls.words_per_row(cols)), dtype=np.uint64), shape)
+
+    @classmethod
+    def random(cls, shape: Tuple[int, int], rng: np.random.Generator = None) -> 'PackedBinaryImage':
+        """
+        Uniformly random packed image, generated a word (64 pixels) at a time
+
+        Args:
+            shape: Image shape (rows, cols)
+            rng: Generator to draw from (default: one seeded from NumPy's
+                 global state, so np.random.seed applies as it does to the
+                 unpacked code paths)
+
+        Returns:
+            Packed image
+        """
+        rng = rng if rng is not None else np.random.default_rng(np.random.randint(0, 2**32))
+        rows, cols = shape
+        words = rng.integers(0, np.iinfo(np.uint64).max, size=(rows, cls.words_per_row(cols)),
+                             dtype=np.uint64, endpoint=True)
+        return cls(cls._mask_padding(words, cols), shape)
+
+    @staticmethod
+    def _mask_padding(words: np.ndarray, cols: int) -> np.ndarray:
+        """Clear bits past the last column (in place) and return the words"""
+        tail = cols % WORD_BITS
+        if tail and words.size:
+            words[:, -1] &= np.uint64((1 << tail) - 1)
+        return words
+
+    def to_array(self, dtype=np.uint8) -> np.ndarray:
+        """Unpack into a 2D array of 0/1 pixels"""
+        rows, cols = self.shape
+        as_bytes = self.words.astype('<u8', copy=False).view(np.uint8)
+        bits = np.unpackbits(as_bytes, axis=1, count=cols, bitorder='little')
+        return bits.astype(dtype, copy=False)
+
+    def flatten(self) -> np.ndarray:
+        """Unpack into a 1D uint8 array in row-major pixel order"""
+        return self.to_array().ravel()
+
+    def __array__(self, dtype=None, copy=None):
+        return self.to_array(dtype if dtype is not None else np.uint8)
+
+    @property
+    def size(self) -> int:
+        """Number of pixels"""
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the packed words"""
+        return self.words.nbytes
+
+    def get_bits(self, pixel_indices: Union[int, np.ndarray]) -> Union[int, np.ndarray]:
+        """
+        Read pixels by flat (row-major) index without unpacking the image
+
+        Args:
+            pixel_indices: Flat pixel index or array of indices
+
+        Returns:
+            Pixel value (int) or uint8 array of pixel values
+        """
+        rows, cols = np.divmod(pixel_indices, self.shape[1])
+        shifts = (np.asarray(cols) % WORD_BITS).astype(np.uint64)
+        bits = (self.words[rows, cols // WORD_BITS] >> shifts) & np.uint64(1)
+        if np.ndim(bits) == 0:
+            return int(bits)
+        return bits.astype(np.uint8)
+
+    def __getitem__(self, key) -> Union[int, 'PackedBinaryImage']:
+        """
+        Index or slice the image
+
+        img[r, c] returns a pixel. Any other key returns a packed sub-image:
+        integer indices keep their dimension, row slices select word rows
+        and unit-step column slices shift whole words; other column steps
+        fall back to unpacking the selected rows.
+        """
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        if len(key) != 2:
+            raise IndexError("PackedBinaryImage takes at most 2 indices")
+        row_key, col_key = key
+        rows, cols = self.shape
+
+        if isinstance(row_key, (int, np.integer)) and isinstance(col_key, (int, np.integer)):
+            row = range(rows)[row_key]
+            col = range(cols)[col_key]
+            return self.get_bits(row * cols + col)
+
+        if isinstance(row_key, (int, np.integer)):
+            row = range(rows)[row_key]
+            row_key = slice(row, row + 1)
+        if isinstance(col_key, (int, np.integer)):
+            col = range(cols)[col_key]
+            col_key = slice(col, col + 1)
+        if not isinstance(row_key, slice) or not isinstance(col_key, slice):
+            raise TypeError("PackedBinaryImage supports integer and slice indices only")
+
+        words = self.words[row_key]
+        col_start, col_stop, col_step = col_key.indices(cols)
+        if col_step != 1:
+            selected = PackedBinaryImage(words, (words.shape[0], cols)).to_array()
+            return PackedBinaryImage.from_array(selected[:, col_key])
+
+        width = max(col_stop - col_start, 0)
+        return PackedBinaryImage(self._shift_columns(words, col_start, width), (words.shape[0], width))
+
+    @classmethod
+    def _shift_columns(cls, words: np.ndarray, start: int, width: int) -> np.ndarray:
+        """Extract columns start..start+width-1 of packed rows by word shifts"""
+        n_out = cls.words_per_row(width)
+        first, offset = divmod(start, WORD_BITS)
+        source = np.zeros((words.shape[0], n_out + 1), dtype=np.uint64)
+        available = words[:, first:first + n_out + 1]
+        source[:, :available.shape[1]] = available
+        if offset:
+            out = (source[:, :n_out] >> np.uint64(offset)) | (source[:, 1:] << np.uint64(WORD_BITS - offset))
+        else:
+            out = source[:, :n_out].copy()
+        return cls._mask_padding(out, width)
+
+    def _check_shape(self, other: 'PackedBinaryImage'):
+        if not isinstance(other, PackedBinaryImage):
+            raise TypeError(f"Expected PackedBinaryImage, got {type(other).__name__}")
+        if other.shape != self.shape:
+            raise ValueError(f"Image shapes differ: {self.shape} vs {other.shape}")
+
+    def __xor__(self, other: 'PackedBinaryImage') -> 'PackedBinaryImage':
+        """Pixel-wise XOR, computed on whole words"""
+        self._check_shape(other)
+        return PackedBinaryImage(self.words ^ other.words, self.shape)
+
+    def __invert__(self) -> 'PackedBinaryImage':
+        """Pixel-wise complement (padding bits stay zero)"""
+        return PackedBinaryImage(self._mask_padding(~self.words, self.shape[1]), self.shape)
+
+    def __rsub__(self, other) -> 'PackedBinaryImage':
+        """Support 1 - image, the complement idiom used for unpacked images"""
+        if not (np.isscalar(other) and other == 1):
+            return NotImplemented
+        return ~self
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PackedBinaryImage):
+            return NotImplemented
+        return self.shape == other.shape and bool(np.array_equal(self.words, other.words))
+
+    __hash__ = None
+
+    def count_ones(self) -> int:
+        """Number of 1 pixels (popcount of the words)"""
+        return popcount(self.words)
+
+    def count_mismatches(self, other: 'PackedBinaryImage') -> int:
+        """Number of pixels where two images differ (popcount of the XOR)"""
+        self._check_shape(other)
+        return popcount(self.words ^ other.words)
+
+    def __repr__(self) -> str:
+        return f"PackedBinaryImage(shape={self.shape}, nbytes={self.nbytes})"
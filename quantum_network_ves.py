@@ -16,6 +16,7 @@ from qiskit.quantum_info import Statevector, DensityMatrix, entropy
 import matplotlib.pyplot as plt
 from typing import List, Tuple, Dict
 import networkx as nx
+from circuit_cache import get_transpile_cache
 
 
 class QuantumNode:
@@ -63,6 +64,7 @@ class QuantumNetworkVES:
         self.n_nodes = n_nodes
         self.nodes = [QuantumNode(f"Node_{i}") for i in range(n_nodes)]
         self.simulator = AerSimulator()
+        self.transpile_cache = get_transpile_cache()
         self.network_topology = self._create_network_topology()
         
     def _create_network_topology(self) -> nx.Graph:
@@ -154,10 +156,14 @@ class QuantumNetworkVES:
             
             node_pixels = flat_image[start_idx:end_idx]
             
-            # Create teleportation circuits for each pixel
+            # Get compiled teleportation circuits for each pixel; they only
+            # differ in the initial X gate, so at most two are ever transpiled
             teleport_circuits = []
             for pixel_val in node_pixels:
-                qc = self.quantum_teleportation_protocol(pixel_val, 0, node_idx)
+                qc = self.transpile_cache.get_or_transpile(
+                    ('teleportation', int(pixel_val)),
+                    lambda: self.quantum_teleportation_protocol(pixel_val, 0, node_idx),
+                    self.simulator)
                 teleport_circuits.append(qc)
             
             # Store at node
@@ -276,8 +282,9 @@ class QuantumNetworkVES:
             # Measure all qubits
             qc_copy.measure(range(n_qubits), range(n_qubits))
             
-            # Execute
-            job = self.simulator.run(qc_copy, shots=100)
+            # Execute (structurally identical shares are transpiled once)
+            qc_compiled = self.transpile_cache.transpile(qc_copy, self.simulator)
+            job = self.simulator.run(qc_compiled, shots=100)
             result = job.result()
             counts = result.get_counts()
             
@@ -11,7 +11,8 @@ from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
 from qiskit_aer import AerSimulator
 from qiskit.visualization import plot_histogram, plot_bloch_multivector
 import matplotlib.pyplot as plt
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Union
+from packed_image import PackedBinaryImage
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -137,27 +138,41 @@ class QuantumVES:
         
         return qc
     
-    def xor_based_sharing(self, image: np.ndarray) -> Tuple[QuantumCircuit, QuantumCircuit]:
+    def xor_based_sharing(self, image: np.ndarray,
+                          rng: np.random.Generator = None) -> Tuple[QuantumCircuit, QuantumCircuit]:
         """
         Create quantum shares using XOR-based visual cryptography
         
         Share 1 is random, Share 2 = Image XOR Share 1
         This is quantum enhanced with superposition states.
         
+        For a PackedBinaryImage the shares are generated and XORed a word
+        (64 pixels) at a time and returned packed.
+        
         Args:
-            image: Binary image array
+            image: Binary image array or PackedBinaryImage
+            rng: Generator for the random share (default: NumPy's global
+                 random state, see np.random.seed)
             
         Returns:
-            Tuple of (share1_circuit, share2_circuit)
+            Tuple of (share1_circuit, share2_circuit, share1_values, share2_values)
         """
-        flat_image = image.flatten()
-        n_pixels = len(flat_image)
-        
-        # Generate random share 1
-        random_share = np.random.randint(0, 2, n_pixels)
+        if isinstance(image, PackedBinaryImage):
+            random_share = PackedBinaryImage.random(image.shape, rng)
+            share2_values = image ^ random_share
+        else:
+            flat_image = image.flatten()
+            
+            # Generate random share 1
+            if rng is None:
+                random_share = np.random.randint(0, 2, len(flat_image))
+            else:
+                random_share = rng.integers(0, 2, len(flat_image))
+            
+            # Compute share 2 as XOR
+            share2_values = np.bitwise_xor(flat_image, random_share)
         
-        # Compute share 2 as XOR
-        share2_values = np.bitwise_xor(flat_image, random_share)
+        n_pixels = image.size
         
         # Create quantum circuits
         qr1 = QuantumRegister(n_pixels, name='share_1')
@@ -169,13 +184,13 @@ class QuantumVES:
         qc2 = QuantumCircuit(qr2, cr2)
         
         # Encode share 1 with quantum superposition
-        for i, val in enumerate(random_share):
+        for i, val in enumerate(random_share.flatten()):
             if val == 1:
                 qc1.x(i)
             qc1.h(i)  # Add superposition for quantum enhancement
         
         # Encode share 2
-        for i, val in enumerate(share2_values):
+        for i, val in enumerate(share2_values.flatten()):
             if val == 1:
                 qc2.x(i)
             qc2.h(i)  # Add superposition
@@ -219,18 +234,20 @@ class QuantumVES:
         
         return reconstructed.reshape(self.height, self.width)
     
-    def classical_xor_reconstruct(self, share1: np.ndarray, 
-                                 share2: np.ndarray) -> np.ndarray:
+    def classical_xor_reconstruct(self, share1: Union[np.ndarray, PackedBinaryImage],
+                                 share2: Union[np.ndarray, PackedBinaryImage]) -> Union[np.ndarray, PackedBinaryImage]:
         """
         Reconstruct image using classical XOR of shares
         
         Args:
-            share1: First share values
-            share2: Second share values
+            share1: First share values (array or PackedBinaryImage)
+            share2: Second share values (same type as share1)
             
         Returns:
-            Reconstructed image
+            Reconstructed image (packed if the shares are packed)
         """
+        if isinstance(share1, PackedBinaryImage):
+            return share1 ^ share2
         return np.bitwise_xor(share1, share2)
 
 
@@ -304,16 +321,18 @@ class QuantumVisualSecretSharing:
         return qc
 
 
-def create_sample_image(pattern: str = 'checkerboard', size: Tuple[int, int] = (4, 4)) -> np.ndarray:
+def create_sample_image(pattern: str = 'checkerboard', size: Tuple[int, int] = (4, 4),
+                        packed: bool = False) -> Union[np.ndarray, PackedBinaryImage]:
     """
     Create sample binary images for testing
     
     Args:
         pattern: Type of pattern ('checkerboard', 'stripes', 'cross', 'random')
         size: Image dimensions
+        packed: If True, return a bit-packed PackedBinaryImage
         
     Returns:
-        Binary image array
+        Binary image array (or PackedBinaryImage)
     """
     h, w = size
     
@@ -333,6 +352,8 @@ def create_sample_image(pattern: str = 'checkerboard', size: Tuple[int, int] = (
     else:
         img = np.zeros((h, w), dtype=int)
     
+    if packed:
+        return PackedBinaryImage.from_array(img)
     return img
 
 
@@ -0,0 +1,130 @@
+"""
+Qubit Assignment Engine
+Balanced, cap-respecting assignment of pixel qubits to C participants
+
+In distributed mode every pixel's qubit goes to `copies` distinct C
+participants and no C should see more than 1/3 of the image. Slot
+(pixel, copy) goes to C (pixel·copies + copy) mod M: consecutive slots
+cycle through all participants, so each pixel's Cs are distinct and loads
+differ by at most one. The largest load, ⌈N·copies/M⌉, is the smallest
+possible, so the cap holds whenever any assignment can meet it, i.e.
+whenever M·cap ≥ N·copies. With 3 copies that needs M ≥ 9 participants;
+for M = 5 every assignment gives some C 60% of the pixels, which
+QubitAssignment.feasible reports.
+
+Assignments are compact (N, copies) int32 arrays with a C-major CSR view,
+built in O(N) and cached per (N, M, copies).
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+# Each C participant may see at most 1/EXPOSURE_DIVISOR of the pixels
+EXPOSURE_DIVISOR = 3
+
+
+class IncidenceCSR(NamedTuple):
+    """C-major incidence: pixels of participant c are indices[indptr[c]:indptr[c + 1]]"""
+    indptr: np.ndarray
+    indices: np.ndarray
+
+
+class QubitAssignment:
+    """
+    Read-only (N, copies) table of the C participants holding each qubit
+    """
+
+    def __init__(self, pixels_to_cs: np.ndarray, n_participants: int):
+        """
+        Wrap an assignment table (see build_assignment)
+
+        Args:
+            pixels_to_cs: (N, copies) int32 array of C indices
+            n_participants: Number of C participants (M)
+        """
+        self.pixels_to_cs = np.array(pixels_to_cs, dtype=np.int32)
+        self.pixels_to_cs.setflags(write=False)
+        self.n_participants = n_participants
+        self.n_pixels, self.copies = self.pixels_to_cs.shape
+        self.cap = max(1, self.n_pixels // EXPOSURE_DIVISOR)
+        self.loads = np.bincount(self.pixels_to_cs.ravel(), minlength=n_participants)
+        self._csr = None
+
+    @property
+    def feasible(self) -> bool:
+        """Whether any assignment can respect the per-C cap"""
+        return self.n_participants * self.cap >= self.n_pixels * self.copies
+
+    @property
+    def cap_respected(self) -> bool:
+        """Whether every C holds at most cap qubits"""
+        return int(self.loads.max(initial=0)) <= self.cap
+
+    @property
+    def max_share(self) -> float:
+        """Largest fraction of the pixels held by one C"""
+        return int(self.loads.max(initial=0)) / self.n_pixels if self.n_pixels else 0.0
+
+    def __len__(self) -> int:
+        return self.n_pixels
+
+    def __getitem__(self, pixel_idx: int) -> np.ndarray:
+        """C participants holding the qubit of one pixel"""
+        return self.pixels_to_cs[pixel_idx]
+
+    def csr(self) -> IncidenceCSR:
+        """
+        C-major CSR incidence (built once, in O(N + M))
+
+        Returns:
+            IncidenceCSR with the pixels of each C in increasing order
+        """
+        if self._csr is None:
+            n_slots = self.n_pixels * self.copies
+            flat = self.pixels_to_cs.ravel()
+            if np.array_equal(flat, round_robin_slots(n_slots, self.n_participants)):
+                # Slots of C c are c, c + M, c + 2M, ...: transpose a padded grid
+                rows = -(-n_slots // self.n_participants)
+                grid = np.arange(rows * self.n_participants, dtype=np.int64)
+                grid = grid.reshape(rows, self.n_participants).T.ravel()
+                slots = grid[grid < n_slots]
+            else:
+                slots = np.argsort(flat, kind='stable')
+            indptr = np.zeros(self.n_participants + 1, dtype=np.int64)
+            np.cumsum(self.loads, out=indptr[1:])
+            indices = (slots // self.copies).astype(np.int32)
+            indptr.setflags(write=False)
+            indices.setflags(write=False)
+            self._csr = IncidenceCSR(indptr, indices)
+        return self._csr
+
+    def pixels_of(self, c_idx: int) -> np.ndarray:
+        """Pixels whose qubit participant c_idx holds"""
+        indptr, indices = self.csr()
+        return indices[indptr[c_idx]:indptr[c_idx + 1]]
+
+
+def round_robin_slots(n_slots: int, n_participants: int) -> np.ndarray:
+    """C participant of each consecutive (pixel, copy) slot"""
+    return (np.arange(n_slots, dtype=np.int64) % n_participants).astype(np.int32)
+
+
+@lru_cache(maxsize=32)
+def build_assignment(n_pixels: int, n_participants: int, copies: int) -> QubitAssignment:
+    """
+    Build (or reuse) the balanced assignment for N pixels and M participants
+
+    Args:
+        n_pixels: Number of pixel qubits (N)
+        n_participants: Number of C participants (M)
+        copies: Distinct C participants per qubit (at most M)
+
+    Returns:
+        Cached QubitAssignment (shared, read-only)
+    """
+    if not 1 <= copies <= n_participants:
+        raise ValueError(f"copies must be between 1 and the number of participants ({n_participants})")
+    slots = round_robin_slots(n_pixels * copies, n_participants)
+    return QubitAssignment(slots.reshape(n_pixels, copies), n_participants)
@@ -9,22 +9,196 @@ This module implements the exact quantum VES design from the paper using:
 - Byzantine-resilient majority voting
 """
 
+import os
+import sys
+import time
+import queue
+import asyncio
+import hashlib
+import contextlib
+import secrets
+import multiprocessing
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+from qiskit.circuit import Parameter
 from qiskit_aer import AerSimulator
 from qiskit.quantum_info import Statevector
+from circuit_cache import get_transpile_cache
+from packed_image import PackedBinaryImage
+from sequential_test import SequentialThresholdTest, ThresholdDecision
+from sampled_estimate import MatchEstimate, required_sample_size, sample_pixels, estimate_match_rate
+from noise_channels import NoiseModel
+from readout_mitigation import get_readout_mitigator
+from vote_matrix import VoteMatrix
+from qubit_assignment import QubitAssignment, build_assignment
+from byzantine_strategies import ByzantineStrategy, FlipAll
+from tracing import Tracer, JsonlSink, resolve_tracer
 import matplotlib.pyplot as plt
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, NamedTuple, Optional, Union, Iterator
 
 
 class RBEEncoder:
     """
     Random Basis Encryption (RBE) implementation
     Based on Bitan and Dolev's scheme
+    
+    K_{θ,φ} is built from native rotations, K_{θ,φ} = P(φ)·R_y(θ)·Z, in
+    Parameter-based templates that are constructed once and bound per pixel.
     """
     
-    def __init__(self):
+    # Template parameters shared by every RBE circuit
+    THETA = Parameter('θ')
+    PHI = Parameter('φ')
+    PREP_ALPHA = Parameter('α')   # R_y angle preparing a ciphertext state
+    PREP_LAMBDA = Parameter('λ')  # Phase preparing a ciphertext state
+    CNOT_GAMMA = Parameter('γ')   # 1 if C applies CNOT, else 0
+    
+    _templates = {}
+    
+    # Keys converted per os.urandom read in secure mode (8 bytes each)
+    SECURE_CHUNK_KEYS = 1 << 17
+    
+    def __init__(self, seed=None, secure: bool = False):
+        """
+        Initialize the encoder
+        
+        Args:
+            seed: Seed (int or np.random.SeedSequence) for key generation;
+                  None draws fresh OS entropy
+            secure: If True, generate_keys reads the OS CSPRNG (os.urandom)
+                    instead of the seedable numpy stream
+        """
+        if secure and seed is not None:
+            raise ValueError("Secure key generation cannot be seeded")
         self.simulator = AerSimulator()
+        self.rng = np.random.default_rng(seed)
+        self.secure = secure
+        self._seeded = seed is not None
+    
+    @staticmethod
+    def spawn_seeds(seed, n_streams: int) -> List[Optional[np.random.SeedSequence]]:
+        """
+        Create seeds of independent random streams, e.g. one per participant
+        
+        Streams come from SeedSequence.spawn, so they never overlap and a
+        fixed seed always yields the same streams regardless of scheduling.
+        
+        Args:
+            seed: Root seed (int, SeedSequence or None)
+            n_streams: Number of streams
+            
+        Returns:
+            List of child SeedSequences; all None (fresh entropy per
+            stream) when seed is None
+        """
+        if seed is None:
+            return [None] * n_streams
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        return seed.spawn(n_streams)
+    
+    @classmethod
+    def rbe_template(cls, dagger: bool = False) -> QuantumCircuit:
+        """
+        Get the cached single-qubit template for K_{θ,φ} (or K†_{θ,φ})
+        
+        Args:
+            dagger: If True, return the decryption template K†_{θ,φ}
+            
+        Returns:
+            Parameterized circuit over RBEEncoder.THETA and RBEEncoder.PHI
+        """
+        name = 'rbe_dagger' if dagger else 'rbe'
+        if name not in cls._templates:
+            qc = QuantumCircuit(1, name='RBE†' if dagger else 'RBE')
+            if dagger:
+                qc.p(-cls.PHI, 0)
+                qc.ry(-cls.THETA, 0)
+                qc.z(0)
+            else:
+                qc.z(0)
+                qc.ry(cls.THETA, 0)
+                qc.p(cls.PHI, 0)
+            cls._templates[name] = qc
+        return cls._templates[name]
+    
+    @classmethod
+    def preparation_template(cls) -> QuantumCircuit:
+        """
+        Get the cached template preparing a ciphertext state P(λ)·R_y(α)|0⟩
+        
+        Returns:
+            Parameterized circuit over RBEEncoder.PREP_ALPHA and RBEEncoder.PREP_LAMBDA
+        """
+        if 'prep' not in cls._templates:
+            qc = QuantumCircuit(QuantumRegister(1, name='pixel'))
+            qc.ry(cls.PREP_ALPHA, 0)
+            qc.p(cls.PREP_LAMBDA, 0)
+            cls._templates['prep'] = qc
+        return cls._templates['prep']
+    
+    def prepare_state_circuit(self, alpha: float, lam: float) -> QuantumCircuit:
+        """
+        Build a circuit preparing an encrypted state from its (α, λ) angles
+        
+        Args:
+            alpha: R_y angle (see AnalyticRBEEngine.preparation_angles)
+            lam: Relative phase
+            
+        Returns:
+            Quantum circuit with the encrypted pixel
+        """
+        return self.preparation_template().assign_parameters({self.PREP_ALPHA: alpha,
+                                                              self.PREP_LAMBDA: lam})
+    
+    @classmethod
+    def match_template(cls) -> QuantumCircuit:
+        """
+        Get the cached template of one complete matching round for one pixel
+        
+        Prepares the ciphertext state R_y(α), P(λ) held by A, applies C's
+        CNOT as R_x(π·γ), B's K†_{θ,φ}, and measures. Binding all five
+        parameters per pixel stands in for the qubit travelling A → C → B.
+        
+        Returns:
+            Parameterized measurement circuit
+        """
+        if 'match' not in cls._templates:
+            qc = QuantumCircuit(QuantumRegister(1, name='pixel'), ClassicalRegister(1, name='result'))
+            qc.compose(cls.preparation_template(), inplace=True)
+            qc.rx(np.pi * cls.CNOT_GAMMA, 0)
+            qc.compose(cls.rbe_template(dagger=True), inplace=True)
+            qc.measure(0, 0)
+            cls._templates['match'] = qc
+        return cls._templates['match']
+    
+    @classmethod
+    def compiled_match_template(cls, simulator: AerSimulator) -> QuantumCircuit:
+        """Get the match template transpiled for the simulator (compiled once)"""
+        return get_transpile_cache().get_or_transpile(('rbe_match',), cls.match_template, simulator)
+    
+    @classmethod
+    def measurement_skeleton(cls, gates: Tuple[str, ...] = ()) -> QuantumCircuit:
+        """
+        Build the decrypt-and-measure skeleton for a qubit in transit
+        
+        Prepares the ciphertext from (α, λ), applies the transit gates, then
+        K†_{θ,φ} and a measurement. All angles are template parameters.
+        
+        Args:
+            gates: Names of single-qubit gates appended in transit
+            
+        Returns:
+            Parameterized measurement circuit
+        """
+        qc = QuantumCircuit(QuantumRegister(1, name='pixel'), ClassicalRegister(1, name='result'))
+        qc.compose(cls.preparation_template(), inplace=True)
+        for gate in gates:
+            getattr(qc, gate)(0)
+        qc.compose(cls.rbe_template(dagger=True), inplace=True)
+        qc.measure(0, 0)
+        return qc
     
     def generate_key(self) -> Tuple[float, float]:
         """
@@ -35,10 +209,87 @@ class RBEEncoder:
             - theta ∈ [0, 2π]
             - phi ∈ {-π/2, +π/2}
         """
-        theta = np.random.uniform(0, 2 * np.pi)
-        phi = np.random.choice([-np.pi/2, np.pi/2])
+        theta = self.rng.uniform(0, 2 * np.pi)
+        phi = self.rng.choice([-np.pi/2, np.pi/2])
         return theta, phi
     
+    def generate_keys(self, n: int, seed=None, dtype=np.float64) -> 'RBEKeyStore':
+        """
+        Generate the whole RBE key table in one vectorized call
+        
+        Args:
+            n: Number of keys (pixels)
+            seed: Optional seed for a dedicated stream; with a fixed seed the
+                  table is bit-identical across runs. Default: encoder's stream
+            dtype: Float type for θ (np.float64 or np.float32)
+            
+        Returns:
+            RBEKeyStore with θ ∈ [0, 2π) and φ ∈ {-π/2, +π/2}
+        """
+        if self.secure:
+            if seed is not None:
+                raise ValueError("Secure key generation cannot be seeded")
+            return self.generate_secure_keys(n, dtype)
+        
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        thetas = rng.uniform(0, 2 * np.pi, n).astype(dtype, copy=False)
+        phi_bits = rng.integers(0, 2, n, dtype=np.uint8)
+        return RBEKeyStore(_read_only(thetas, copy=False), _read_only(np.packbits(phi_bits), copy=False), n)
+    
+    def derive_keys(self, n: int, key_seed: bytes = None) -> 'DerivedKeyStore':
+        """
+        Create a seed-derived key table (keys computed on demand)
+        
+        Args:
+            n: Number of keys (pixels)
+            key_seed: Shared secret seed; default: 32 fresh bytes from the
+                      OS CSPRNG (or from the encoder's stream when seeded)
+            
+        Returns:
+            DerivedKeyStore holding only the seed
+        """
+        if key_seed is None:
+            key_seed = self.rng.bytes(32) if self._seeded else secrets.token_bytes(32)
+        return DerivedKeyStore(key_seed, n)
+    
+    def generate_secure_keys(self, n: int, dtype=np.float64) -> 'RBEKeyStore':
+        """
+        Generate the key table from the OS CSPRNG in bulk
+        
+        Reads os.urandom in buffers of SECURE_CHUNK_KEYS 64-bit words and
+        converts them to θ in vectorized form; φ sign bits are taken
+        directly from random bytes, already in packed layout.
+        
+        Args:
+            n: Number of keys (pixels)
+            dtype: Float type for θ (np.float64 or np.float32)
+            
+        Returns:
+            RBEKeyStore with θ ∈ [0, 2π) and φ ∈ {-π/2, +π/2}
+        """
+        thetas = np.empty(n, dtype=dtype)
+        for start in range(0, n, self.SECURE_CHUNK_KEYS):
+            stop = min(n, start + self.SECURE_CHUNK_KEYS)
+            words = np.frombuffer(os.urandom(8 * (stop - start)), dtype=np.uint64)
+            thetas[start:stop] = self.thetas_from_words(words)
+        phi_bits = np.frombuffer(os.urandom((n + 7) // 8), dtype=np.uint8)
+        return RBEKeyStore(_read_only(thetas, copy=False), phi_bits, n)
+    
+    @staticmethod
+    def thetas_from_words(words: np.ndarray) -> np.ndarray:
+        """
+        Map uniform random 64-bit words to θ ∈ [0, 2π)
+        
+        Uses the top 53 bits of each word, the full precision of a float64.
+        
+        Args:
+            words: Random np.uint64 array
+            
+        Returns:
+            θ values as float64
+        """
+        return (words >> np.uint64(11)).astype(np.float64) * (2 * np.pi / 2**53)
+    
     def create_rbe_unitary(self, theta: float, phi: float) -> np.ndarray:
         """
         Create RBE unitary operator K_{θ,φ}
@@ -81,8 +332,8 @@ class RBEEncoder:
             qc.x(0)
         
         # Apply RBE unitary K_{θ,φ}
-        K = self.create_rbe_unitary(theta, phi)
-        qc.unitary(K, [0], label=f'RBE({theta:.2f},{phi:.2f})')
+        K = self.rbe_template().assign_parameters({self.THETA: theta, self.PHI: phi})
+        qc.compose(K, inplace=True)
         
         return qc
     
@@ -99,272 +350,1772 @@ class RBEEncoder:
             Circuit with decryption applied
         """
         # Apply K†_{θ,φ} (Hermitian conjugate)
-        K = self.create_rbe_unitary(theta, phi)
-        K_dagger = K.conj().T
-        
-        qc.unitary(K_dagger, [0], label=f'RBE†')
+        K_dagger = self.rbe_template(dagger=True).assign_parameters({self.THETA: theta, self.PHI: phi})
+        qc.compose(K_dagger, inplace=True)
         return qc
 
 
-class QuantumVESParticipantA:
+class TransitQubit(NamedTuple):
     """
-    Participant A: Encrypts and stores quantum-encoded qubits
+    Lightweight, immutable description of an encrypted qubit in transit
+    
+    A's ciphertext is an immutable prefix (the (α, λ) angles preparing its
+    state) shared by every copy; each later stage appends gate names and
+    gets a new tuple, leaving earlier ones untouched. The full circuit is
+    built once, by B, at execution time.
     """
+    pixel_idx: int
+    prefix: Tuple[float, float]
+    gates: Tuple[str, ...] = ()
     
-    def __init__(self):
-        self.rbe = RBEEncoder()
-        self.encrypted_pixels = {}
-        self.keys = {}
+    def append(self, gate: str) -> 'TransitQubit':
+        """Return a new qubit description with one more single-qubit gate"""
+        return self._replace(gates=self.gates + (gate,))
+
+
+def _read_only(array: np.ndarray, copy: bool = True) -> np.ndarray:
+    """Read-only version of an array, copying writeable arrays unless copy=False"""
+    if array.flags.writeable:
+        if copy:
+            array = array.copy()
+        array.flags.writeable = False
+    return array
+
+
+class RBEKeyStore:
+    """
+    Compact array-backed store of per-pixel RBE keys
+    
+    θ values live in one contiguous float array and φ, which only takes
+    ±π/2, in a packed 1-bit sign array (1 = +π/2). A key costs 8 (or 4)
+    bytes plus one bit instead of a boxed (θ, φ) tuple in a dict.
+    
+    The arrays are read-only, so a store can be handed from A to B without
+    copying, and contiguous slices are views onto the same buffers.
+    """
     
-    def encrypt_image(self, image: np.ndarray) -> Dict[int, Tuple[QuantumCircuit, Tuple[float, float]]]:
+    def __init__(self, thetas: np.ndarray, phi_bits: np.ndarray, length: int = None, start: int = 0):
         """
-        Encrypt entire image using RBE
+        Wrap key arrays
+        
+        Read-only arrays are shared without copying; writeable ones are
+        copied, so the store never freezes arrays its caller still owns.
         
         Args:
-            image: Binary image array
-            
-        Returns:
-            Dictionary mapping pixel index to (encrypted_circuit, key)
+            thetas: θ values of the pixels in this store, shape (length,)
+            phi_bits: np.packbits-packed φ signs (may cover a larger range)
+            length: Number of keys (default: len(thetas))
+            start: Bit offset of this store's first key within phi_bits
         """
-        flat_image = image.flatten()
+        self._thetas = _read_only(thetas)
+        self._phi_bits = _read_only(phi_bits)
+        self._length = len(thetas) if length is None else length
+        self._start = start
+    
+    @classmethod
+    def from_arrays(cls, thetas: np.ndarray, phis: np.ndarray, dtype=np.float64) -> 'RBEKeyStore':
+        """
+        Build a store from θ and φ arrays
         
-        for i, pixel_val in enumerate(flat_image):
-            # Generate random key for this pixel
-            theta, phi = self.rbe.generate_key()
-            
-            # Encrypt pixel
-            qc = self.rbe.rbe_encrypt_pixel(pixel_val, theta, phi)
+        Args:
+            thetas: θ values, shape (N,)
+            phis: φ values in {-π/2, +π/2}, shape (N,)
+            dtype: Float type for θ (np.float64 or np.float32)
             
-            self.encrypted_pixels[i] = qc
-            self.keys[i] = (theta, phi)
-        
-        return self.encrypted_pixels
-    
-    def get_encrypted_pixel(self, pixel_idx: int) -> QuantumCircuit:
-        """Get encrypted qubit for pixel i"""
-        return self.encrypted_pixels[pixel_idx].copy()
+        Returns:
+            New key store
+        """
+        thetas = _read_only(np.array(thetas, dtype=dtype), copy=False)
+        return cls(thetas, _read_only(np.packbits(np.asarray(phis) > 0), copy=False), len(thetas))
     
-    def get_key(self, pixel_idx: int) -> Tuple[float, float]:
-        """Get encryption key for pixel i"""
-        return self.keys[pixel_idx]
-
-
-class QuantumVESParticipantB:
-    """
-    Participant B: Holds RBE keys and performs decryption
-    """
+    @classmethod
+    def from_dict(cls, keys: Dict[int, Tuple[float, float]], dtype=np.float64) -> 'RBEKeyStore':
+        """Build a store from a dict mapping pixel index 0..N-1 to (θ, φ)"""
+        thetas = np.fromiter((keys[i][0] for i in range(len(keys))), dtype=dtype, count=len(keys))
+        phis = np.fromiter((keys[i][1] for i in range(len(keys))), dtype=float, count=len(keys))
+        return cls.from_arrays(thetas, phis, dtype)
     
-    def __init__(self):
-        self.rbe = RBEEncoder()
-        self.keys = {}
-        self.simulator = AerSimulator()
+    def __len__(self) -> int:
+        return self._length
     
-    def receive_keys(self, keys: Dict[int, Tuple[float, float]]):
-        """Receive RBE keys from Participant A"""
-        self.keys = keys
+    def __contains__(self, pixel_idx) -> bool:
+        return isinstance(pixel_idx, (int, np.integer)) and 0 <= pixel_idx < self._length
     
-    def decrypt_and_measure(self, qc: QuantumCircuit, pixel_idx: int) -> int:
+    def __getitem__(self, index):
         """
-        Decrypt transformed qubit and measure
+        Look up keys
         
         Args:
-            qc: Quantum circuit (possibly transformed by C)
-            pixel_idx: Pixel index to get correct key
+            index: Pixel index, slice or integer index array
             
         Returns:
-            Measured bit (0 or 1)
+            (θ, φ) tuple for an integer index, otherwise a new RBEKeyStore
+            (a zero-copy view for contiguous slices)
         """
-        if pixel_idx not in self.keys:
-            raise ValueError(f"No key for pixel {pixel_idx}")
-        
-        theta, phi = self.keys[pixel_idx]
-        
-        # Apply RBE decryption
-        qc_decrypt = qc.copy()
-        qc_decrypt = self.rbe.rbe_decrypt_circuit(qc_decrypt, theta, phi)
-        
-        # Measure
-        cr = ClassicalRegister(1, name='result')
-        qc_decrypt.add_register(cr)
-        qc_decrypt.measure(0, 0)
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self._length
+            if not 0 <= index < self._length:
+                raise IndexError(f"No key for pixel {index}")
+            bit = self._get_phi_bits(np.array([index]))[0]
+            return float(self._thetas[index]), (np.pi/2 if bit else -np.pi/2)
         
-        # Execute
-        job = self.simulator.run(qc_decrypt, shots=1)
-        result = job.result()
-        counts = result.get_counts()
-        
-        # Get result
-        measured_bit = int(list(counts.keys())[0])
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step == 1:
+                stop = max(start, stop)
+                return RBEKeyStore(self._thetas[start:stop], self._phi_bits,
+                                   stop - start, self._start + start)
+            index = np.arange(start, stop, step)
         
-        return measured_bit
-    
-    def determine_match(self, decrypted_bit: int) -> bool:
+        index = np.asarray(index)
+        return RBEKeyStore.from_arrays(self._thetas[index], self.phis_at(index), self._thetas.dtype)
+    
+    def _get_phi_bits(self, pixel_indices: np.ndarray) -> np.ndarray:
+        """Read the φ sign bits of the given pixels (negative indices count from the end)"""
+        pixel_indices = np.asarray(pixel_indices, dtype=np.int64)
+        pixel_indices = np.where(pixel_indices < 0, pixel_indices + self._length, pixel_indices)
+        if pixel_indices.size and (pixel_indices.min() < 0 or pixel_indices.max() >= self._length):
+            raise IndexError(f"Pixel index out of range for {self._length} keys")
+        bit_idx = pixel_indices + self._start
+        return (self._phi_bits[bit_idx >> 3] >> (7 - (bit_idx & 7))) & 1
+    
+    def __reduce__(self):
+        # Pickle only this store's keys, not the whole φ array a slice shares
+        first_byte = self._start >> 3
+        last_byte = (self._start + self._length + 7) >> 3
+        return RBEKeyStore, (self._thetas, self._phi_bits[first_byte:last_byte], self._length, self._start & 7)
+    
+    @property
+    def thetas(self) -> np.ndarray:
+        """θ of every key (read-only view)"""
+        return self._thetas
+    
+    @property
+    def phis(self) -> np.ndarray:
+        """φ of every key, unpacked to floats"""
+        first_byte = self._start >> 3
+        last_byte = (self._start + self._length + 7) >> 3
+        bits = np.unpackbits(self._phi_bits[first_byte:last_byte])
+        offset = self._start & 7
+        return np.where(bits[offset:offset + self._length], np.pi/2, -np.pi/2)
+    
+    def phis_at(self, pixel_indices: np.ndarray) -> np.ndarray:
+        """φ of the given pixels, unpacked to floats"""
+        return np.where(self._get_phi_bits(np.asarray(pixel_indices)), np.pi/2, -np.pi/2)
+    
+    def key_arrays(self, pixel_indices: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Determine if pixel matches based on decrypted result
+        Get (θ, φ) arrays for a set of pixels
         
-        Match if decrypted_bit == 0 (as per Lemma in paper)
+        Args:
+            pixel_indices: Pixel indices (default: all pixels)
+            
+        Returns:
+            Tuple of (thetas, phis)
         """
-        return decrypted_bit == 0
+        if pixel_indices is None:
+            return self.thetas, self.phis
+        return self._thetas[pixel_indices], self.phis_at(pixel_indices)
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory used by this store's keys"""
+        return self._thetas.nbytes + (self._length + 7) // 8
 
 
-class QuantumVESParticipantC:
-    """
-    Participant C: Observes candidate image and applies CNOT
+class DerivedKeyStore:
     """
+    Per-pixel RBE keys derived on demand from a short shared secret seed
     
-    def __init__(self):
-        self.candidate_image = None
+    Key i comes from a counter-mode PRF: block b = i // BLOCK_KEYS is
+    SHAKE-256(domain ‖ seed ‖ b), whose output holds BLOCK_KEYS 64-bit
+    θ words followed by BLOCK_KEYS packed φ sign bits. Storage and key
+    transfer are O(1) (the seed), any key is randomly accessible, and index
+    ranges are derived block by block in vectorized form.
     
-    def observe_candidate(self, candidate_image: np.ndarray):
-        """Observe/acquire candidate image"""
-        self.candidate_image = candidate_image.flatten()
+    Offers the same lookup interface as RBEKeyStore.
+    """
+    
+    BLOCK_KEYS = 1024
+    DOMAIN = b'RBE-VES key derivation v1'
     
-    def apply_cnot_if_needed(self, qc: QuantumCircuit, pixel_idx: int) -> QuantumCircuit:
+    def __init__(self, key_seed: bytes, length: int, start: int = 0):
         """
-        Apply CNOT to encrypted qubit if C[i] = 1
+        Initialize a derived key range
         
-        According to paper:
-        - If C[i] = 0: no operation
-        - If C[i] = 1: apply CNOT (which acts as X gate on single qubit)
+        Args:
+            key_seed: Shared secret seed (e.g. 32 bytes from secrets.token_bytes)
+            length: Number of keys
+            start: Counter of this store's first key
+        """
+        self.key_seed = bytes(key_seed)
+        self._length = length
+        self._start = start
+        self._cached_block = (None, None)
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __contains__(self, pixel_idx) -> bool:
+        return isinstance(pixel_idx, (int, np.integer)) and 0 <= pixel_idx < self._length
+    
+    def _block(self, block_idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Derive (θ words, packed φ bits) of one counter block"""
+        if self._cached_block[0] == block_idx:
+            return self._cached_block[1]
+        
+        n = self.BLOCK_KEYS
+        prf = hashlib.shake_256(self.DOMAIN + self.key_seed + int(block_idx).to_bytes(8, 'little'))
+        data = prf.digest(8 * n + n // 8)
+        # θ words are little-endian, so keys are identical on every platform
+        block = (np.frombuffer(data, dtype='<u8', count=n),
+                 np.frombuffer(data, dtype=np.uint8, offset=8 * n))
+        self._cached_block = (block_idx, block)
+        return block
+    
+    def _derive(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Derive θ and φ sign bits of absolute counters start..stop-1"""
+        n = self.BLOCK_KEYS
+        first, last = start // n, (stop - 1) // n
+        words, bits = zip(*[self._block(b) for b in range(first, last + 1)])
+        offset = start - first * n
+        thetas = RBEEncoder.thetas_from_words(np.concatenate(words)[offset:offset + stop - start])
+        phi_bits = np.unpackbits(np.concatenate(bits))[offset:offset + stop - start]
+        return thetas, phi_bits
+    
+    def __getitem__(self, index):
+        """
+        Look up keys
         
         Args:
-            qc: Encrypted quantum circuit from A
-            pixel_idx: Pixel index
+            index: Pixel index, slice or integer index array
             
         Returns:
-            Transformed quantum circuit
+            (θ, φ) tuple for an integer index, a DerivedKeyStore for a
+            contiguous slice, otherwise a materialized RBEKeyStore
         """
-        if self.candidate_image is None:
-            raise ValueError("No candidate image observed")
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self._length
+            if not 0 <= index < self._length:
+                raise IndexError(f"No key for pixel {index}")
+            thetas, phi_bits = self._derive(self._start + index, self._start + index + 1)
+            return float(thetas[0]), (np.pi/2 if phi_bits[0] else -np.pi/2)
         
-        qc_transformed = qc.copy()
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step == 1:
+                return DerivedKeyStore(self.key_seed, max(0, stop - start), self._start + start)
+            index = np.arange(start, stop, step)
+        
+        thetas, phis = self.key_arrays(np.asarray(index))
+        return RBEKeyStore.from_arrays(thetas, phis)
+    
+    @property
+    def thetas(self) -> np.ndarray:
+        """θ of every key"""
+        return self.key_arrays()[0]
+    
+    @property
+    def phis(self) -> np.ndarray:
+        """φ of every key"""
+        return self.key_arrays()[1]
+    
+    def phis_at(self, pixel_indices: np.ndarray) -> np.ndarray:
+        """φ of the given pixels"""
+        return self.key_arrays(pixel_indices)[1]
+    
+    def key_arrays(self, pixel_indices: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Derive (θ, φ) arrays for a set of pixels
         
-        candidate_pixel = self.candidate_image[pixel_idx]
+        Only the counter blocks holding the requested pixels are derived.
         
-        if candidate_pixel == 1:
-            # Apply X gate (equivalent to CNOT for single qubit)
-            qc_transformed.x(0)
+        Args:
+            pixel_indices: Pixel indices (default: all pixels); negative
+                           indices count from the end
+            
+        Returns:
+            Tuple of (thetas, phis)
+        """
+        if pixel_indices is None:
+            if self._length == 0:
+                return np.zeros(0), np.zeros(0)
+            thetas, phi_bits = self._derive(self._start, self._start + self._length)
+            return thetas, np.where(phi_bits, np.pi/2, -np.pi/2)
         
-        return qc_transformed
+        pixel_indices = np.asarray(pixel_indices, dtype=np.int64)
+        if len(pixel_indices) == 0:
+            return np.zeros(0), np.zeros(0)
+        pixel_indices = np.where(pixel_indices < 0, pixel_indices + self._length, pixel_indices)
+        if pixel_indices.min() < 0 or pixel_indices.max() >= self._length:
+            raise IndexError(f"Pixel index out of range for {self._length} keys")
+        
+        # Derive each touched block once, then gather
+        counters = pixel_indices + self._start
+        blocks, rows = np.unique(counters // self.BLOCK_KEYS, return_inverse=True)
+        words, bits = zip(*[self._block(b) for b in blocks])
+        cols = counters % self.BLOCK_KEYS
+        thetas = RBEEncoder.thetas_from_words(np.stack(words)[rows, cols])
+        phi_bits = np.unpackbits(np.stack(bits), axis=1)[rows, cols]
+        return thetas, np.where(phi_bits, np.pi/2, -np.pi/2)
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory (and transfer size) of this store: just the seed"""
+        return len(self.key_seed)
 
 
-class QuantumVESSystem:
+class AnalyticRBEEngine:
     """
-    Complete Quantum VES System with RBE
+    Vectorized NumPy evaluation of the RBE matching protocol
     
-    Implements the protocol from the paper:
-    1. A encrypts image pixels using RBE
-    2. A sends encrypted qubits to C, keys to B
-    3. C applies CNOT based on candidate image
-    4. B decrypts and determines match
+    Holds every ciphertext as a row of an (N, 2) complex array and computes
+    K†_{θ,φ} · X^C · K_{θ,φ} |T⟩ for the whole image in one pass, then samples
+    Born-rule outcomes in bulk. Equivalent to running one single-shot Aer job
+    per pixel, without the per-circuit overhead.
     """
     
-    def __init__(self):
-        self.participant_A = QuantumVESParticipantA()
-        self.participant_B = QuantumVESParticipantB()
-        self.participant_C = QuantumVESParticipantC()
-        
-    def setup_secret_image(self, secret_image: np.ndarray):
+    def __init__(self, rng: np.random.Generator = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+    
+    @staticmethod
+    def rbe_unitaries(thetas: np.ndarray, phis: np.ndarray) -> np.ndarray:
         """
-        Setup phase: Encrypt secret image
+        Build K_{θ,φ} for every pixel
         
         Args:
-            secret_image: Binary image to protect
+            thetas: Array of RBE angles θ, shape (N,)
+            phis: Array of RBE angles φ, shape (N,)
+            
+        Returns:
+            Array of 2x2 unitaries, shape (N, 2, 2)
         """
-        print("Phase 1: Encryption by Participant A")
-        print("-" * 50)
+        c = np.cos(thetas / 2)
+        s = np.sin(thetas / 2)
+        e = np.exp(1j * phis)
+        K = np.empty((len(thetas), 2, 2), dtype=complex)
+        K[:, 0, 0] = c
+        K[:, 0, 1] = s
+        K[:, 1, 0] = e * s
+        K[:, 1, 1] = -e * c
+        return K
+    
+    @staticmethod
+    def encrypt_states(pixel_values: np.ndarray, thetas: np.ndarray,
+                       phis: np.ndarray) -> np.ndarray:
+        """
+        Encrypt all pixels: |ψ_i⟩ = K_{θ_i,φ_i} |T[i]⟩
         
-        # A encrypts the image
-        encrypted_pixels = self.participant_A.encrypt_image(secret_image)
-        print(f"Encrypted {len(encrypted_pixels)} pixels using RBE")
+        Args:
+            pixel_values: Flat binary image, shape (N,)
+            thetas: RBE angles θ, shape (N,)
+            phis: RBE angles φ, shape (N,)
+            
+        Returns:
+            Encrypted states, shape (N, 2)
+        """
+        # K|0⟩ = (cos θ/2, e^{iφ} sin θ/2),  K|1⟩ = (sin θ/2, -e^{iφ} cos θ/2)
+        c = np.cos(thetas / 2)
+        s = np.sin(thetas / 2)
+        e = np.exp(1j * np.asarray(phis))
+        bits = np.asarray(pixel_values).astype(bool)
+        states = np.empty((len(bits), 2), dtype=complex)
+        states[:, 0] = np.where(bits, s, c)
+        states[:, 1] = e * np.where(bits, -c, s)
+        return states
+    
+    @staticmethod
+    def preparation_angles(states: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert states into (α, λ) with |ψ⟩ ∝ P(λ)·R_y(α)|0⟩ (up to global phase)
         
-        # A sends keys to B
-        keys = {i: self.participant_A.get_key(i) for i in range(len(secret_image.flatten()))}
-        self.participant_B.receive_keys(keys)
-        print(f"Transferred {len(keys)} RBE keys to Participant B")
-        print()
+        Args:
+            states: Encrypted states, shape (N, 2)
+            
+        Returns:
+            Tuple of (alpha, lambda) arrays, shape (N,) each
+        """
+        alpha = 2 * np.arctan2(np.abs(states[:, 1]), np.abs(states[:, 0]))
+        lam = np.angle(states[:, 1]) - np.angle(states[:, 0])
+        return alpha, lam
     
-    def perform_matching(self, candidate_image: np.ndarray, verbose: bool = False) -> Tuple[List[bool], float]:
+    @staticmethod
+    def apply_cnot(states: np.ndarray, candidate_values: np.ndarray) -> np.ndarray:
         """
-        Matching phase: Compare candidate to secret
+        Apply X (single-qubit CNOT) to every state whose candidate pixel is 1
         
-        Protocol:
-        1. C observes candidate image
-        2. For each pixel:
-           - A sends QT[i] to C
-           - C applies CNOT if C[i] = 1
-           - C sends QT'[i] to B
-           - B decrypts and checks if result = 0 (match)
+        Args:
+            states: Encrypted states, shape (N, 2)
+            candidate_values: Flat binary candidate image, shape (N,)
+            
+        Returns:
+            Transformed states, shape (N, 2)
+        """
+        flip = np.asarray(candidate_values).astype(bool)
+        transformed = states.copy()
+        transformed[flip] = states[flip, ::-1]
+        return transformed
+    
+    @staticmethod
+    def decrypt_probabilities(states: np.ndarray, thetas: np.ndarray,
+                              phis: np.ndarray) -> np.ndarray:
+        """
+        Apply K† to every state and return the probability of measuring 1
         
         Args:
-            candidate_image: Image to match against secret
-            verbose: If True, show detailed pixel-by-pixel processing
+            states: (Possibly transformed) encrypted states, shape (N, 2)
+            thetas: RBE angles θ, shape (N,)
+            phis: RBE angles φ, shape (N,)
             
         Returns:
-            Tuple of (match_results, match_percentage)
+            P(1) per pixel, shape (N,)
         """
-        print("Phase 2: Secure Image Matching")
-        print("-" * 50)
+        K = AnalyticRBEEngine.rbe_unitaries(thetas, phis)
+        # Second component of K†|ψ⟩ = conj(K[0,1])·ψ0 + conj(K[1,1])·ψ1
+        amp1 = np.conj(K[:, 0, 1]) * states[:, 0] + np.conj(K[:, 1, 1]) * states[:, 1]
+        return np.clip(np.abs(amp1) ** 2, 0.0, 1.0)
+    
+    @staticmethod
+    def density_matrices(states: np.ndarray) -> np.ndarray:
+        """Pure-state density matrices |ψ⟩⟨ψ|, shape (N, 2, 2)"""
+        return states[:, :, None] * states[:, None, :].conj()
+    
+    @staticmethod
+    def apply_cnot_density(rhos: np.ndarray, candidate_values: np.ndarray) -> np.ndarray:
+        """Apply X ρ X to every density matrix whose candidate pixel is 1"""
+        flip = np.asarray(candidate_values).astype(bool)
+        transformed = rhos.copy()
+        transformed[flip] = rhos[flip][:, ::-1, ::-1]
+        return transformed
+    
+    @staticmethod
+    def decrypt_probabilities_density(rhos: np.ndarray, thetas: np.ndarray,
+                                      phis: np.ndarray) -> np.ndarray:
+        """
+        Apply K† ρ K to every density matrix and return P(1)
         
-        # C observes candidate
-        self.participant_C.observe_candidate(candidate_image)
+        Args:
+            rhos: (Possibly noisy) density matrices, shape (N, 2, 2)
+            thetas: RBE angles θ, shape (N,)
+            phis: RBE angles φ, shape (N,)
+            
+        Returns:
+            P(1) per pixel, shape (N,)
+        """
+        # ⟨1|K† ρ K|1⟩ with K|1⟩ = second column of K
+        k1 = AnalyticRBEEngine.rbe_unitaries(thetas, phis)[:, :, 1]
+        p_one = np.einsum('na,nab,nb->n', k1.conj(), rhos, k1).real
+        return np.clip(p_one, 0.0, 1.0)
+    
+    @staticmethod
+    def calibrate_readout(noise_model: NoiseModel, n_samples: int = 4096, seed: int = 0) -> np.ndarray:
+        """
+        Calibration matrix M[read, ideal] of B's outcome under a noise model
         
-        if verbose:
-            print("Participant C observes candidate image\n")
+        Runs n_samples random (key, pixel, candidate) triples through the
+        noisy density-matrix path, half with noiseless outcome 0 and half
+        with 1, and averages the exact outcome probabilities (no shots), so
+        the matrix reflects the key-averaged bias of the whole A → C → B trip.
         
-        match_results = []
-        n_pixels = len(candidate_image.flatten())
+        Args:
+            noise_model: Noise model to calibrate
+            n_samples: Number of calibration qubits
+            seed: Seed of the calibration keys (fixed, so results are cacheable)
+            
+        Returns:
+            2×2 matrix with columns summing to 1
+        """
+        rng = np.random.default_rng(seed)
+        thetas = rng.uniform(0, 2 * np.pi, n_samples)
+        phis = np.where(rng.integers(0, 2, n_samples) == 1, np.pi / 2, -np.pi / 2)
+        pixels = rng.integers(0, 2, n_samples)
+        ideal = np.arange(n_samples) % 2
+        candidate = pixels ^ ideal
         
-        secret_flat = self.participant_A.encrypted_pixels
-        candidate_flat = candidate_image.flatten()
+        rhos = AnalyticRBEEngine.density_matrices(AnalyticRBEEngine.encrypt_states(pixels, thetas, phis))
+        rhos = noise_model.apply('a_to_c', rhos)
+        rhos = noise_model.apply('storage', rhos)
+        rhos = AnalyticRBEEngine.apply_cnot_density(rhos, candidate)
+        rhos = noise_model.apply('c_to_b', rhos)
+        p_one = noise_model.apply_readout(AnalyticRBEEngine.decrypt_probabilities_density(rhos, thetas, phis))
         
-        for i in range(n_pixels):
+        read_one = np.array([p_one[ideal == 0].mean(), p_one[ideal == 1].mean()])
+        return np.vstack([1.0 - read_one, read_one])
+    
+    def measure(self, p_one: np.ndarray) -> np.ndarray:
+        """
+        Sample one Born-rule outcome per pixel
+        
+        Args:
+            p_one: Probability of measuring 1, shape (N,) or (K, N)
+            
+        Returns:
+            Measured bits, same shape as p_one
+        """
+        return (self.rng.random(np.shape(p_one)) < p_one).astype(np.uint8)
+    
+    def decrypt_and_measure(self, states: np.ndarray, thetas: np.ndarray,
+                            phis: np.ndarray) -> np.ndarray:
+        """Decrypt all states with their keys and measure each once"""
+        return self.measure(self.decrypt_probabilities(states, thetas, phis))
+
+
+KEY_SOURCES = ('numpy', 'secure', 'derived')
+
+
+class QuantumVESParticipantA:
+    """
+    Participant A: Encrypts and stores quantum-encoded qubits
+    """
+    
+    def __init__(self, seed=None, key_source: str = 'numpy'):
+        """
+        Initialize participant A
+        
+        Args:
+            seed: Seed for reproducible key generation
+            key_source: 'numpy' (seedable generator), 'secure' (OS CSPRNG) or
+                        'derived' (keys derived on demand from a shared seed)
+        """
+        if key_source not in KEY_SOURCES:
+            raise ValueError(f"Unknown key source '{key_source}' (expected one of {KEY_SOURCES})")
+        self.key_source = key_source
+        self.rbe = RBEEncoder(seed, secure=key_source == 'secure')
+        self.encrypted_states = np.zeros((0, 2), dtype=complex)
+        self.keys = RBEKeyStore.from_arrays(np.zeros(0), np.zeros(0))
+    
+    def encrypt_image(self, image: np.ndarray) -> np.ndarray:
+        """
+        Encrypt entire image using RBE
+        
+        Ciphertexts are kept as one contiguous (N, 2) complex state array;
+        circuits are only built on demand by get_encrypted_pixel.
+        
+        Args:
+            image: Binary image array
+            
+        Returns:
+            Encrypted states, shape (N, 2)
+        """
+        flat_image = image.flatten()
+        
+        # Generate random keys for all pixels
+        if self.key_source == 'derived':
+            self.keys = self.rbe.derive_keys(len(flat_image))
+        else:
+            self.keys = self.rbe.generate_keys(len(flat_image))
+        
+        # Encrypt all pixels
+        thetas, phis = self.keys.key_arrays()
+        self.encrypted_states = AnalyticRBEEngine.encrypt_states(flat_image, thetas, phis)
+        
+        return self.encrypted_states
+    
+    def get_encrypted_states(self) -> np.ndarray:
+        """Get encrypted states of all pixels as an (N, 2) array"""
+        return self.encrypted_states
+    
+    def get_preparation_bindings(self, pixel_indices: np.ndarray = None) -> Dict[Parameter, np.ndarray]:
+        """Get template bindings (α, λ) preparing the encrypted states (default: all)"""
+        states = self.encrypted_states if pixel_indices is None else self.encrypted_states[pixel_indices]
+        alpha, lam = AnalyticRBEEngine.preparation_angles(states)
+        return {RBEEncoder.PREP_ALPHA: alpha, RBEEncoder.PREP_LAMBDA: lam}
+    
+    def get_encrypted_pixel(self, pixel_idx: int) -> QuantumCircuit:
+        """Get encrypted qubit for pixel i, materialized as a new circuit"""
+        alpha, lam = self.get_encrypted_qubit(pixel_idx).prefix
+        return self.rbe.prepare_state_circuit(alpha, lam)
+    
+    def get_encrypted_qubit(self, pixel_idx: int) -> TransitQubit:
+        """Get encrypted qubit for pixel i as a copy-free TransitQubit"""
+        alpha, lam = AnalyticRBEEngine.preparation_angles(self.encrypted_states[pixel_idx:pixel_idx + 1])
+        return TransitQubit(pixel_idx, (float(alpha[0]), float(lam[0])))
+    
+    def get_key(self, pixel_idx: int) -> Tuple[float, float]:
+        """Get encryption key for pixel i"""
+        return self.keys[pixel_idx]
+    
+    def get_keys(self) -> Union[RBEKeyStore, DerivedKeyStore]:
+        """Get the read-only key store of all pixels (shared, not copied)"""
+        return self.keys
+
+
+class QuantumVESParticipantB:
+    """
+    Participant B: Holds RBE keys and performs decryption
+    """
+    
+    def __init__(self, seed=None):
+        """
+        Initialize participant B
+        
+        Args:
+            seed: Seed (int or np.random.SeedSequence) for measurement
+                  sampling in the simulator and analytic engine
+        """
+        self.rbe = RBEEncoder()
+        self.keys = RBEKeyStore.from_arrays(np.zeros(0), np.zeros(0))
+        self.simulator = AerSimulator()
+        self.engine = AnalyticRBEEngine()
+        self.reseed(seed)
+        self.simulator_jobs = 0  # Aer jobs submitted
+        self.simulated_circuits = 0  # circuits (experiments) in those jobs
+    
+    def reseed(self, seed):
+        """
+        Restart measurement sampling from a new seed, keeping the simulator
+        
+        Args:
+            seed: Seed (int or np.random.SeedSequence); None draws fresh entropy
+        """
+        if seed is not None:
+            seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+            self.simulator.set_options(seed_simulator=int(seed.generate_state(1)[0] >> 1))
+        self.engine.rng = np.random.default_rng(seed)
+    
+    def receive_keys(self, keys):
+        """
+        Receive RBE keys from Participant A
+        
+        Args:
+            keys: RBEKeyStore or DerivedKeyStore (kept by reference, no
+                  copy) or a dict mapping pixel index to (theta, phi)
+        """
+        if not isinstance(keys, (RBEKeyStore, DerivedKeyStore)):
+            keys = RBEKeyStore.from_dict(keys)
+        self.keys = keys
+    
+    def decrypt_and_measure(self, qc: Union[QuantumCircuit, TransitQubit], pixel_idx: int) -> int:
+        """
+        Decrypt transformed qubit and measure
+        
+        Args:
+            qc: Quantum circuit or TransitQubit (possibly transformed by C)
+            pixel_idx: Pixel index to get correct key
+            
+        Returns:
+            Measured bit (0 or 1)
+        """
+        qc_decrypt, binds = self._build_measurement_circuit(qc, pixel_idx)
+        
+        # Execute
+        job = self.simulator.run(qc_decrypt, shots=1, parameter_binds=[binds])
+        self.simulator_jobs += 1
+        self.simulated_circuits += 1
+        result = job.result()
+        counts = result.get_counts()
+        
+        # Get result
+        measured_bit = int(list(counts.keys())[0])
+        
+        return measured_bit
+    
+    def decrypt_and_measure_batch(self, circuits: List[Union[QuantumCircuit, TransitQubit]],
+                                  pixel_indices: List[int]) -> List[int]:
+        """
+        Decrypt and measure many transformed qubits in a single Aer job
+        
+        All circuits of a matching round are submitted to AerSimulator.run as
+        one list and executed as parallel experiments, so job-dispatch
+        overhead is paid once per round instead of once per pixel.
+        
+        Args:
+            circuits: Quantum circuits or TransitQubits (possibly transformed by C)
+            pixel_indices: Pixel index of each circuit (may repeat for votes)
+            
+        Returns:
+            Measured bit of each circuit, in input order
+        """
+        if len(circuits) != len(pixel_indices):
+            raise ValueError("Need exactly one pixel index per circuit")
+        if not circuits:
+            return []
+        
+        qc_batch, binds = zip(*[self._build_measurement_circuit(qc, pixel_idx)
+                                for qc, pixel_idx in zip(circuits, pixel_indices)])
+        
+        # Execute all experiments in one job (0 = use all available cores)
+        job = self.simulator.run(list(qc_batch), shots=1, parameter_binds=list(binds),
+                                 max_parallel_experiments=0)
+        self.simulator_jobs += 1
+        self.simulated_circuits += len(qc_batch)
+        result = job.result()
+        
+        # Map counts of experiment k back to its pixel
+        return [int(next(iter(result.get_counts(k)))) for k in range(len(qc_batch))]
+    
+    def decrypt_and_measure_parametric(self, bindings: Dict[Parameter, np.ndarray],
+                                       pixel_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Decrypt and measure many qubits with the compiled match template
+        
+        The template is transpiled once; B adds its key columns to the
+        binding table received with the qubits and runs all pixels in one job.
+        
+        Args:
+            bindings: Per-pixel values of the preparation (α, λ) and CNOT (γ)
+                      template parameters
+            pixel_indices: Pixel index of each binding row (default: 0..n-1)
+            
+        Returns:
+            Measured bits, shape (n,)
+        """
+        n = len(next(iter(bindings.values())))
+        if n == 0:
+            return np.zeros(0, dtype=np.uint8)
+        
+        table = {param: np.asarray(values, dtype=float).tolist() for param, values in bindings.items()}
+        thetas, phis = self._key_arrays(n, pixel_indices)
+        table[RBEEncoder.THETA] = thetas.tolist()
+        table[RBEEncoder.PHI] = phis.tolist()
+        
+        compiled = RBEEncoder.compiled_match_template(self.simulator)
+        job = self.simulator.run(compiled, shots=1, parameter_binds=[table])
+        self.simulator_jobs += 1
+        self.simulated_circuits += n
+        result = job.result()
+        
+        return np.array([int(next(iter(result.get_counts(k)))) for k in range(n)], dtype=np.uint8)
+    
+    def _build_measurement_circuit(self, qc: Union[QuantumCircuit, TransitQubit],
+                                   pixel_idx: int) -> Tuple[QuantumCircuit, Dict[Parameter, List[float]]]:
+        """
+        Get the circuit that decrypts and measures one qubit, with its bindings
+        
+        A TransitQubit maps to a transpiled skeleton from the shared cache
+        (keyed by its transit gates) plus one row of parameter bindings, so
+        no circuit is built or transpiled per pixel. A QuantumCircuit is
+        copied before decryption is appended and needs no bindings.
+        """
+        if pixel_idx not in self.keys:
+            raise ValueError(f"No key for pixel {pixel_idx}")
+        
+        theta, phi = self.keys[pixel_idx]
+        
+        if isinstance(qc, TransitQubit):
+            skeleton = get_transpile_cache().get_or_transpile(
+                ('rbe_measure', qc.gates), lambda: RBEEncoder.measurement_skeleton(qc.gates), self.simulator)
+            alpha, lam = qc.prefix
+            binds = {RBEEncoder.PREP_ALPHA: [alpha], RBEEncoder.PREP_LAMBDA: [lam],
+                     RBEEncoder.THETA: [theta], RBEEncoder.PHI: [phi]}
+            return skeleton, binds
+        
+        # Apply RBE decryption
+        qc_decrypt = qc.copy()
+        qc_decrypt = self.rbe.rbe_decrypt_circuit(qc_decrypt, theta, phi)
+        
+        # Measure
+        cr = ClassicalRegister(1, name='result')
+        qc_decrypt.add_register(cr)
+        qc_decrypt.measure(0, 0)
+        
+        return qc_decrypt, {}
+    
+    def decrypt_and_measure_states(self, states: np.ndarray,
+                                   pixel_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Decrypt and measure many transformed states at once (analytic engine)
+        
+        Args:
+            states: Transformed states, shape (n, 2)
+            pixel_indices: Pixel index of each row (default: 0..n-1)
+            
+        Returns:
+            Measured bits, shape (n,)
+        """
+        thetas, phis = self._key_arrays(len(states), pixel_indices)
+        return self.engine.decrypt_and_measure(states, thetas, phis)
+    
+    def decrypt_probabilities_states(self, states: np.ndarray,
+                                     pixel_indices: np.ndarray = None) -> np.ndarray:
+        """Probability of measuring 1 after decrypting each state (analytic engine)"""
+        thetas, phis = self._key_arrays(len(states), pixel_indices)
+        return self.engine.decrypt_probabilities(states, thetas, phis)
+    
+    def decrypt_probabilities_density(self, rhos: np.ndarray,
+                                      pixel_indices: np.ndarray = None) -> np.ndarray:
+        """Probability of measuring 1 after decrypting each density matrix (noisy channels)"""
+        thetas, phis = self._key_arrays(len(rhos), pixel_indices)
+        return self.engine.decrypt_probabilities_density(rhos, thetas, phis)
+    
+    def _key_arrays(self, n: int, pixel_indices: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Get (θ, φ) arrays for n qubits, checking that B holds their keys"""
+        if pixel_indices is None:
+            if n > len(self.keys):
+                raise ValueError(f"No key for pixel {len(self.keys)}")
+            return self.keys[:n].key_arrays()
+        
+        pixel_indices = np.asarray(pixel_indices)
+        if len(pixel_indices) and pixel_indices.max() >= len(self.keys):
+            raise ValueError(f"No key for pixel {pixel_indices.max()}")
+        return self.keys.key_arrays(pixel_indices)
+    
+    def determine_match(self, decrypted_bit: int) -> bool:
+        """
+        Determine if pixel matches based on decrypted result
+        
+        Match if decrypted_bit == 0 (as per Lemma in paper)
+        """
+        return decrypted_bit == 0
+
+
+class QuantumVESParticipantC:
+    """
+    Participant C: Observes candidate image and applies CNOT
+    """
+    
+    def __init__(self):
+        self.candidate_image = None
+    
+    def observe_candidate(self, candidate_image: Union[np.ndarray, PackedBinaryImage]):
+        """Observe/acquire candidate image, kept bit-packed (1 bit per pixel)"""
+        if not isinstance(candidate_image, PackedBinaryImage):
+            candidate_image = PackedBinaryImage.from_array(np.ravel(candidate_image))
+        self.candidate_image = candidate_image
+    
+    def _candidate_bits(self, pixel_indices: np.ndarray = None) -> np.ndarray:
+        """Candidate pixels (flat indices, default: all) read from the packed image"""
+        if pixel_indices is None:
+            return self.candidate_image.flatten()
+        return self.candidate_image.get_bits(pixel_indices)
+    
+    def apply_cnot_if_needed(self, qc: Union[QuantumCircuit, TransitQubit],
+                             pixel_idx: int) -> Union[QuantumCircuit, TransitQubit]:
+        """
+        Apply CNOT to encrypted qubit if C[i] = 1
+        
+        According to paper:
+        - If C[i] = 0: no operation
+        - If C[i] = 1: apply CNOT (which acts as X gate on single qubit)
+        
+        Args:
+            qc: Encrypted quantum circuit or TransitQubit from A
+            pixel_idx: Pixel index (must match a TransitQubit's own index)
+            
+        Returns:
+            Transformed quantum circuit, or a TransitQubit sharing A's prefix
+        """
+        if self.candidate_image is None:
+            raise ValueError("No candidate image observed")
+        
+        candidate_pixel = self._candidate_bits(pixel_idx)
+        
+        if isinstance(qc, TransitQubit):
+            if qc.pixel_idx != pixel_idx:
+                raise ValueError(f"Qubit of pixel {qc.pixel_idx} sent as pixel {pixel_idx}")
+            # Immutable: no copy needed, only append when CNOT applies
+            return qc.append('x') if candidate_pixel == 1 else qc
+        
+        qc_transformed = qc.copy()
+        
+        if candidate_pixel == 1:
+            # Apply X gate (equivalent to CNOT for single qubit)
+            qc_transformed.x(0)
+        
+        return qc_transformed
+    
+    def apply_cnot_to_states(self, states: np.ndarray,
+                             pixel_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Apply CNOT to many encrypted states at once (analytic engine)
+        
+        Args:
+            states: Encrypted states from A, shape (n, 2)
+            pixel_indices: Pixel index of each row (default: 0..n-1)
+            
+        Returns:
+            Transformed states, shape (n, 2)
+        """
+        if self.candidate_image is None:
+            raise ValueError("No candidate image observed")
+        
+        if pixel_indices is None:
+            pixel_indices = np.arange(len(states))
+        
+        return AnalyticRBEEngine.apply_cnot(states, self._candidate_bits(pixel_indices))
+    
+    def apply_cnot_to_density(self, rhos: np.ndarray,
+                              pixel_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Apply CNOT to many (possibly noisy) qubits given as density matrices
+        
+        Args:
+            rhos: Density matrices, shape (n, 2, 2)
+            pixel_indices: Pixel index of each matrix (default: 0..n-1)
+            
+        Returns:
+            Transformed density matrices, shape (n, 2, 2)
+        """
+        if self.candidate_image is None:
+            raise ValueError("No candidate image observed")
+        
+        if pixel_indices is None:
+            pixel_indices = np.arange(len(rhos))
+        
+        return AnalyticRBEEngine.apply_cnot_density(rhos, self._candidate_bits(pixel_indices))
+    
+    def apply_cnot_to_bindings(self, bindings: Dict[Parameter, np.ndarray],
+                               pixel_indices: np.ndarray = None) -> Dict[Parameter, np.ndarray]:
+        """
+        Add C's CNOT (γ = C[i]) to a per-pixel template binding table
+        
+        Args:
+            bindings: Binding table received from A, one row per pixel
+            pixel_indices: Pixel index of each row (default: 0..n-1)
+            
+        Returns:
+            New binding table including the CNOT parameter
+        """
+        if self.candidate_image is None:
+            raise ValueError("No candidate image observed")
+        
+        transformed = dict(bindings)
+        transformed[RBEEncoder.CNOT_GAMMA] = self._candidate_bits(pixel_indices).astype(float)
+        return transformed
+
+
+ENGINES = ('aer', 'batched', 'parametric', 'analytic')
+
+
+class NoisyMatchReport(NamedTuple):
+    """Result of matching through noisy channels, compared with the noiseless protocol"""
+    match_results: np.ndarray
+    match_percentage: float
+    ideal_match_percentage: float
+    mitigated_match_percentage: Optional[float]   # None unless readout mitigation was requested
+    error_rates: np.ndarray
+    mean_error_rate: float
+    accuracy: float
+    expected_accuracy: float
+
+
+class TileMatch(NamedTuple):
+    """Matching result of one image tile in streaming mode"""
+    row: int
+    col: int
+    match_results: np.ndarray
+    matched: int
+    n_pixels: int
+
+
+# Worker-process state for sharded matching (see QuantumVESSystem._measure_pixels_sharded)
+SHARDS_PER_WORKER = 4
+_shard_system = None
+
+
+def _init_shard_worker(engine: str):
+    """Build the worker-local system (and B's simulator) once per worker"""
+    global _shard_system
+    _shard_system = QuantumVESSystem(engine)
+
+
+def _match_shard(encrypted_states: np.ndarray, keys, candidate_bits: np.ndarray, seed: int) -> tuple:
+    """
+    Measure one shard, given only that shard's states, keys and candidate bits
+    
+    Returns:
+        Tuple of (bits, simulator jobs, simulated circuits, worker pid,
+        worker peak RSS in MB)
+    """
+    B = _shard_system.participant_B
+    jobs, circuits = B.simulator_jobs, B.simulated_circuits
+    _shard_system.participant_A.encrypted_states = encrypted_states
+    B.receive_keys(keys)
+    B.reseed(int(seed))
+    _shard_system.participant_C.observe_candidate(candidate_bits)
+    bits = _shard_system._measure_pixels(np.arange(len(encrypted_states)))
+    return bits, B.simulator_jobs - jobs, B.simulated_circuits - circuits, os.getpid(), _peak_rss_mb()
+
+
+class QuantumVESSystem:
+    """
+    Complete Quantum VES System with RBE
+    
+    Implements the protocol from the paper:
+    1. A encrypts image pixels using RBE
+    2. A sends encrypted qubits to C, keys to B
+    3. C applies CNOT based on candidate image
+    4. B decrypts and determines match
+    """
+    
+    def __init__(self, engine: str = 'aer', seed=None, key_source: str = 'numpy'):
+        """
+        Initialize the three participants
+        
+        Args:
+            engine: Matching engine - 'aer' (one Aer job per pixel),
+                    'batched' (one Aer job for all pixels),
+                    'parametric' (compiled template, one binding table) or
+                    'analytic' (vectorized NumPy evaluation of all pixels)
+            seed: Root seed; A's keys and B's measurements get independent
+                  streams spawned from it, so fixed seeds give identical runs
+                  (with the 'secure' key source only B's measurements are
+                  seeded; keys always come from the OS CSPRNG)
+            key_source: How A creates keys - 'numpy' (seedable generator),
+                        'secure' (OS CSPRNG, for production) or 'derived'
+                        (B only stores a short seed, see DerivedKeyStore)
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}' (expected one of {ENGINES})")
+        self.engine = engine
+        seed_A, seed_B, seed_order = RBEEncoder.spawn_seeds(seed, 3)
+        if key_source == 'secure':
+            seed_A = None  # CSPRNG keys cannot be reproduced
+        self.participant_A = QuantumVESParticipantA(seed_A, key_source)
+        self.participant_B = QuantumVESParticipantB(seed_B)
+        self.participant_C = QuantumVESParticipantC()
+        self.rng = np.random.default_rng(seed_order)  # pixel order for threshold matching
+        self.worker_peak_rss = {}  # pid -> peak RSS (MB) of the last worker-process round
+        
+    def setup_secret_image(self, secret_image: np.ndarray):
+        """
+        Setup phase: Encrypt secret image
+        
+        Args:
+            secret_image: Binary image to protect
+        """
+        print("Phase 1: Encryption by Participant A")
+        print("-" * 50)
+        
+        # A encrypts the image
+        encrypted_states = self.participant_A.encrypt_image(secret_image)
+        print(f"Encrypted {len(encrypted_states)} pixels using RBE")
+        
+        # A sends keys to B
+        keys = self.participant_A.get_keys()
+        self.participant_B.receive_keys(keys)
+        if isinstance(keys, DerivedKeyStore):
+            print(f"Transferred {keys.nbytes}-byte key seed for {len(keys)} pixels to Participant B")
+        else:
+            print(f"Transferred {len(keys)} RBE keys to Participant B")
+        print()
+    
+    def perform_matching(self, candidate_image: np.ndarray, verbose: bool = False,
+                         n_workers: int = 1, tracer: Tracer = None) -> Tuple[List[bool], float]:
+        """
+        Matching phase: Compare candidate to secret
+        
+        Protocol:
+        1. C observes candidate image
+        2. For each pixel:
+           - A sends QT[i] to C
+           - C applies CNOT if C[i] = 1
+           - C sends QT'[i] to B
+           - B decrypts and checks if result = 0 (match)
+        
+        Args:
+            candidate_image: Image to match against secret
+            verbose: If True, show detailed pixel-by-pixel processing
+            n_workers: Number of worker processes; above 1 the pixels are
+                       split into contiguous shards matched in parallel
+            tracer: Receives per-pixel protocol events (verbose mode adds a
+                    text rendering on stdout)
+            
+        Returns:
+            Tuple of (match_results, match_percentage)
+        """
+        if n_workers < 1:
+            raise ValueError("n_workers must be at least 1")
+        self._check_candidate(candidate_image)
+        tracer = resolve_tracer(tracer, verbose, self.participant_B.keys)
+        
+        print("Phase 2: Secure Image Matching")
+        print("-" * 50)
+        
+        # C observes candidate
+        self.participant_C.observe_candidate(candidate_image)
+        
+        if tracer.enabled:
+            tracer.emit('observe', participant='C')
+        
+        if self.engine == 'aer' and n_workers == 1:
+            match_results = self._perform_aer_matching(candidate_image, tracer)
+        else:
+            if n_workers > 1:
+                decrypted_bits = self._measure_pixels_sharded(n_workers)
+            else:
+                decrypted_bits = self._measure_pixels()
+            match_results = (decrypted_bits == 0).tolist()
+            if tracer.enabled:
+                self._trace_pixel_results(tracer, candidate_image.flatten(), decrypted_bits, match_results)
+        
+        match_percentage = (sum(match_results) / len(match_results)) * 100 if match_results else 0.0
+        
+        print(f"Matching complete: {match_percentage:.1f}% match")
+        if verbose:
+            print(f"  Matched pixels: {sum(match_results)}/{len(match_results)}")
+        print()
+        
+        return match_results, match_percentage
+    
+    def perform_threshold_matching(self, candidate_image: np.ndarray, threshold: float = 0.95,
+                                   alpha: float = 0.01, beta: float = 0.01,
+                                   indifference: float = 0.02, chunk_size: int = 64,
+                                   verbose: bool = False) -> ThresholdDecision:
+        """
+        Threshold-decision mode: is the match rate at least the threshold?
+        
+        Pixels run through A → C → B in a random order, chunk_size at a
+        time, and a sequential probability ratio test stops as soon as the
+        decision is settled (see sequential_test). Clear mismatches are
+        rejected after a few pixels instead of a full pass.
+        
+        Args:
+            candidate_image: Image to match against secret
+            threshold: Required match rate (0..1)
+            alpha: False-match probability below threshold - indifference
+            beta: False-reject probability at the threshold
+            indifference: Width of the region where either answer is fine
+            chunk_size: Pixels evaluated between test updates
+            verbose: If True, show the evidence used for the decision
+            
+        Returns:
+            ThresholdDecision
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        n_pixels = self._check_candidate(candidate_image)
+        
+        print(f"Phase 2: Secure Image Matching (threshold {threshold:.0%})")
+        print("-" * 50)
+        
+        self.participant_C.observe_candidate(candidate_image)
+        test = SequentialThresholdTest(threshold, alpha, beta, indifference)
+        order = self.rng.permutation(n_pixels)
+        
+        for start in range(0, n_pixels, chunk_size):
+            chunk = order[start:start + chunk_size]
+            if test.update(self._measure_pixels(chunk) == 0) is not None:
+                break
+        
+        decision = test.finalize(n_pixels)
+        _print_threshold_decision(decision, verbose)
+        return decision
+    
+    def estimate_match_percentage(self, candidate_image: np.ndarray, epsilon: float = 0.01,
+                                  confidence: float = 0.95, tile_shape: Tuple[int, int] = None,
+                                  verbose: bool = False) -> MatchEstimate:
+        """
+        Approximate mode: estimate the match percentage from a pixel sample
+        
+        Only a random subset of pixels runs through A → C → B. Its size is
+        chosen from the requested precision (about z²/(4ε²) pixels, see
+        sampled_estimate), so the cost no longer grows with the image size.
+        
+        Args:
+            candidate_image: Image to match against secret
+            epsilon: Target half-width of the interval as a fraction (0.01 = ±1%)
+            confidence: Confidence level of the interval
+            tile_shape: If given, stratify the sample by tiles of this shape
+            verbose: If True, show sample size and interval details
+            
+        Returns:
+            MatchEstimate (percentages in 0..100)
+        """
+        n_pixels = self._check_candidate(candidate_image)
+        image_shape = np.shape(candidate_image)
+        if len(image_shape) != 2:
+            image_shape = (1, n_pixels)
+        
+        print("Phase 2: Secure Image Matching (sampled estimate)")
+        print("-" * 50)
+        
+        self.participant_C.observe_candidate(candidate_image)
+        sample_size = required_sample_size(epsilon, confidence, n_pixels)
+        sample = sample_pixels(self.rng, image_shape, sample_size, tile_shape)
+        
+        # Evaluate in pixel order (contiguous key and state access)
+        order = np.argsort(sample.pixel_indices)
+        matches = np.empty(len(order), dtype=bool)
+        matches[order] = self._measure_pixels(sample.pixel_indices[order]) == 0
+        
+        estimate = estimate_match_rate(matches, sample, confidence)
+        print(f"Estimated match: {estimate.percentage:.1f}% "
+              f"[{estimate.ci_low:.1f}%, {estimate.ci_high:.1f}%] at {confidence:.0%} confidence")
+        if verbose:
+            strata = f", {len(sample.stratum_sizes)} tiles" if tile_shape is not None else ""
+            print(f"  Sampled pixels: {estimate.pixels_sampled}/{n_pixels} (ε = {epsilon:.1%}{strata})")
+        print()
+        
+        return estimate
+    
+    def perform_noisy_matching(self, candidate_image: np.ndarray, noise_model: NoiseModel,
+                               verbose: bool = False, chunk_size: int = 1 << 18,
+                               mitigate: bool = True) -> NoisyMatchReport:
+        """
+        Matching with noise on the qubit between A, C and B
+        
+        Every pixel qubit is tracked as a density matrix; the noise model's
+        Kraus channels are applied to all of them at once as (N, 2, 2)
+        batches: A → C transit and storage at C before the CNOT, C → B
+        transit after it. B then samples one outcome per pixel, subject to
+        the model's readout error. The exact per-pixel error rate is
+        P(outcome ≠ noiseless outcome T ⊕ C).
+        
+        With mitigate, the match percentage is also corrected with the noise
+        model's cached calibration matrix (see readout_mitigation); this
+        uses the same single shot per pixel.
+        
+        Args:
+            candidate_image: Image to match against secret
+            noise_model: NoiseModel with the channels of each stage
+            verbose: If True, show error-rate details
+            chunk_size: Pixels per batch (bounds temporary memory)
+            mitigate: If True, report a readout-mitigated match percentage
+            
+        Returns:
+            NoisyMatchReport; accuracy is the fraction of pixels whose match
+            result equals the noiseless one, expected_accuracy its mean;
+            mitigated_match_percentage is None unless mitigate is set
+        """
+        n_pixels = self._check_candidate(candidate_image)
+        
+        print(f"Phase 2: Secure Image Matching (noisy: {noise_model})")
+        print("-" * 50)
+        
+        self.participant_C.observe_candidate(candidate_image)
+        A, B, C = self.participant_A, self.participant_B, self.participant_C
+        states = A.get_encrypted_states()
+        
+        error_rates = np.empty(n_pixels)
+        decrypted_bits = np.empty(n_pixels, dtype=np.uint8)
+        ideal_bits = np.empty(n_pixels, dtype=np.uint8)
+        for start in range(0, n_pixels, chunk_size):
+            pixel_indices = np.arange(start, min(start + chunk_size, n_pixels))
+            chunk = slice(start, start + len(pixel_indices))
+            
+            # Noiseless reference: the outcome is deterministic (T ⊕ C)
+            ideal_p_one = B.decrypt_probabilities_states(
+                C.apply_cnot_to_states(states[chunk], pixel_indices), pixel_indices)
+            ideal_bits[chunk] = ideal_p_one > 0.5
+            
+            rhos = AnalyticRBEEngine.density_matrices(states[chunk])
+            rhos = noise_model.apply('a_to_c', rhos)
+            rhos = noise_model.apply('storage', rhos)
+            rhos = C.apply_cnot_to_density(rhos, pixel_indices)
+            rhos = noise_model.apply('c_to_b', rhos)
+            p_one = noise_model.apply_readout(B.decrypt_probabilities_density(rhos, pixel_indices))
+            
+            error_rates[chunk] = np.where(ideal_bits[chunk] == 1, 1.0 - p_one, p_one)
+            decrypted_bits[chunk] = B.engine.measure(p_one)
+        
+        match_results = decrypted_bits == 0
+        match_percentage = float(np.mean(match_results) * 100) if n_pixels else 0.0
+        ideal_percentage = float(np.mean(ideal_bits == 0) * 100) if n_pixels else 0.0
+        mean_error_rate = float(np.mean(error_rates)) if n_pixels else 0.0
+        accuracy = float(np.mean(decrypted_bits == ideal_bits)) if n_pixels else 1.0
+        mitigated_percentage = None
+        if mitigate:
+            mitigator = get_readout_mitigator()
+            calibration = mitigator.calibration_matrix(noise_model, ('analytic-density',),
+                                                       AnalyticRBEEngine.calibrate_readout)
+            mitigated_percentage = float(mitigator.correct_match_rates(match_percentage / 100, calibration) * 100)
+        report = NoisyMatchReport(match_results, match_percentage, ideal_percentage, mitigated_percentage,
+                                  error_rates, mean_error_rate, accuracy, 1.0 - mean_error_rate)
+        
+        print(f"Matching complete: {match_percentage:.1f}% match "
+              f"(noiseless: {ideal_percentage:.1f}%)")
+        if mitigate:
+            print(f"  Readout-mitigated match: {mitigated_percentage:.1f}%")
+        print(f"  Per-pixel accuracy: {accuracy:.2%} (expected {report.expected_accuracy:.2%})")
+        if verbose and len(error_rates):
+            print(f"  Error rate per pixel: mean {mean_error_rate:.4f}, "
+                  f"min {error_rates.min():.4f}, max {error_rates.max():.4f}")
+        print()
+        
+        return report
+    
+    def match_batch(self, candidates, return_bitmaps: bool = False,
+                    chunk_pixels: int = 1 << 22) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Match a stack of K candidates against the stored encrypted secret
+        
+        With the analytic engine all candidates are evaluated in one
+        vectorized pass: C's CNOT only ever maps a ciphertext to itself or
+        to X·ciphertext, so B's outcome probabilities for both cases are
+        computed once per pixel and each candidate selects between them;
+        one Born-rule sample is then drawn per (candidate, pixel), in chunks
+        of about chunk_pixels. Other engines run one round per candidate
+        (a single Aer job each for 'batched' and 'parametric').
+        
+        Args:
+            candidates: Array of shape (K, N) or (K, H, W), or a sequence of
+                        K images (arrays or PackedBinaryImage)
+            return_bitmaps: If True, also return per-pixel match bitmaps
+            chunk_pixels: Approximate (candidate × pixel) cells per chunk
+            
+        Returns:
+            Tuple of (match_percentages, bitmaps): percentages has shape
+            (K,); bitmaps is a (K, N) boolean array, or None unless
+            return_bitmaps is set
+        """
+        if isinstance(candidates, np.ndarray):
+            stack = candidates.reshape(len(candidates), -1)
+        else:
+            stack = np.stack([np.ravel(np.asarray(candidate)) for candidate in candidates])
+        stack = (stack != 0).astype(np.uint8)
+        n_candidates, n_pixels = stack.shape
+        
+        states = self.participant_A.get_encrypted_states()
+        if n_pixels != len(states):
+            raise ValueError(f"Candidates have {n_pixels} pixels, secret has {len(states)}")
+        
+        print(f"Phase 2: Secure Image Matching ({n_candidates} candidates)")
+        print("-" * 50)
+        
+        match_percentages = np.zeros(n_candidates)
+        bitmaps = np.zeros((n_candidates, n_pixels), dtype=bool) if return_bitmaps else None
+        
+        if self.engine == 'analytic':
+            # P(1) without (C = 0) and with (C = 1) the homomorphic CNOT
+            p_keep = self.participant_B.decrypt_probabilities_states(states)
+            p_flip = self.participant_B.decrypt_probabilities_states(
+                AnalyticRBEEngine.apply_cnot(states, np.ones(n_pixels, dtype=np.uint8)))
+            
+            rows_per_chunk = max(1, chunk_pixels // max(n_pixels, 1))
+            for start in range(0, n_candidates, rows_per_chunk):
+                # C observes each candidate and decides its CNOTs, as in a round
+                chunk = np.empty((min(rows_per_chunk, n_candidates - start), n_pixels), dtype=np.uint8)
+                for row, candidate in enumerate(stack[start:start + len(chunk)]):
+                    self.participant_C.observe_candidate(candidate)
+                    chunk[row] = self.participant_C._candidate_bits()
+                p_one = np.where(chunk == 1, p_flip, p_keep)
+                matches = self.participant_B.engine.measure(p_one) == 0
+                match_percentages[start:start + len(chunk)] = matches.mean(axis=1) * 100
+                if return_bitmaps:
+                    bitmaps[start:start + len(chunk)] = matches
+        else:
+            for k, candidate in enumerate(stack):
+                self.participant_C.observe_candidate(candidate)
+                matches = self._measure_pixels() == 0
+                match_percentages[k] = matches.mean() * 100
+                if return_bitmaps:
+                    bitmaps[k] = matches
+        
+        print(f"Matching complete: {n_candidates} candidates, "
+              f"{np.count_nonzero(match_percentages == 100)} full matches")
+        print()
+        
+        return match_percentages, bitmaps
+    
+    def _check_candidate(self, candidate_image: Union[np.ndarray, PackedBinaryImage]) -> int:
+        """
+        Reject a candidate whose pixel count differs from the secret's
+        
+        Args:
+            candidate_image: Image to match against secret
+            
+        Returns:
+            Number of pixels of the secret
+        """
+        n_pixels = len(self.participant_A.get_encrypted_states())
+        candidate_pixels = int(np.prod(np.shape(candidate_image)))
+        if candidate_pixels != n_pixels:
+            raise ValueError(f"Candidate has {candidate_pixels} pixels, secret has {n_pixels}")
+        return n_pixels
+    
+    def _measure_pixels(self, pixel_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Run A → C → B for a set of pixels with the configured engine
+        
+        C must already have observed the candidate.
+        
+        Args:
+            pixel_indices: Pixels to process (default: all pixels)
+            
+        Returns:
+            B's measured bit per pixel
+        """
+        if pixel_indices is None and self.engine not in ('analytic', 'parametric'):
+            pixel_indices = np.arange(len(self.participant_A.get_encrypted_states()))
+        payload = self._send_pixels(pixel_indices)
+        payload = self._transform_pixels(payload, pixel_indices)
+        return self._decrypt_pixels(payload, pixel_indices)
+    
+    def _send_pixels(self, pixel_indices: np.ndarray = None):
+        """Stage A: encrypted qubits of the given pixels in the engine's transit form"""
+        A = self.participant_A
+        if self.engine == 'analytic':
+            # All encrypted qubits as one state array
+            states = A.get_encrypted_states()
+            return states if pixel_indices is None else states[pixel_indices]
+        if self.engine == 'parametric':
+            # A's preparation columns of the template binding table
+            return A.get_preparation_bindings(pixel_indices)
+        return [A.get_encrypted_qubit(int(i)) for i in pixel_indices]
+    
+    def _transform_pixels(self, payload, pixel_indices: np.ndarray = None):
+        """Stage C: apply the homomorphic CNOT to qubits received from A"""
+        C = self.participant_C
+        if self.engine == 'analytic':
+            return C.apply_cnot_to_states(payload, pixel_indices)
+        if self.engine == 'parametric':
+            return C.apply_cnot_to_bindings(payload, pixel_indices)
+        return [C.apply_cnot_if_needed(qubit, int(i)) for qubit, i in zip(payload, pixel_indices)]
+    
+    def _decrypt_pixels(self, payload, pixel_indices: np.ndarray = None) -> np.ndarray:
+        """Stage B: decrypt and measure qubits received from C"""
+        B = self.participant_B
+        if self.engine == 'analytic':
+            return B.decrypt_and_measure_states(payload, pixel_indices)
+        if self.engine == 'parametric':
+            return B.decrypt_and_measure_parametric(payload, pixel_indices)
+        pixel_indices = [int(i) for i in pixel_indices]
+        if self.engine == 'batched':
+            # B decrypts and measures the whole round in one job
+            decrypted_bits = B.decrypt_and_measure_batch(payload, pixel_indices)
+        else:
+            decrypted_bits = [B.decrypt_and_measure(qc, i) for qc, i in zip(payload, pixel_indices)]
+        return np.array(decrypted_bits, dtype=np.uint8)
+    
+    def perform_pipelined_matching(self, candidate_image: np.ndarray, verbose: bool = False,
+                                   chunk_size: int = 1,
+                                   queue_size: int = 8) -> Tuple[List[bool], float, Dict[str, Dict[str, float]]]:
+        """
+        Matching phase with A, C and B running as concurrent pipeline stages
+        
+        A emits pixel chunk i+1 while C transforms chunk i and B measures
+        chunk i-1. Stages are asyncio coroutines joined by bounded queues, so
+        a slow stage blocks its producer (backpressure) instead of letting
+        qubits pile up; the blocking work of each stage runs in a thread.
+        
+        Args:
+            candidate_image: Image to match against secret
+            verbose: If True, print per-stage statistics
+            chunk_size: Pixels per pipeline item (1 = pixel by pixel)
+            queue_size: Capacity of the A → C and C → B queues
+            
+        Returns:
+            Tuple of (match_results, match_percentage, stage_stats), where
+            stage_stats maps 'A', 'C' and 'B' to pixels, busy_s, throughput
+            (pixels per busy second) and the mean/max depth of the queue the
+            stage reads from (0 for A)
+        """
+        if chunk_size < 1 or queue_size < 1:
+            raise ValueError("chunk_size and queue_size must be at least 1")
+        n_pixels = self._check_candidate(candidate_image)
+        
+        print("Phase 2: Secure Image Matching (pipelined)")
+        print("-" * 50)
+        
+        self.participant_C.observe_candidate(candidate_image)
+        chunks = [np.arange(start, min(start + chunk_size, n_pixels))
+                  for start in range(0, n_pixels, chunk_size)]
+        
+        decrypted_bits, stage_stats = asyncio.run(self._run_pipeline(chunks, queue_size))
+        match_results = (decrypted_bits == 0).tolist()
+        match_percentage = (sum(match_results) / len(match_results)) * 100
+        
+        print(f"Matching complete: {match_percentage:.1f}% match")
+        if verbose:
+            print(f"  Matched pixels: {sum(match_results)}/{len(match_results)}")
+            for name, stats in stage_stats.items():
+                print(f"  Stage {name}: {stats['throughput']:,.0f} pixels/s busy, "
+                      f"queue depth mean {stats['mean_queue_depth']:.1f} / max {stats['max_queue_depth']}")
+        print()
+        
+        return match_results, match_percentage, stage_stats
+    
+    async def _run_pipeline(self, chunks: List[np.ndarray],
+                            queue_size: int) -> Tuple[np.ndarray, Dict[str, Dict[str, float]]]:
+        """Run the A → C → B stages over pixel chunks; returns bits in pixel order"""
+        to_C = asyncio.Queue(maxsize=queue_size)
+        to_B = asyncio.Queue(maxsize=queue_size)
+        stats = {name: {'pixels': 0, 'busy_s': 0.0, 'depth_sum': 0, 'max_queue_depth': 0, 'items': 0}
+                 for name in ('A', 'C', 'B')}
+        results = []
+        
+        async def run_stage(name, work, inbox, outbox):
+            stage = stats[name]
+            while True:
+                if inbox is None:
+                    if stage['items'] == len(chunks):
+                        item = None
+                    else:
+                        item = (chunks[stage['items']], None)
+                else:
+                    depth = inbox.qsize()
+                    item = await inbox.get()
+                    stage['depth_sum'] += depth
+                    stage['max_queue_depth'] = max(stage['max_queue_depth'], depth)
+                if item is None:
+                    if outbox is not None:
+                        await outbox.put(None)
+                    return
+                indices, payload = item
+                start = time.perf_counter()
+                payload = await asyncio.to_thread(work, payload, indices)
+                stage['busy_s'] += time.perf_counter() - start
+                stage['pixels'] += len(indices)
+                stage['items'] += 1
+                if outbox is not None:
+                    await outbox.put((indices, payload))
+                else:
+                    results.append(payload)
+        
+        await asyncio.gather(
+            run_stage('A', lambda _, indices: self._send_pixels(indices), None, to_C),
+            run_stage('C', self._transform_pixels, to_C, to_B),
+            run_stage('B', self._decrypt_pixels, to_B, None),
+        )
+        
+        stage_stats = {}
+        for name, stage in stats.items():
+            stage_stats[name] = {
+                'pixels': stage['pixels'],
+                'busy_s': stage['busy_s'],
+                'throughput': stage['pixels'] / stage['busy_s'] if stage['busy_s'] else 0.0,
+                'mean_queue_depth': stage['depth_sum'] / stage['items'] if stage['items'] else 0.0,
+                'max_queue_depth': stage['max_queue_depth'],
+            }
+        decrypted_bits = np.concatenate(results) if results else np.zeros(0, dtype=np.uint8)
+        return decrypted_bits.astype(np.uint8), stage_stats
+    
+    def stream_tile_matches(self, secret_image: np.ndarray, candidate_image: np.ndarray,
+                            tile_shape: Tuple[int, int] = (256, 256)) -> Iterator[TileMatch]:
+        """
+        Streaming mode: encrypt and match an image tile by tile
+        
+        Only one tile of the secret and the candidate is read at a time, so
+        both can be np.memmap arrays far larger than RAM; keys, ciphertexts
+        and results of a tile are dropped before the next one is read, which
+        bounds peak memory by the tile size. A draws fresh keys for every
+        tile from its generator, so each pixel still has its own key.
+        
+        Tiles run on stream-local participants that share the system's key
+        generator and B's simulator, so the system's own image, keys and
+        candidate (e.g. from setup_secret_image) are left untouched.
+        
+        Args:
+            secret_image: 2D binary secret image (array, np.memmap or PackedBinaryImage)
+            candidate_image: 2D binary candidate image of the same shape
+            tile_shape: (rows, cols) of each tile; edge tiles may be smaller
+            
+        Yields:
+            TileMatch per tile, in row-major tile order; match_results is a
+            boolean array with the tile's shape
+        """
+        if secret_image.shape != candidate_image.shape:
+            raise ValueError(f"Image shapes differ: {secret_image.shape} vs {candidate_image.shape}")
+        if len(secret_image.shape) != 2:
+            raise ValueError("Streaming mode expects 2D images")
+        tile_rows, tile_cols = tile_shape
+        if tile_rows < 1 or tile_cols < 1:
+            raise ValueError("Tile dimensions must be at least 1")
+        
+        # Seeded runs stay reproducible: keys and measurements continue the
+        # system's own streams
+        tiles = QuantumVESSystem(self.engine, key_source=self.participant_A.key_source)
+        tiles.participant_A.rbe = self.participant_A.rbe
+        tiles.participant_B.simulator = self.participant_B.simulator
+        tiles.participant_B.engine = self.participant_B.engine
+        
+        n_rows, n_cols = secret_image.shape
+        for row in range(0, n_rows, tile_rows):
+            for col in range(0, n_cols, tile_cols):
+                window = (slice(row, row + tile_rows), slice(col, col + tile_cols))
+                secret_tile = np.asarray(secret_image[window], dtype=np.uint8)
+                candidate_tile = np.asarray(candidate_image[window], dtype=np.uint8)
+                
+                tiles.participant_A.encrypt_image(secret_tile)
+                tiles.participant_B.receive_keys(tiles.participant_A.get_keys())
+                tiles.participant_C.observe_candidate(candidate_tile)
+                
+                match_results = (tiles._measure_pixels() == 0).reshape(secret_tile.shape)
+                yield TileMatch(row, col, match_results, int(match_results.sum()), match_results.size)
+    
+    def perform_streaming_matching(self, secret_image: np.ndarray, candidate_image: np.ndarray,
+                                   tile_shape: Tuple[int, int] = (256, 256),
+                                   verbose: bool = False) -> Tuple[int, int, float]:
+        """
+        Match two (possibly memory-mapped) images tile by tile
+        
+        Args:
+            secret_image: 2D binary secret image (array, np.memmap or PackedBinaryImage)
+            candidate_image: 2D binary candidate image of the same shape
+            tile_shape: (rows, cols) of each tile
+            verbose: If True, print the result of every tile
+            
+        Returns:
+            Tuple of (matched_pixels, total_pixels, match_percentage)
+        """
+        print("Secure Image Matching (streaming)")
+        print("-" * 50)
+        
+        matched = total = 0
+        for tile in self.stream_tile_matches(secret_image, candidate_image, tile_shape):
+            matched += tile.matched
+            total += tile.n_pixels
             if verbose:
-                print(f"--- Pixel {i} ---")
-                # Get original secret pixel value (for display only)
-                theta, phi = self.participant_A.get_key(i)
-                C_i = candidate_flat[i]
-                print(f"  Secret T[{i}] = (encrypted)")
-                print(f"  Candidate C[{i}] = {C_i}")
+                print(f"  Tile ({tile.row}, {tile.col}): {tile.matched}/{tile.n_pixels} matched")
+        match_percentage = matched / total * 100 if total else 0.0
+        
+        print(f"Matching complete: {match_percentage:.1f}% match")
+        if verbose:
+            print(f"  Matched pixels: {matched}/{total}")
+        print()
+        
+        return matched, total, match_percentage
+    
+    def _measure_pixels_sharded(self, n_workers: int) -> np.ndarray:
+        """
+        Run A → C → B over contiguous pixel shards in worker processes
+        
+        Each task carries only its shard's encrypted states, keys and
+        candidate bits, plus a measurement seed drawn from B's generator,
+        so seeded runs are reproducible for a fixed n_workers. Workers
+        build their participants and simulator once and reseed B per
+        task. Shard results are merged in pixel order; the workers'
+        simulator jobs and circuits are added to B's counters and their
+        peak RSS is kept in worker_peak_rss. Workers are spawned rather
+        than forked, since forking after Aer has started its thread pool
+        can deadlock.
+        
+        Args:
+            n_workers: Number of worker processes
             
+        Returns:
+            B's measured bit per pixel
+        """
+        states = self.participant_A.get_encrypted_states()
+        keys = self.participant_B.keys
+        n_pixels = len(states)
+        if n_pixels == 0:
+            return np.zeros(0, dtype=np.uint8)
+        n_shards = min(n_workers * SHARDS_PER_WORKER, n_pixels)
+        bounds = np.linspace(0, n_pixels, n_shards + 1).astype(int)
+        seeds = self.participant_B.engine.rng.integers(0, 2**63, size=n_shards)
+        
+        shards = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_shard_worker, initargs=(self.engine,)) as pool:
+            results = pool.map(_match_shard,
+                               [states[shard] for shard in shards],
+                               [keys[shard] for shard in shards],
+                               [self.participant_C._candidate_bits(np.arange(shard.start, shard.stop))
+                                for shard in shards],
+                               seeds)
+            bits = []
+            self.worker_peak_rss = {}
+            for shard_bits, jobs, circuits, pid, peak_rss in results:
+                bits.append(shard_bits)
+                self.participant_B.simulator_jobs += jobs
+                self.participant_B.simulated_circuits += circuits
+                self.worker_peak_rss[pid] = max(peak_rss, self.worker_peak_rss.get(pid, 0.0))
+            return np.concatenate(bits).astype(np.uint8)
+    
+    @staticmethod
+    def _trace_pixel_results(tracer: Tracer, candidate_flat: np.ndarray, decrypted_bits, match_results):
+        """Emit per-pixel outcomes of a round measured in one pass"""
+        for i, (candidate, bit, is_match) in enumerate(zip(candidate_flat.tolist(), np.asarray(decrypted_bits).tolist(),
+                                                           match_results)):
+            tracer.emit('measure', i, 'B', bit, candidate=candidate)
+            tracer.emit('match', i, 'B', is_match)
+    
+    def _perform_aer_matching(self, candidate_image: np.ndarray, tracer: Tracer) -> List[bool]:
+        """Run the protocol pixel by pixel with one Aer job per pixel"""
+        match_results = []
+        n_pixels = len(candidate_image.flatten())
+        
+        candidate_flat = candidate_image.flatten()
+        trace = tracer.enabled
+        
+        for i in range(n_pixels):
             # A sends encrypted qubit to C
-            qc_encrypted = self.participant_A.get_encrypted_pixel(i)
-            if verbose:
-                print(f"  A → C: QT[{i}] (encrypted quantum state)")
+            qc_encrypted = self.participant_A.get_encrypted_qubit(i)
+            if trace:
+                tracer.emit('send', i, 'A', candidate=int(candidate_flat[i]))
             
             # C applies conditional CNOT
             qc_transformed = self.participant_C.apply_cnot_if_needed(qc_encrypted, i)
-            if verbose:
-                if candidate_flat[i] == 1:
-                    print(f"  C applies CNOT (C[{i}]=1): QT[{i}] → QT'[{i}]")
-                else:
-                    print(f"  C skips CNOT (C[{i}]=0): QT'[{i}] = QT[{i}]")
-                print(f"  C → B: QT'[{i}]")
+            if trace:
+                tracer.emit('transform', i, 'C', bool(candidate_flat[i] == 1))
             
             # B decrypts and measures
             decrypted_bit = self.participant_B.decrypt_and_measure(qc_transformed, i)
-            if verbose:
-                theta, phi = self.participant_A.get_key(i)
-                print(f"  B applies RBE.Dec with key (θ={theta:.3f}, φ={phi:.3f})")
-                print(f"  B measures: {decrypted_bit}")
+            if trace:
+                tracer.emit('measure', i, 'B', decrypted_bit)
             
             # B determines match
             is_match = self.participant_B.determine_match(decrypted_bit)
             match_results.append(is_match)
             
-            if verbose:
-                print(f"  Result: {'✓ MATCH' if is_match else '✗ MISMATCH'}")
-                print(f"  Logic: Match when measurement = 0 (got {decrypted_bit})")
-                print()
-        
-        match_percentage = (sum(match_results) / len(match_results)) * 100
-        
-        print(f"Matching complete: {match_percentage:.1f}% match")
-        if verbose:
-            print(f"  Matched pixels: {sum(match_results)}/{len(match_results)}")
-        print()
+            if trace:
+                tracer.emit('match', i, 'B', is_match, bit=decrypted_bit)
         
-        return match_results, match_percentage
+        return match_results
+
+
+class CThroughput(NamedTuple):
+    """Per-C-participant work of a worker-process Byzantine matching round"""
+    c_idx: int
+    qubits: int
+    transform_seconds: float
+    measure_seconds: float
+    qubits_per_second: float
+
+
+# Worker processes for per-C Byzantine matching (see ByzantineResilientQVES._collect_votes_workers)
+C_WORKER_CHUNK = 4096
+_WORKER_POLL_SECONDS = 1.0
+
+
+def _c_worker_main(jobs: List[tuple], seed_base: int, chunk_size: int, b_queue):
+    """
+    Run a group of C participants in one process
+    
+    Each job is (c_idx, candidate, pixel_indices, alpha, lam): C's candidate
+    and A's preparation angles of only the qubits assigned to that C. The
+    CNOT is added per chunk and the transformed bindings are forwarded to
+    B with a measurement seed that depends on (C, chunk) only.
+    """
+    for c_idx, candidate, pixel_indices, alpha, lam in jobs:
+        participant_C = QuantumVESParticipantC()
+        participant_C.observe_candidate(candidate)
+        for chunk_idx, start in enumerate(range(0, len(pixel_indices), chunk_size)):
+            t0 = time.perf_counter()
+            chunk = pixel_indices[start:start + chunk_size]
+            bindings = {RBEEncoder.PREP_ALPHA: alpha[start:start + chunk_size],
+                        RBEEncoder.PREP_LAMBDA: lam[start:start + chunk_size]}
+            gamma = participant_C.apply_cnot_to_bindings(bindings, chunk)[RBEEncoder.CNOT_GAMMA]
+            seed = np.random.SeedSequence(seed_base, spawn_key=(c_idx, chunk_idx))
+            # Parameters are process-local objects, so bindings travel as plain arrays
+            b_queue.put((c_idx, chunk, bindings[RBEEncoder.PREP_ALPHA],
+                         bindings[RBEEncoder.PREP_LAMBDA], gamma, seed, time.perf_counter() - t0,
+                         (os.getpid(), _peak_rss_mb())))
+
+
+def _b_worker_main(engine: str, keys, b_queue, result_queue):
+    """
+    Decrypt and measure chunks forwarded by the C workers until a None arrives
+    
+    One of a pool of B processes sharing b_queue. B is built once and
+    reseeded per chunk. The engine decides the Aer jobs, as in
+    _collect_votes: 'batched' measures a chunk in one job, 'aer' runs one
+    job per vote. Results carry the chunk's simulator jobs and circuits
+    and the (pid, peak RSS) of the C worker and of this process.
+    """
+    participant_B = QuantumVESParticipantB()
+    participant_B.receive_keys(keys)
+    while True:
+        message = b_queue.get()
+        if message is None:
+            break
+        c_idx, chunk, alpha, lam, gamma, seed, transform_seconds, c_memory = message
+        t0 = time.perf_counter()
+        jobs, circuits = participant_B.simulator_jobs, participant_B.simulated_circuits
+        participant_B.reseed(seed)
+        qubits = [TransitQubit(pixel_idx, (a, l), ('x',) if g else ())
+                  for pixel_idx, a, l, g in zip(chunk.tolist(), alpha.tolist(), lam.tolist(), gamma.tolist())]
+        if engine == 'batched':
+            bits = participant_B.decrypt_and_measure_batch(qubits, chunk.tolist())
+        else:
+            bits = [participant_B.decrypt_and_measure(qubit, qubit.pixel_idx) for qubit in qubits]
+        result_queue.put((c_idx, chunk, np.asarray(bits, dtype=np.uint8), transform_seconds,
+                          time.perf_counter() - t0, participant_B.simulator_jobs - jobs,
+                          participant_B.simulated_circuits - circuits, (c_memory, (os.getpid(), _peak_rss_mb()))))
 
 
 class ByzantineResilientQVES:
@@ -374,52 +2125,286 @@ class ByzantineResilientQVES:
     Implements Section "QVES Resilient against Byzantine Participants"
     """
     
-    def __init__(self, n_c_participants: int = 5, distributed: bool = False):
+    def __init__(self, n_c_participants: int = 5, distributed: bool = False, engine: str = 'aer',
+                 seed=None, key_source: str = 'numpy'):
         """
         Initialize with multiple C participants
         
         Args:
             n_c_participants: Number of C-type participants (M in paper)
             distributed: If True, distribute QTs so each C gets max 1/3 of qubits
+            engine: 'aer' (one Aer job per vote) or 'batched' (one Aer job per match)
+            seed: Root seed for reproducible keys and measurements
+            key_source: 'numpy', 'secure' or 'derived' (see QuantumVESSystem)
         """
-        self.participant_A = QuantumVESParticipantA()
-        self.participant_B = QuantumVESParticipantB()
+        if engine not in ('aer', 'batched'):
+            raise ValueError(f"Unknown engine '{engine}' (expected 'aer' or 'batched')")
+        self.engine = engine
+        seed_A, seed_B, seed_order, seed_byzantine = RBEEncoder.spawn_seeds(seed, 4)
+        if key_source == 'secure':
+            seed_A = None  # CSPRNG keys cannot be reproduced
+        self.participant_A = QuantumVESParticipantA(seed_A, key_source)
+        self.participant_B = QuantumVESParticipantB(seed_B)
+        self.rng = np.random.default_rng(seed_order)  # pixel order for threshold matching
+        self.byzantine_rng = np.random.default_rng(seed_byzantine)  # randomized Byzantine strategies
         self.c_participants = [QuantumVESParticipantC() for _ in range(n_c_participants)]
         self.n_c = n_c_participants
         self.distributed = distributed
-        self.qubit_assignments = {}  # Maps pixel_idx to list of C participant indices
+        self.qubit_assignments = None  # QubitAssignment of the distributed mode
+        self.vote_matrix = None  # VoteMatrix of the last matching round
+        self.c_throughput = []  # CThroughput per C of the last worker-process round
+        self.worker_peak_rss = {}  # pid -> peak RSS (MB) of the last worker-process round
+        self.dropped = None  # (N, M) mask of qubits Byzantine Cs did not forward
     
     def setup_secret_image(self, secret_image: np.ndarray):
         """Setup with encryption"""
         self.participant_A.encrypt_image(secret_image)
-        keys = {i: self.participant_A.get_key(i) for i in range(len(secret_image.flatten()))}
-        self.participant_B.receive_keys(keys)
+        self.participant_B.receive_keys(self.participant_A.get_keys())
     
-    def _distribute_qubits(self, n_pixels: int):
+    def _distribute_qubits(self, n_pixels: int) -> QubitAssignment:
         """
         Distribute qubits among C participants so each gets max 1/3
         
+        Each qubit goes to min(3, M) different C participants (for
+        redundancy) with balanced loads; the 1/3 cap is met whenever it is
+        feasible (M ≥ 9 for 3 copies). Assignments are cached per size.
+        
         Args:
             n_pixels: Total number of pixels/qubits
+            
+        Returns:
+            QubitAssignment
+        """
+        self.qubit_assignments = build_assignment(n_pixels, self.n_c, min(3, self.n_c))
+        return self.qubit_assignments
+    
+    def _observe_candidate(self, candidate_image: np.ndarray, byzantine_indices: List[int],
+                           pixel_assignments: np.ndarray, strategy: ByzantineStrategy = None,
+                           verbose: bool = False):
+        """
+        All C participants observe the candidate; Byzantine ones corrupt it
+        
+        The strategy (default: FlipAll) chooses which pixels each Byzantine
+        C flips in its copy of the candidate and which qubits it drops;
+        drops are kept in self.dropped.
+        """
+        strategy = FlipAll() if strategy is None else strategy
+        candidate_flat = np.ravel(candidate_image) != 0
+        flips, self.dropped = strategy.corrupt(byzantine_indices, pixel_assignments, self.n_c, self.byzantine_rng)
+        
+        for c_idx, c_participant in enumerate(self.c_participants):
+            if c_idx in byzantine_indices:
+                # Byzantine: observe wrong image (flip chosen pixels)
+                c_participant.observe_candidate(candidate_flat ^ flips[:, c_idx])
+                if verbose:
+                    print(f"  C participant {c_idx}: Byzantine ({strategy.description})")
+            else:
+                # Honest: observe correct image
+                c_participant.observe_candidate(candidate_image)
+                if verbose:
+                    print(f"  C participant {c_idx}: Honest (observes correct image)")
+        
+        if verbose:
+            print()
+    
+    def _pixel_assignments(self, n_pixels: int) -> np.ndarray:
+        """Determine which C participants process each qubit, shape (N, copies)"""
+        if self.distributed:
+            return self.qubit_assignments.pixels_to_cs
+        return np.broadcast_to(np.arange(self.n_c), (n_pixels, self.n_c))
+    
+    def _collect_votes(self, pixel_indices, pixel_assignments: np.ndarray) -> VoteMatrix:
+        """
+        Run A → assigned Cs → B for the given pixels
+        
+        Returns:
+            VoteMatrix with one row per entry of pixel_indices (in order)
+            and one column per C participant
+        """
+        # A sends QT[i] to every assigned C, which applies CNOT; all copies
+        # share A's immutable prefix and circuits are only built by B
+        transformed = []
+        vote_pixels = []
+        vote_rows = []
+        vote_cs = []
+        for row, pixel_idx in enumerate(pixel_indices):
+            pixel_idx = int(pixel_idx)
+            qubit = self.participant_A.get_encrypted_qubit(pixel_idx)
+            for c_idx in pixel_assignments[pixel_idx].tolist():
+                if self.dropped[pixel_idx, c_idx]:
+                    continue  # Byzantine C never forwards this qubit
+                transformed.append(self.c_participants[c_idx].apply_cnot_if_needed(qubit, pixel_idx))
+                vote_pixels.append(pixel_idx)
+                vote_rows.append(row)
+                vote_cs.append(c_idx)
+        
+        # B decrypts every copy - one job per copy, or all copies in one job
+        if self.engine == 'batched':
+            decrypted_bits = self.participant_B.decrypt_and_measure_batch(transformed, vote_pixels)
+        else:
+            decrypted_bits = [self.participant_B.decrypt_and_measure(qc, pixel_idx)
+                              for qc, pixel_idx in zip(transformed, vote_pixels)]
+        return VoteMatrix.from_votes(np.array(vote_rows, dtype=np.intp), np.array(vote_cs, dtype=np.intp),
+                                     decrypted_bits, len(pixel_indices), self.n_c)
+    
+    def _collect_votes_workers(self, n_workers: int, chunk_size: int = C_WORKER_CHUNK,
+                               n_b_workers: int = None) -> VoteMatrix:
+        """
+        Run A → C → B for all pixels with C participants in worker processes
+        
+        The C participants are split round-robin over n_workers processes;
+        each receives its candidate and only the qubits assigned to it, adds
+        the CNOT and forwards the transformed qubits to a pool of B
+        processes, which measure them with the configured engine.
+        Measurement seeds depend only on (C, chunk), so seeded runs give the
+        same votes for any number of workers. If any worker dies, the round
+        fails with RuntimeError instead of waiting for its chunks. Per-C
+        throughput is stored in c_throughput, the workers' peak RSS in
+        worker_peak_rss, and B's simulator counters include the B workers'
+        jobs. Processes are spawned, as forking after Aer has started can
+        deadlock.
+        
+        Args:
+            n_workers: Number of C worker processes
+            chunk_size: Qubits per message from a C worker to B
+            n_b_workers: Number of B worker processes (default: n_workers)
+            
+        Returns:
+            VoteMatrix over all pixels
+        """
+        n_pixels = len(self.participant_A.get_encrypted_states())
+        n_workers = min(n_workers, self.n_c)
+        bindings = self.participant_A.get_preparation_bindings()
+        alpha, lam = bindings[RBEEncoder.PREP_ALPHA], bindings[RBEEncoder.PREP_LAMBDA]
+        
+        # A sends each C only the qubits assigned to it
+        groups = [[] for _ in range(n_workers)]
+        n_chunks = 0
+        for c_idx, c_participant in enumerate(self.c_participants):
+            if self.distributed:
+                pixel_indices = self.qubit_assignments.pixels_of(c_idx)
+            else:
+                pixel_indices = np.arange(n_pixels, dtype=np.int32)
+            pixel_indices = pixel_indices[~self.dropped[pixel_indices, c_idx]]
+            groups[c_idx % n_workers].append((c_idx, c_participant.candidate_image, pixel_indices,
+                                              alpha[pixel_indices], lam[pixel_indices]))
+            n_chunks += -(-len(pixel_indices) // chunk_size)
+        
+        seed_base = int(self.participant_B.engine.rng.integers(0, 2**63))
+        ctx = multiprocessing.get_context('spawn')
+        b_queue, result_queue = ctx.Queue(), ctx.Queue()
+        n_b_workers = n_workers if n_b_workers is None else max(1, n_b_workers)
+        b_processes = [ctx.Process(target=_b_worker_main,
+                                   args=(self.engine, self.participant_B.keys, b_queue, result_queue))
+                       for _ in range(n_b_workers)]
+        processes = b_processes + [ctx.Process(target=_c_worker_main, args=(group, seed_base, chunk_size, b_queue))
+                                   for group in groups]
+        
+        vote_rows, vote_cs, decrypted_bits = [], [], []
+        qubits = np.zeros(self.n_c, dtype=np.int64)
+        transform_seconds = np.zeros(self.n_c)
+        measure_seconds = np.zeros(self.n_c)
+        self.worker_peak_rss = {}
+        for process in processes:
+            process.start()
+        try:
+            for _ in range(n_chunks):
+                while True:
+                    try:
+                        message = result_queue.get(timeout=_WORKER_POLL_SECONDS)
+                        break
+                    except queue.Empty:
+                        failed = [process.name for process in processes if process.exitcode not in (None, 0)]
+                        if failed:
+                            raise RuntimeError(f"Worker process failed: {', '.join(failed)}")
+                c_idx, chunk, bits, c_seconds, b_seconds, jobs, circuits, memory = message
+                self.participant_B.simulator_jobs += jobs
+                self.participant_B.simulated_circuits += circuits
+                for pid, peak_rss in memory:
+                    self.worker_peak_rss[pid] = max(peak_rss, self.worker_peak_rss.get(pid, 0.0))
+                vote_rows.append(chunk)
+                vote_cs.append(np.full(len(chunk), c_idx, dtype=np.intp))
+                decrypted_bits.append(bits)
+                qubits[c_idx] += len(chunk)
+                transform_seconds[c_idx] += c_seconds
+                measure_seconds[c_idx] += b_seconds
+        finally:
+            for _ in b_processes:
+                b_queue.put(None)
+            for process in processes:
+                process.join(timeout=_WORKER_POLL_SECONDS)
+                if process.is_alive():
+                    process.terminate()
+        
+        busy = transform_seconds + measure_seconds
+        self.c_throughput = [CThroughput(c_idx, int(qubits[c_idx]), float(transform_seconds[c_idx]),
+                                         float(measure_seconds[c_idx]),
+                                         float(qubits[c_idx] / busy[c_idx]) if busy[c_idx] > 0 else 0.0)
+                             for c_idx in range(self.n_c)]
+        if not vote_rows:
+            return VoteMatrix.from_votes(np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp),
+                                         np.zeros(0, dtype=np.uint8), n_pixels, self.n_c)
+        return VoteMatrix.from_votes(np.concatenate(vote_rows).astype(np.intp), np.concatenate(vote_cs),
+                                     np.concatenate(decrypted_bits), n_pixels, self.n_c)
+    
+    def _majority_votes(self, pixel_indices, pixel_assignments: np.ndarray) -> np.ndarray:
+        """Majority-vote match result of each given pixel"""
+        return self._collect_votes(pixel_indices, pixel_assignments).majority()
+    
+    def perform_threshold_matching(self, candidate_image: np.ndarray, threshold: float = 0.95,
+                                   byzantine_indices: List[int] = [], alpha: float = 0.01,
+                                   beta: float = 0.01, indifference: float = 0.02,
+                                   chunk_size: int = 64, strategy: ByzantineStrategy = None,
+                                   verbose: bool = False) -> ThresholdDecision:
+        """
+        Threshold-decision mode of Byzantine-resilient matching
+        
+        Like QuantumVESSystem.perform_threshold_matching, with each pixel's
+        outcome being the majority vote of its assigned C participants.
+        
+        Args:
+            candidate_image: Candidate image
+            threshold: Required match rate (0..1)
+            byzantine_indices: Indices of Byzantine (malicious) C participants
+            alpha: False-match probability below threshold - indifference
+            beta: False-reject probability at the threshold
+            indifference: Width of the region where either answer is fine
+            chunk_size: Pixels evaluated between test updates
+            strategy: Behaviour of the Byzantine participants (default: FlipAll)
+            verbose: If True, show the evidence used for the decision
+            
+        Returns:
+            ThresholdDecision
         """
-        max_per_participant = max(1, n_pixels // 3)  # Each C gets at most 1/3
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        
+        print(f"Byzantine-Resilient Matching (threshold {threshold:.0%})")
+        print("-" * 50)
+        
+        n_pixels = len(self.participant_A.get_encrypted_states())
+        if self.distributed:
+            self._distribute_qubits(n_pixels)
+        pixel_assignments = self._pixel_assignments(n_pixels)
+        self._observe_candidate(candidate_image, byzantine_indices, pixel_assignments, strategy)
+        test = SequentialThresholdTest(threshold, alpha, beta, indifference)
+        order = self.rng.permutation(n_pixels)
         
-        # Assign each qubit to multiple C participants (for redundancy)
-        # Each qubit is assigned to at least 3 different C participants
-        copies_per_qubit = min(3, self.n_c)
+        for start in range(0, n_pixels, chunk_size):
+            chunk = order[start:start + chunk_size]
+            if test.update(self._majority_votes(chunk, pixel_assignments)) is not None:
+                break
         
-        for pixel_idx in range(n_pixels):
-            # Assign this qubit to 'copies_per_qubit' different C participants
-            # Use round-robin with offset to ensure good distribution
-            assigned_cs = []
-            for copy in range(copies_per_qubit):
-                c_idx = (pixel_idx * copies_per_qubit + copy) % self.n_c
-                assigned_cs.append(c_idx)
-            self.qubit_assignments[pixel_idx] = assigned_cs
+        decision = test.finalize(n_pixels)
+        _print_threshold_decision(decision, verbose)
+        return decision
     
     def perform_byzantine_resilient_matching(self, candidate_image: np.ndarray,
                                             byzantine_indices: List[int] = [],
-                                            verbose: bool = False) -> Tuple[List[bool], float]:
+                                            verbose: bool = False,
+                                            n_workers: int = 1,
+                                            strategy: ByzantineStrategy = None,
+                                            tracer: Tracer = None) -> Tuple[List[bool], float]:
         """
         Perform matching with Byzantine resilience
         
@@ -427,10 +2412,20 @@ class ByzantineResilientQVES:
             candidate_image: Candidate image
             byzantine_indices: Indices of Byzantine (malicious) C participants
             verbose: If True, show detailed pixel-by-pixel processing
+            n_workers: Number of worker processes; above 1 the C participants
+                       run in their own processes and forward to a pool of
+                       B processes (see _collect_votes_workers)
+            strategy: Behaviour of the Byzantine participants (default: FlipAll)
+            tracer: Receives per-pixel send, vote and majority events
+                    (verbose mode adds a text rendering on stdout)
             
         Returns:
             Tuple of (match_results, match_percentage)
         """
+        if n_workers < 1:
+            raise ValueError("n_workers must be at least 1")
+        tracer = resolve_tracer(tracer, verbose)
+        
         print("Byzantine-Resilient Matching")
         if self.distributed:
             print("Mode: DISTRIBUTED (each C gets max 1/3 of qubits)")
@@ -446,120 +2441,365 @@ class ByzantineResilientQVES:
         
         # If distributed mode, assign qubits to C participants
         if self.distributed:
-            self._distribute_qubits(n_pixels)
+            assignment = self._distribute_qubits(n_pixels)
             if verbose:
                 print("Qubit Distribution (each qubit assigned to multiple Cs):")
                 for pixel_idx in range(min(5, n_pixels)):  # Show first 5
-                    print(f"  QT[{pixel_idx}] → C participants {self.qubit_assignments[pixel_idx]}")
+                    print(f"  QT[{pixel_idx}] → C participants {assignment[pixel_idx].tolist()}")
                 if n_pixels > 5:
                     print(f"  ... (total {n_pixels} qubits)")
                 print()
                 
                 # Show qubit count per participant
-                qubit_counts = {c_idx: 0 for c_idx in range(self.n_c)}
-                for assigned_cs in self.qubit_assignments.values():
-                    for c_idx in assigned_cs:
-                        qubit_counts[c_idx] += 1
                 print("Qubits per C participant:")
-                for c_idx in range(self.n_c):
-                    percentage = (qubit_counts[c_idx] / n_pixels) * 100
-                    print(f"  C{c_idx}: {qubit_counts[c_idx]} qubits ({percentage:.1f}%)")
+                for c_idx, count in enumerate(assignment.loads.tolist()):
+                    percentage = (count / n_pixels) * 100
+                    print(f"  C{c_idx}: {count} qubits ({percentage:.1f}%)")
+                if not assignment.cap_respected:
+                    print(f"  Note: 1/3 cap infeasible with {self.n_c} participants and "
+                          f"{assignment.copies} copies per qubit (balanced max: {assignment.max_share:.1%})")
                 print()
         
-        # All C participants observe candidate
-        for c_idx, c_participant in enumerate(self.c_participants):
-            if c_idx in byzantine_indices:
-                # Byzantine: observe wrong image (flip pixels)
-                wrong_image = 1 - candidate_image
-                c_participant.observe_candidate(wrong_image)
-                if verbose:
-                    print(f"  C participant {c_idx}: Byzantine (observes flipped image)")
-            else:
-                # Honest: observe correct image
-                c_participant.observe_candidate(candidate_image)
-                if verbose:
-                    print(f"  C participant {c_idx}: Honest (observes correct image)")
-        
-        if verbose:
-            print()
-        
-        match_results = []
+        pixel_assignments = self._pixel_assignments(n_pixels)
+        self._observe_candidate(candidate_image, byzantine_indices, pixel_assignments, strategy, verbose)
+        if n_workers > 1:
+            self.vote_matrix = self._collect_votes_workers(n_workers)
+            self._print_c_throughput()
+        else:
+            self.vote_matrix = self._collect_votes(range(n_pixels), pixel_assignments)
+        match_results = self.vote_matrix.majority().tolist()
         
-        for pixel_idx in range(n_pixels):
-            if verbose:
-                print(f"--- Pixel {pixel_idx} ---")
-                print(f"  Candidate C[{pixel_idx}] = {candidate_flat[pixel_idx]}")
-            
-            # Determine which C participants process this qubit
-            if self.distributed:
-                assigned_cs = self.qubit_assignments[pixel_idx]
-                if verbose:
-                    print(f"  A sends QT[{pixel_idx}] to C participants {assigned_cs}")
-            else:
-                assigned_cs = list(range(self.n_c))
-                if verbose:
-                    print(f"  A broadcasts QT[{pixel_idx}] to all {self.n_c} C participants")
-            
-            # Collect votes from assigned C participants
-            votes = []
-            
-            for c_idx in assigned_cs:
-                c_participant = self.c_participants[c_idx]
-                
-                # Get fresh copy of encrypted qubit
-                qc_copy = self.participant_A.get_encrypted_pixel(pixel_idx)
-                
-                # C applies CNOT
-                qc_transformed = c_participant.apply_cnot_if_needed(qc_copy, pixel_idx)
-                
-                # B decrypts
-                decrypted_bit = self.participant_B.decrypt_and_measure(qc_transformed, pixel_idx)
-                
-                vote = decrypted_bit == 0  # True if match
-                votes.append(vote)
-                
-                if verbose:
-                    print(f"  C{c_idx} → B: QT'[{pixel_idx}], B measures: {decrypted_bit}, "
-                          f"Vote: {'MATCH' if vote else 'MISMATCH'}")
-            
-            # Majority vote among assigned participants
-            match_vote = sum(votes) > len(votes) / 2
-            match_results.append(match_vote)
-            
-            if verbose:
-                print(f"  Majority Vote: {sum(votes)}/{len(votes)} → "
-                      f"{'✓ MATCH' if match_vote else '✗ MISMATCH'}")
-                print()
+        if tracer.enabled:
+            self._trace_votes(tracer, candidate_flat, pixel_assignments, match_results)
         
         match_percentage = (sum(match_results) / len(match_results)) * 100
         
         print(f"Matching complete with majority voting: {match_percentage:.1f}% match")
         if verbose:
             print(f"  Matched pixels: {sum(match_results)}/{len(match_results)}")
+            stats = self.vote_matrix.summary()
+            disagreement = stats['disagreement_rates']
+            worst = int(np.nanargmax(disagreement)) if not np.all(np.isnan(disagreement)) else 0
+            print(f"  Tied votes: {stats['tie_count']} ({stats['tie_rate']:.1%})")
+            print(f"  Disagreement with majority: mean {np.nanmean(disagreement):.1%}, "
+                  f"max {disagreement[worst]:.1%} (C{worst})")
         print()
         
         return match_results, match_percentage
+    
+    def _trace_votes(self, tracer: Tracer, candidate_flat: np.ndarray, pixel_assignments: np.ndarray,
+                     match_results: List[bool]):
+        """Emit the send, vote and majority events of every pixel of the last round"""
+        match_votes = self.vote_matrix.match_votes().tolist()
+        vote_counts = self.vote_matrix.vote_counts().tolist()
+        votes = self.vote_matrix.votes
+        for pixel_idx, assigned_cs in enumerate(pixel_assignments.tolist()):
+            candidate = int(candidate_flat[pixel_idx])
+            if self.distributed:
+                tracer.emit('send', pixel_idx, 'A', candidate=candidate, targets=assigned_cs)
+            else:
+                tracer.emit('send', pixel_idx, 'A', candidate=candidate, broadcast=self.n_c)
+            
+            for c_idx in assigned_cs:
+                if self.dropped[pixel_idx, c_idx]:
+                    tracer.emit('vote', pixel_idx, f"C{c_idx}", None)
+                    continue
+                vote = bool(votes[pixel_idx, c_idx])  # True if match
+                tracer.emit('vote', pixel_idx, f"C{c_idx}", vote, bit=int(not vote))
+            
+            tracer.emit('majority', pixel_idx, 'B', match_results[pixel_idx],
+                        votes=match_votes[pixel_idx], total=vote_counts[pixel_idx])
+    
+    def _print_c_throughput(self):
+        """Print per-C work of the last worker-process round"""
+        print("Per-C throughput (worker processes):")
+        for stats in self.c_throughput:
+            print(f"  C{stats.c_idx}: {stats.qubits} qubits, transform {stats.transform_seconds * 1e3:.1f} ms, "
+                  f"B measure {stats.measure_seconds * 1e3:.1f} ms → {stats.qubits_per_second:,.0f} qubits/s")
+        print()
+
+
+def _print_threshold_decision(decision: ThresholdDecision, verbose: bool):
+    """Print the outcome of a threshold-matching run"""
+    outcome = "ACCEPT (match)" if decision.accepted else "REJECT (no match)"
+    print(f"Decision: {outcome} after {decision.pixels_evaluated}/{decision.total_pixels} pixels")
+    if decision.pixels_simulated != decision.pixels_evaluated:
+        print(f"  Pixels simulated: {decision.pixels_simulated} (whole chunks)")
+    if verbose:
+        reason = "sequential test settled" if decision.early_stop else "all pixels evaluated"
+        print(f"  Matched pixels: {decision.pixels_matched}/{decision.pixels_evaluated} "
+              f"({decision.observed_match_rate:.1%}, {reason})")
+    print()
+
+
+def benchmark_key_generation(n_keys: int = 1 << 20, repeats: int = 3,
+                             legacy_sample: int = 20000) -> Dict[str, float]:
+    """
+    Measure key generation throughput of each key source
+    
+    Compares the per-pixel generate_key loop, per-pixel calls to the
+    secrets module, vectorized generate_keys and bulk CSPRNG generation.
+    Per-pixel sources are timed on legacy_sample keys and scaled.
+    
+    Args:
+        n_keys: Keys per timed run of the vectorized sources
+        repeats: Runs per source (best run is reported)
+        legacy_sample: Keys per timed run of the per-pixel sources
+        
+    Returns:
+        Dictionary mapping source name to keys per second
+    """
+    encoder = RBEEncoder()
+    secure_encoder = RBEEncoder(secure=True)
+    
+    # Per-pixel sources fill a dict key table, as the original encoder did
+    def per_pixel_numpy(n):
+        return {i: encoder.generate_key() for i in range(n)}
+    
+    def per_pixel_secrets(n):
+        keys = {}
+        for i in range(n):
+            theta = secrets.randbits(53) * (2 * np.pi / 2**53)
+            phi = np.pi/2 if secrets.randbits(1) else -np.pi/2
+            keys[i] = (theta, phi)
+        return keys
+    
+    sources = {
+        'generate_key (per pixel)': (per_pixel_numpy, min(n_keys, legacy_sample)),
+        'secrets (per pixel)': (per_pixel_secrets, min(n_keys, legacy_sample)),
+        'generate_keys (vectorized)': (encoder.generate_keys, n_keys),
+        'generate_secure_keys (bulk CSPRNG)': (secure_encoder.generate_secure_keys, n_keys),
+    }
+    
+    rates = {}
+    for name, (generate, n) in sources.items():
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            generate(n)
+            best = min(best, time.perf_counter() - start)
+        rates[name] = n / best
+    return rates
+
+
+BENCH_MODES = ('standard', 'replicated', 'distributed')
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS mark of this process (Linux; no-op elsewhere)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _cpu_seconds() -> float:
+    """User + system CPU time of this process and its finished worker processes"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size in MB (since the last reset where supported)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+def benchmark_matching(sizes: List[int] = (4, 8), participants: List[int] = (5,),
+                       byzantine_counts: List[int] = (0, 1, 2), modes: List[str] = BENCH_MODES,
+                       engine: str = 'batched', byzantine_engine: str = 'batched', repeats: int = 1,
+                       seed: int = None, n_workers: int = 1, warmup: bool = True) -> List[Dict[str, object]]:
+    """
+    Time matching over a grid of configurations, without prompts or output
+    
+    'standard' runs QuantumVESSystem.perform_matching (one C participant)
+    once per size; 'replicated' and 'distributed' run Byzantine-resilient
+    matching for every participant count and Byzantine count (at most M).
+    The candidate differs from the secret in its middle row. Each
+    configuration first gets one untimed warm-up run (imports, transpiler
+    and circuit caches). CPU time and simulator counts include worker
+    processes; peak_rss_mb covers this process and worker_peak_rss_mb is
+    the sum of the worker processes' peaks (None without workers).
+    
+    Args:
+        sizes: Image sizes (size × size)
+        participants: C participant counts (M) for the Byzantine modes
+        byzantine_counts: Numbers of Byzantine participants
+        modes: Subset of BENCH_MODES
+        engine: Engine of the standard mode (see ENGINES)
+        byzantine_engine: 'aer' or 'batched' for the Byzantine modes
+        repeats: Timed runs per configuration
+        seed: Root seed for keys and measurements
+        n_workers: Worker processes passed to the matching calls
+        warmup: Run each configuration once untimed before the timed runs
+        
+    Returns:
+        One row per timed run with wall_seconds, cpu_seconds, peak_rss_mb,
+        worker_peak_rss_mb, simulator_jobs, simulated_circuits and
+        match_percentage
+    """
+    for mode in modes:
+        if mode not in BENCH_MODES:
+            raise ValueError(f"Unknown mode '{mode}' (expected one of {BENCH_MODES})")
+    
+    configs = []
+    for size in sizes:
+        if 'standard' in modes:
+            configs.append(('standard', size, 1, 0))
+        for mode in ('replicated', 'distributed'):
+            if mode in modes:
+                configs.extend((mode, size, n_c, n_byzantine) for n_c in participants
+                               for n_byzantine in byzantine_counts if n_byzantine <= n_c)
+    
+    rows = []
+    for mode, size, n_c, n_byzantine in configs:
+        secret_image = generate_test_image(size)
+        candidate = secret_image.copy()
+        candidate[size // 2, :] = 1 - candidate[size // 2, :]
+        for repeat in range(-1 if warmup else 0, repeats):
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                if mode == 'standard':
+                    system = QuantumVESSystem(engine=engine, seed=seed)
+                else:
+                    system = ByzantineResilientQVES(n_c, distributed=mode == 'distributed',
+                                                    engine=byzantine_engine, seed=seed)
+                system.setup_secret_image(secret_image)
+                
+                _reset_peak_rss()
+                cpu_start = _cpu_seconds()
+                wall_start = time.perf_counter()
+                if mode == 'standard':
+                    _, percentage = system.perform_matching(candidate, n_workers=n_workers)
+                else:
+                    _, percentage = system.perform_byzantine_resilient_matching(
+                        candidate, byzantine_indices=list(range(n_byzantine)), n_workers=n_workers)
+                wall_seconds = time.perf_counter() - wall_start
+                cpu_seconds = _cpu_seconds() - cpu_start
+            if repeat < 0:
+                continue  # warm-up run
+            
+            worker_peaks = system.worker_peak_rss.values()
+            rows.append({
+                'mode': mode,
+                'size': size,
+                'pixels': size * size,
+                'participants': n_c,
+                'byzantine': n_byzantine,
+                'engine': engine if mode == 'standard' else byzantine_engine,
+                'workers': n_workers,
+                'repeat': repeat,
+                'wall_seconds': wall_seconds,
+                'cpu_seconds': cpu_seconds,
+                'peak_rss_mb': _peak_rss_mb(),
+                'worker_peak_rss_mb': sum(worker_peaks) if worker_peaks else None,
+                'simulator_jobs': system.participant_B.simulator_jobs,
+                'simulated_circuits': system.participant_B.simulated_circuits,
+                'match_percentage': percentage,
+            })
+    return rows
+
+
+def _run_bench(args):
+    """Run the bench subcommand and write its rows as JSON or CSV"""
+    import csv
+    import json
+    
+    if args.keys is not None:
+        rates = benchmark_key_generation(args.keys, args.repeats)
+        rows = [{'source': source, 'keys': args.keys, 'keys_per_second': rate} for source, rate in rates.items()]
+    else:
+        rows = benchmark_matching(args.sizes, args.participants, args.byzantine, args.modes,
+                                  args.engine or 'batched', args.byzantine_engine, args.repeats, args.seed,
+                                  args.workers, not args.no_warmup)
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            writer = csv.DictWriter(output, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, output, indent=2)
+            output.write('\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
 
 
-def generate_test_image(size: int) -> np.ndarray:
+def generate_test_image(size: int, packed: bool = False) -> Union[np.ndarray, PackedBinaryImage]:
     """
     Generate a test image with a checkerboard-like pattern
     
     Args:
         size: Size of the square image (size × size)
+        packed: If True, return a bit-packed PackedBinaryImage
         
     Returns:
-        Binary image array
+        Binary image array (or PackedBinaryImage)
     """
     # Create checkerboard pattern
-    image = np.zeros((size, size), dtype=int)
-    for i in range(size):
-        for j in range(size):
-            image[i, j] = (i + j) % 2
+    rows, cols = np.indices((size, size))
+    image = (rows + cols) % 2
+    if packed:
+        return PackedBinaryImage.from_array(image)
     return image
 
 
-def demonstrate_rbe_ves(verbose: bool = False, save_to_files: bool = False, image_size: int = 3):
+class _MarkdownReport:
+    """
+    Stream a demo's output into a markdown file while it is produced
+    
+    Used as a context manager: on entry the header and an opening code fence
+    are written and stdout is redirected to the file (so verbose trace
+    renderings land there too); on exit, even after an exception, the fence
+    is closed, the file released and stdout restored. With enabled=False it
+    does nothing, so demos can use one code path either way.
+    """
+    
+    def __init__(self, path: str, header: str, label: str, enabled: bool = True):
+        self.path = path
+        self.header = header
+        self.label = label
+        self.enabled = enabled
+        self._file = None
+        self._redirect = None
+    
+    def __enter__(self):
+        if self.enabled:
+            self._file = open(self.path, "w")
+            self._file.write(self.header)
+            self._file.write("```\n")
+            self._redirect = contextlib.redirect_stdout(self._file)
+            self._redirect.__enter__()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._file is None:
+            return False
+        try:
+            self._redirect.__exit__(exc_type, exc_value, traceback)
+            self._file.write("```\n")
+        finally:
+            self._file.close()
+            self._file = None
+        if exc_type is None:
+            print(f"✓ {self.label} output saved to {self.path}")
+        return False
+
+
+def demonstrate_rbe_ves(verbose: bool = False, save_to_files: bool = False, image_size: int = 3,
+                        engine: str = 'aer', seed: int = None, n_workers: int = 1, tracer: Tracer = None):
     """
     Demonstration of RBE-based Quantum VES
     
@@ -567,10 +2807,11 @@ def demonstrate_rbe_ves(verbose: bool = False, save_to_files: bool = False, imag
         verbose: If True, show detailed pixel-by-pixel processing
         save_to_files: If True, save each test output to separate markdown files
         image_size: Size of the square secret image (default: 3 for 3x3)
+        engine: Matching engine passed to QuantumVESSystem
+        seed: Root seed for reproducible keys and measurements
+        n_workers: Worker processes used by perform_matching
+        tracer: Receives the per-pixel protocol events of every test
     """
-    import io
-    import sys
-    
     print("=" * 70)
     print("RBE-Based Quantum Visual Encryption Scheme")
     print("Implementation from: 'Quantum Perfect Output VES in Spite of")
@@ -592,127 +2833,97 @@ def demonstrate_rbe_ves(verbose: bool = False, save_to_files: bool = False, imag
     print()
     
     # Test 1: Perfect match
-    if save_to_files:
-        output_buffer = io.StringIO()
-        original_stdout = sys.stdout
-        sys.stdout = output_buffer
-    
-    print("=" * 70)
-    print("Test 1: Matching with identical candidate")
-    print("=" * 70)
-    print()
-    candidate_same = secret_image.copy()
-    
-    if image_size <= 5:
-        print("Secret Image:")
-        print(secret_image)
+    with _MarkdownReport("test_1.md", "# Test 1: Matching with Identical Candidate\n\n"
+                         f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n\n",
+                         "Test 1", enabled=save_to_files):
+        print("=" * 70)
+        print("Test 1: Matching with identical candidate")
+        print("=" * 70)
         print()
-        print("Candidate Image:")
-        print(candidate_same)
-    else:
-        print(f"Images: {image_size}×{image_size} (identical)")
-    print()
+        candidate_same = secret_image.copy()
     
-    qves = QuantumVESSystem()
-    qves.setup_secret_image(secret_image)
-    matches, percentage = qves.perform_matching(candidate_same, verbose=verbose)
-    print(f"Result: {percentage:.0f}% match (Expected: 100%)")
-    print()
+        if image_size <= 5:
+            print("Secret Image:")
+            print(secret_image)
+            print()
+            print("Candidate Image:")
+            print(candidate_same)
+        else:
+            print(f"Images: {image_size}×{image_size} (identical)")
+        print()
     
-    if save_to_files:
-        sys.stdout = original_stdout
-        with open("test_1.md", "w") as f:
-            f.write("# Test 1: Matching with Identical Candidate\n\n")
-            f.write(f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n\n")
-            f.write("```\n")
-            f.write(output_buffer.getvalue())
-            f.write("```\n")
-        print("✓ Test 1 output saved to test_1.md")
+        qves = QuantumVESSystem(engine=engine, seed=seed)
+        qves.setup_secret_image(secret_image)
+        matches, percentage = qves.perform_matching(candidate_same, verbose=verbose, n_workers=n_workers,
+                                                    tracer=tracer)
+        print(f"Result: {percentage:.0f}% match (Expected: 100%)")
+        print()
     
     # Test 2: Partial match
-    if save_to_files:
-        output_buffer = io.StringIO()
-        sys.stdout = output_buffer
-    
-    print("=" * 70)
-    print("Test 2: Matching with partially different candidate")
-    print("=" * 70)
-    print()
-    # Create partially different candidate: flip middle row(s)
-    candidate_partial = secret_image.copy()
-    mid_row = image_size // 2
-    candidate_partial[mid_row, :] = 1 - candidate_partial[mid_row, :]
-    
-    if image_size <= 5:
-        print("Secret Image:")
-        print(secret_image)
+    with _MarkdownReport("test_2.md", "# Test 2: Matching with Partially Different Candidate\n\n"
+                         f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n\n",
+                         "Test 2", enabled=save_to_files):
+        print("=" * 70)
+        print("Test 2: Matching with partially different candidate")
+        print("=" * 70)
+        print()
+        # Create partially different candidate: flip middle row(s)
+        candidate_partial = secret_image.copy()
+        mid_row = image_size // 2
+        candidate_partial[mid_row, :] = 1 - candidate_partial[mid_row, :]
+    
+        if image_size <= 5:
+            print("Secret Image:")
+            print(secret_image)
+            print()
+            print("Candidate Image:")
+            print(candidate_partial)
+        else:
+            diff_count = np.sum(secret_image != candidate_partial)
+            print(f"Images: {image_size}×{image_size}, {diff_count}/{image_size**2} pixels different")
         print()
-        print("Candidate Image:")
-        print(candidate_partial)
-    else:
-        diff_count = np.sum(secret_image != candidate_partial)
-        print(f"Images: {image_size}×{image_size}, {diff_count}/{image_size**2} pixels different")
-    print()
-    
-    # Reset for new matching
-    qves = QuantumVESSystem()
-    qves.setup_secret_image(secret_image)
     
-    matches, percentage = qves.perform_matching(candidate_partial, verbose=verbose)
-    expected_partial = ((image_size**2 - image_size) / image_size**2) * 100
-    print(f"Result: {percentage:.0f}% match (Expected: ~{expected_partial:.0f}%)")
-    print()
+        # Reset for new matching
+        qves = QuantumVESSystem(engine=engine, seed=seed)
+        qves.setup_secret_image(secret_image)
     
-    if save_to_files:
-        sys.stdout = original_stdout
-        with open("test_2.md", "w") as f:
-            f.write("# Test 2: Matching with Partially Different Candidate\n\n")
-            f.write(f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n\n")
-            f.write("```\n")
-            f.write(output_buffer.getvalue())
-            f.write("```\n")
-        print("✓ Test 2 output saved to test_2.md")
+        matches, percentage = qves.perform_matching(candidate_partial, verbose=verbose, n_workers=n_workers,
+                                                    tracer=tracer)
+        expected_partial = ((image_size**2 - image_size) / image_size**2) * 100
+        print(f"Result: {percentage:.0f}% match (Expected: ~{expected_partial:.0f}%)")
+        print()
     
     # Test 3: No match
-    if save_to_files:
-        output_buffer = io.StringIO()
-        sys.stdout = output_buffer
-    
-    print("=" * 70)
-    print("Test 3: Matching with completely different candidate")
-    print("=" * 70)
-    print()
-    candidate_diff = 1 - secret_image  # Flip all pixels
-    
-    if image_size <= 5:
-        print("Secret Image:")
-        print(secret_image)
+    with _MarkdownReport("test_3.md", "# Test 3: Matching with Completely Different Candidate\n\n"
+                         f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n\n",
+                         "Test 3", enabled=save_to_files):
+        print("=" * 70)
+        print("Test 3: Matching with completely different candidate")
+        print("=" * 70)
         print()
-        print("Candidate Image:")
-        print(candidate_diff)
-    else:
-        print(f"Images: {image_size}×{image_size} (all pixels flipped)")
-    print()
+        candidate_diff = 1 - secret_image  # Flip all pixels
     
-    qves = QuantumVESSystem()
-    qves.setup_secret_image(secret_image)
+        if image_size <= 5:
+            print("Secret Image:")
+            print(secret_image)
+            print()
+            print("Candidate Image:")
+            print(candidate_diff)
+        else:
+            print(f"Images: {image_size}×{image_size} (all pixels flipped)")
+        print()
     
-    matches, percentage = qves.perform_matching(candidate_diff, verbose=verbose)
-    print(f"Result: {percentage:.0f}% match (Expected: 0%)")
-    print()
+        qves = QuantumVESSystem(engine=engine, seed=seed)
+        qves.setup_secret_image(secret_image)
     
-    if save_to_files:
-        sys.stdout = original_stdout
-        with open("test_3.md", "w") as f:
-            f.write("# Test 3: Matching with Completely Different Candidate\n\n")
-            f.write(f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n\n")
-            f.write("```\n")
-            f.write(output_buffer.getvalue())
-            f.write("```\n")
-        print("✓ Test 3 output saved to test_3.md")
+        matches, percentage = qves.perform_matching(candidate_diff, verbose=verbose, n_workers=n_workers,
+                                                    tracer=tracer)
+        print(f"Result: {percentage:.0f}% match (Expected: 0%)")
+        print()
 
 
-def demonstrate_byzantine_resilience(verbose: bool = False, save_to_files: bool = False, image_size: int = 3):
+def demonstrate_byzantine_resilience(verbose: bool = False, save_to_files: bool = False, image_size: int = 3,
+                                     seed: int = None, n_workers: int = 1, tracer: Tracer = None):
     """
     Demonstration of Byzantine-resilient QVES
     
@@ -720,78 +2931,67 @@ def demonstrate_byzantine_resilience(verbose: bool = False, save_to_files: bool
         verbose: If True, show detailed pixel-by-pixel processing
         save_to_files: If True, save output to markdown file
         image_size: Size of the square secret image (default: 3 for 3x3)
+        seed: Root seed for reproducible keys and measurements
+        n_workers: C worker processes used by perform_byzantine_resilient_matching
+        tracer: Receives the per-pixel protocol events
     """
-    import io
-    import sys
-    
-    if save_to_files:
-        output_buffer = io.StringIO()
-        original_stdout = sys.stdout
-        sys.stdout = output_buffer
-    
-    print("=" * 70)
-    print("Test 4: Byzantine-Resilient Quantum VES (5 C participants, 2 Byzantine)")
-    print("=" * 70)
-    print()
-    
-    # Create secret image
-    secret_image = generate_test_image(image_size)
+    with _MarkdownReport("test_4_byzantine_5C.md", "# Test 4: Byzantine-Resilient Quantum VES\n\n"
+                         "**Configuration:** 5 C participants, 2 Byzantine\n"
+                         f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n\n",
+                         "Test 4", enabled=save_to_files):
+        print("=" * 70)
+        print("Test 4: Byzantine-Resilient Quantum VES (5 C participants, 2 Byzantine)")
+        print("=" * 70)
+        print()
     
-    print(f"Image size: {image_size}×{image_size} ({image_size**2} pixels)")
-    print()
+        # Create secret image
+        secret_image = generate_test_image(image_size)
     
-    if image_size <= 5:
-        print("Secret Image:")
-        print(secret_image)
-    else:
-        print(f"Secret Image: {image_size}×{image_size}")
-    print()
+        print(f"Image size: {image_size}×{image_size} ({image_size**2} pixels)")
+        print()
     
-    # Initialize with 5 C participants
-    qves_byz = ByzantineResilientQVES(n_c_participants=5)
-    qves_byz.setup_secret_image(secret_image)
+        if image_size <= 5:
+            print("Secret Image:")
+            print(secret_image)
+        else:
+            print(f"Secret Image: {image_size}×{image_size}")
+        print()
     
-    # Test with Byzantine participants
-    candidate = secret_image.copy()
-    if image_size <= 5:
-        print("Candidate Image (identical to secret):")
-        print(candidate)
-    else:
-        print(f"Candidate Image: {image_size}×{image_size} (identical to secret)")
-    print()
+        # Initialize with 5 C participants
+        qves_byz = ByzantineResilientQVES(n_c_participants=5, seed=seed)
+        qves_byz.setup_secret_image(secret_image)
     
-    # Scenario: 2 out of 5 C participants are Byzantine
-    byzantine_indices = [1, 3]  # Participants 1 and 3 are malicious
+        # Test with Byzantine participants
+        candidate = secret_image.copy()
+        if image_size <= 5:
+            print("Candidate Image (identical to secret):")
+            print(candidate)
+        else:
+            print(f"Candidate Image: {image_size}×{image_size} (identical to secret)")
+        print()
     
-    matches, percentage = qves_byz.perform_byzantine_resilient_matching(
-        candidate, byzantine_indices=byzantine_indices, verbose=verbose
-    )
+        # Scenario: 2 out of 5 C participants are Byzantine
+        byzantine_indices = [1, 3]  # Participants 1 and 3 are malicious
     
-    print(f"Final Result: {percentage:.0f}% match")
-    print(f"Byzantine tolerance: {len(byzantine_indices)}/{qves_byz.n_c} faulty nodes")
-    print()
+        matches, percentage = qves_byz.perform_byzantine_resilient_matching(
+            candidate, byzantine_indices=byzantine_indices, verbose=verbose, n_workers=n_workers, tracer=tracer
+        )
     
-    # Demonstrate tolerance threshold
-    print("Byzantine Tolerance Analysis:")
-    print(f"- Total C participants: {qves_byz.n_c}")
-    print(f"- Tolerated Byzantine: ⌊({qves_byz.n_c}-1)/2⌋ = {(qves_byz.n_c-1)//2}")
-    print(f"- Current Byzantine: {len(byzantine_indices)}")
-    print(f"- System Status: {'✓ Resilient' if len(byzantine_indices) <= (qves_byz.n_c-1)//2 else '✗ Compromised'}")
-    print()
+        print(f"Final Result: {percentage:.0f}% match")
+        print(f"Byzantine tolerance: {len(byzantine_indices)}/{qves_byz.n_c} faulty nodes")
+        print()
     
-    if save_to_files:
-        sys.stdout = original_stdout
-        with open("test_4_byzantine_5C.md", "w") as f:
-            f.write("# Test 4: Byzantine-Resilient Quantum VES\n\n")
-            f.write("**Configuration:** 5 C participants, 2 Byzantine\n")
-            f.write(f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n\n")
-            f.write("```\n")
-            f.write(output_buffer.getvalue())
-            f.write("```\n")
-        print("✓ Test 4 output saved to test_4_byzantine_5C.md")
+        # Demonstrate tolerance threshold
+        print("Byzantine Tolerance Analysis:")
+        print(f"- Total C participants: {qves_byz.n_c}")
+        print(f"- Tolerated Byzantine: ⌊({qves_byz.n_c}-1)/2⌋ = {(qves_byz.n_c-1)//2}")
+        print(f"- Current Byzantine: {len(byzantine_indices)}")
+        print(f"- System Status: {'✓ Resilient' if len(byzantine_indices) <= (qves_byz.n_c-1)//2 else '✗ Compromised'}")
+        print()
 
 
-def demonstrate_distributed_qves(verbose: bool = False, save_to_files: bool = False, image_size: int = 3):
+def demonstrate_distributed_qves(verbose: bool = False, save_to_files: bool = False, image_size: int = 3,
+                                 seed: int = None, n_workers: int = 1, tracer: Tracer = None):
     """
     Demonstration of Distributed Quantum VES
     Each C participant gets at most 1/3 of qubits for enhanced security
@@ -800,85 +3000,74 @@ def demonstrate_distributed_qves(verbose: bool = False, save_to_files: bool = Fa
         verbose: If True, show detailed pixel-by-pixel processing
         save_to_files: If True, save output to markdown file
         image_size: Size of the square secret image (default: 3 for 3x3)
+        seed: Root seed for reproducible keys and measurements
+        n_workers: C worker processes used by perform_byzantine_resilient_matching
+        tracer: Receives the per-pixel protocol events
     """
-    import io
-    import sys
-    
-    if save_to_files:
-        output_buffer = io.StringIO()
-        original_stdout = sys.stdout
-        sys.stdout = output_buffer
-    
-    print("=" * 70)
-    print("Test 5: Distributed Quantum VES (Enhanced Security)")
-    print("=" * 70)
-    print()
-    
-    # Create secret image
-    secret_image = generate_test_image(image_size)
+    with _MarkdownReport("test_5_distributed_qves.md",
+                         "# Test 5: Distributed Quantum VES (Enhanced Security)\n\n"
+                         "**Configuration:** 5 C participants, 1 Byzantine, Distributed Mode\n"
+                         f"**Image size:** {image_size}×{image_size} ({image_size**2} pixels)\n"
+                         "**Security:** Each C gets max 1/3 of qubits\n\n",
+                         "Test 5", enabled=save_to_files):
+        print("=" * 70)
+        print("Test 5: Distributed Quantum VES (Enhanced Security)")
+        print("=" * 70)
+        print()
     
-    print(f"Image size: {image_size}×{image_size} ({image_size**2} pixels)")
-    print()
+        # Create secret image
+        secret_image = generate_test_image(image_size)
     
-    if image_size <= 5:
-        print("Secret Image:")
-        print(secret_image)
-    else:
-        print(f"Secret Image: {image_size}×{image_size}")
-    print()
+        print(f"Image size: {image_size}×{image_size} ({image_size**2} pixels)")
+        print()
     
-    # Initialize with 5 C participants in DISTRIBUTED mode
-    qves_dist = ByzantineResilientQVES(n_c_participants=5, distributed=True)
-    qves_dist.setup_secret_image(secret_image)
+        if image_size <= 5:
+            print("Secret Image:")
+            print(secret_image)
+        else:
+            print(f"Secret Image: {image_size}×{image_size}")
+        print()
     
-    # Test with Byzantine participants
-    candidate = secret_image.copy()
-    if image_size <= 5:
-        print("Candidate Image (identical to secret):")
-        print(candidate)
-    else:
-        print(f"Candidate Image: {image_size}×{image_size} (identical to secret)")
-    print()
+        # Initialize with 5 C participants in DISTRIBUTED mode
+        qves_dist = ByzantineResilientQVES(n_c_participants=5, distributed=True, seed=seed)
+        qves_dist.setup_secret_image(secret_image)
     
-    # Scenario: 1 out of 5 C participants is Byzantine
-    byzantine_indices = [2]  # Participant 2 is malicious
+        # Test with Byzantine participants
+        candidate = secret_image.copy()
+        if image_size <= 5:
+            print("Candidate Image (identical to secret):")
+            print(candidate)
+        else:
+            print(f"Candidate Image: {image_size}×{image_size} (identical to secret)")
+        print()
     
-    print("Security Enhancement:")
-    print(f"  • Each C participant receives ≤ 33% of qubits")
-    print(f"  • Compromised C cannot learn full secret")
-    print(f"  • Byzantine participant {byzantine_indices[0]} has limited access")
-    print()
+        # Scenario: 1 out of 5 C participants is Byzantine
+        byzantine_indices = [2]  # Participant 2 is malicious
     
-    matches, percentage = qves_dist.perform_byzantine_resilient_matching(
-        candidate, byzantine_indices=byzantine_indices, verbose=verbose
-    )
+        print("Security Enhancement:")
+        print(f"  • Each C participant receives ≤ 33% of qubits")
+        print(f"  • Compromised C cannot learn full secret")
+        print(f"  • Byzantine participant {byzantine_indices[0]} has limited access")
+        print()
     
-    print(f"Final Result: {percentage:.0f}% match")
-    print(f"Byzantine tolerance: {len(byzantine_indices)}/{qves_dist.n_c} faulty nodes")
-    print()
+        matches, percentage = qves_dist.perform_byzantine_resilient_matching(
+            candidate, byzantine_indices=byzantine_indices, verbose=verbose, n_workers=n_workers, tracer=tracer
+        )
     
-    # Security analysis
-    total_qubits = len(secret_image.flatten())
-    max_per_c = total_qubits // 3
-    print("Security Analysis (Distributed Mode):")
-    print(f"- Total qubits: {total_qubits}")
-    print(f"- Target max per C: {max_per_c} (≤ 33%)")
-    print(f"- Each qubit: Processed by 3 different C participants")
-    print(f"- Byzantine C{byzantine_indices[0]}: Limited to ~33% of information")
-    print(f"- System Status: ✓ Enhanced Security")
-    print()
+        print(f"Final Result: {percentage:.0f}% match")
+        print(f"Byzantine tolerance: {len(byzantine_indices)}/{qves_dist.n_c} faulty nodes")
+        print()
     
-    if save_to_files:
-        sys.stdout = original_stdout
-        with open("test_5_distributed_qves.md", "w") as f:
-            f.write("# Test 5: Distributed Quantum VES (Enhanced Security)\n\n")
-            f.write("**Configuration:** 5 C participants, 1 Byzantine, Distributed Mode\n")
-            f.write(f"**Image size:** {image_size}×{image_size} ({total_qubits} pixels)\n")
-            f.write("**Security:** Each C gets max 1/3 of qubits\n\n")
-            f.write("```\n")
-            f.write(output_buffer.getvalue())
-            f.write("```\n")
-        print("✓ Test 5 output saved to test_5_distributed_qves.md")
+        # Security analysis
+        total_qubits = len(secret_image.flatten())
+        max_per_c = total_qubits // 3
+        print("Security Analysis (Distributed Mode):")
+        print(f"- Total qubits: {total_qubits}")
+        print(f"- Target max per C: {max_per_c} (≤ 33%)")
+        print(f"- Each qubit: Processed by 3 different C participants")
+        print(f"- Byzantine C{byzantine_indices[0]}: Limited to ~33% of information")
+        print(f"- System Status: ✓ Enhanced Security")
+        print()
 
 
 def visualize_protocol():
@@ -938,8 +3127,7 @@ def visualize_protocol():
 
 
 def main():
-    """Run all demonstrations"""
-    import sys
+    """Run all demonstrations, or the headless benchmark (bench subcommand)"""
     import argparse
     
     # Parse command line arguments
@@ -950,18 +3138,71 @@ def main():
                        help='Save each test to separate markdown files')
     parser.add_argument('--size', type=int, default=3,
                        help='Size of square secret image (default: 3 for 3×3)')
+    parser.add_argument('--engine', choices=ENGINES, default=None,
+                       help='Matching engine for tests 1-3 (default: aer; bench: batched)')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Root seed for reproducible keys and measurements')
+    parser.add_argument('--trace', metavar='PATH', default=None,
+                       help='Write per-pixel protocol events of all tests as JSON lines')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Worker processes for sharded matching (tests 1-3) and C participants (tests 4-5) (default: 1)')
+    
+    subparsers = parser.add_subparsers(dest='command')
+    bench = subparsers.add_parser('bench', help='Sweep configurations without prompts and emit JSON or CSV')
+    bench.add_argument('--sizes', type=int, nargs='+', default=[4, 8],
+                       help='Image sizes to sweep (default: 4 8)')
+    bench.add_argument('--participants', type=int, nargs='+', default=[5],
+                       help='C participant counts for the Byzantine modes (default: 5)')
+    bench.add_argument('--byzantine', type=int, nargs='+', default=[0, 1, 2],
+                       help='Byzantine participant counts (default: 0 1 2)')
+    bench.add_argument('--modes', choices=BENCH_MODES, nargs='+', default=list(BENCH_MODES),
+                       help='Scenarios to run (default: all)')
+    # Options shared with the top level use SUPPRESS, so a value given before
+    # 'bench' is not overwritten by the subcommand's default
+    bench.add_argument('--engine', choices=ENGINES, default=argparse.SUPPRESS,
+                       help='Engine of the standard mode (default: batched)')
+    bench.add_argument('--byzantine-engine', choices=('aer', 'batched'), default='batched',
+                       help='Engine of the Byzantine modes (default: batched)')
+    bench.add_argument('--repeats', type=int, default=1,
+                       help='Timed runs per configuration (default: 1)')
+    bench.add_argument('--seed', type=int, default=argparse.SUPPRESS,
+                       help='Root seed for reproducible keys and measurements')
+    bench.add_argument('--workers', type=int, default=argparse.SUPPRESS,
+                       help='Worker processes passed to the matching calls (default: 1)')
+    bench.add_argument('--keys', type=int, metavar='N', default=None,
+                       help='Time key generation of each key source for N keys instead of matching')
+    bench.add_argument('--no-warmup', action='store_true',
+                       help='Skip the untimed warm-up run of each configuration')
+    bench.add_argument('--format', choices=('json', 'csv'), default='json',
+                       help='Output format (default: json)')
+    bench.add_argument('--output', '-o', default=None,
+                       help='Output file (default: stdout)')
     
     args = parser.parse_args()
     
+    if args.command == 'bench':
+        if min(args.sizes) < 2 or min(args.participants) < 1 or min(args.byzantine) < 0:
+            parser.error("bench needs sizes ≥ 2, participants ≥ 1 and Byzantine counts ≥ 0")
+        if args.repeats < 1 or args.workers < 1:
+            parser.error("bench needs --repeats and --workers of at least 1")
+        if args.keys is not None and args.keys < 1:
+            parser.error("bench needs --keys of at least 1")
+        _run_bench(args)
+        return
+    
     verbose = args.verbose
     save_files = args.save
     image_size = args.size
+    engine = args.engine or 'aer'
     
     # Validate size
     if image_size < 2:
         print("Error: Image size must be at least 2×2")
         sys.exit(1)
-    if image_size > 20:
+    if args.workers < 1:
+        print("Error: --workers must be at least 1")
+        sys.exit(1)
+    if image_size > 20 and engine == 'aer':
         print("Warning: Large images (>20×20) may take significant time to process")
         response = input("Continue? (y/n): ")
         if response.lower() != 'y':
@@ -987,9 +3228,15 @@ def main():
     if not save_files:
         visualize_protocol()
     
-    demonstrate_rbe_ves(verbose=verbose, save_to_files=save_files, image_size=image_size)
-    demonstrate_byzantine_resilience(verbose=verbose, save_to_files=save_files, image_size=image_size)
-    demonstrate_distributed_qves(verbose=verbose, save_to_files=save_files, image_size=image_size)
+    tracer = Tracer([JsonlSink(args.trace)]) if args.trace else None
+    demonstrate_rbe_ves(verbose=verbose, save_to_files=save_files, image_size=image_size, engine=engine,
+                        seed=args.seed, n_workers=args.workers, tracer=tracer)
+    demonstrate_byzantine_resilience(verbose=verbose, save_to_files=save_files, image_size=image_size,
+                                     seed=args.seed, n_workers=args.workers, tracer=tracer)
+    demonstrate_distributed_qves(verbose=verbose, save_to_files=save_files, image_size=image_size,
+                                 seed=args.seed, n_workers=args.workers, tracer=tracer)
+    if tracer is not None:
+        tracer.close()
     
     print()
     print("=" * 70)
@@ -1009,6 +3256,8 @@ def main():
         print("  --verbose, -v      : Show detailed pixel-by-pixel output")
         print("  --save, -s         : Save each test to separate markdown files")
         print("  --size SIZE        : Set image size (default: 3 for 3×3)")
+        print("  --engine ENGINE    : Matching engine for tests 1-3 (default: aer)")
+        print("  --seed SEED        : Root seed for reproducible runs")
         print("\nTests performed:")
         print("  1-3: Basic matching (identical, partial, different)")
         print("  4:   Byzantine resilience (replicated qubits)")
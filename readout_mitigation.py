@@ -0,0 +1,124 @@
+"""
+Readout Error Mitigation
+Cached calibration matrices and vectorized correction of match statistics
+
+With noise, B's single-shot outcome is no longer the exact T ⊕ C bit, so
+observed match percentages are biased. A 2×2 calibration (confusion)
+matrix M[read, ideal] = P(B reads `read` | noiseless outcome `ideal`)
+describes that bias; an observed match rate m (fraction of 0 outcomes)
+is then corrected without extra shots by inverting it:
+
+    f = (m - M[0, 1]) / (M[0, 0] - M[0, 1])
+
+Calibrating is comparatively expensive, so matrices are cached per noise
+model and simulator configuration:
+- Keys combine NoiseModel.signature() with a caller-supplied config tuple
+- invalidate() drops entries for one noise model, or everything
+- Hit and miss counters are reported by stats()
+"""
+
+import threading
+from typing import Callable, Dict, Hashable
+
+import numpy as np
+
+from noise_channels import NoiseModel
+
+
+class ReadoutMitigator:
+    """
+    Cache of readout calibration matrices with vectorized correction
+    """
+
+    def __init__(self):
+        """Initialize an empty calibration cache"""
+        self._matrices = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def calibration_matrix(self, noise_model: NoiseModel, config: Hashable,
+                           calibrate: Callable[[NoiseModel], np.ndarray]) -> np.ndarray:
+        """
+        Get the calibration matrix of a noise model, calibrating on a miss
+
+        Args:
+            noise_model: Noise model the matrix describes
+            config: Hashable description of the simulator configuration
+            calibrate: Function computing the 2×2 matrix M[read, ideal]
+
+        Returns:
+            Calibration matrix (shared, read-only)
+        """
+        key = (noise_model.signature(), config)
+        with self._lock:
+            if key in self._matrices:
+                self.hits += 1
+                return self._matrices[key]
+            self.misses += 1
+
+        matrix = np.asarray(calibrate(noise_model), dtype=float)
+        if matrix.shape != (2, 2) or not np.allclose(matrix.sum(axis=0), 1.0):
+            raise ValueError("Calibration matrix must be 2×2 with columns summing to 1")
+        matrix.setflags(write=False)
+
+        with self._lock:
+            self._matrices[key] = matrix
+        return matrix
+
+    def invalidate(self, noise_model: NoiseModel = None):
+        """
+        Drop cached matrices
+
+        Args:
+            noise_model: Only drop matrices of this noise model (default: all)
+        """
+        with self._lock:
+            if noise_model is None:
+                self._matrices.clear()
+                return
+            signature = noise_model.signature()
+            for key in [key for key in self._matrices if key[0] == signature]:
+                del self._matrices[key]
+
+    @staticmethod
+    def correct_match_rates(observed: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """
+        Correct observed match rates (fractions of 0 outcomes)
+
+        Args:
+            observed: Observed rates, any shape (whole images, tiles, batches)
+            matrix: Calibration matrix M[read, ideal]
+
+        Returns:
+            Mitigated rates clipped to [0, 1], same shape as observed
+        """
+        separation = matrix[0, 0] - matrix[0, 1]
+        if abs(separation) < 1e-12:
+            raise ValueError("Calibration matrix is singular: outcomes carry no information")
+        corrected = (np.asarray(observed, dtype=float) - matrix[0, 1]) / separation
+        return np.clip(corrected, 0.0, 1.0)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Report cache counters
+
+        Returns:
+            Dictionary with hits, misses, size and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._matrices),
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_default_mitigator = ReadoutMitigator()
+
+
+def get_readout_mitigator() -> ReadoutMitigator:
+    """Get the process-wide readout mitigator"""
+    return _default_mitigator
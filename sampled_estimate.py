@@ -0,0 +1,165 @@
+"""
+Sampled Match Estimates
+Approximate match percentage from a random subset of pixels
+
+Dashboards only need the match percentage with error bars. Evaluating a
+simple random sample of n pixels gives a confidence interval of half-width
+ε once n ≈ z²/(4ε²), independent of the image size, so the cost drops
+from O(N) to O(1/ε²) simulations:
+- required_sample_size picks n from ε and the confidence level, with a
+  finite-population correction for small images
+- sample_pixels draws a simple random sample, or a proportionally
+  allocated sample per image tile (stratified), without replacement
+- estimate_match_rate turns the sampled outcomes into an estimate and a
+  Wilson score interval (which stays sensible at 0% and 100%)
+"""
+
+from statistics import NormalDist
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class MatchEstimate(NamedTuple):
+    """Estimated match percentage with a confidence interval"""
+    percentage: float
+    ci_low: float
+    ci_high: float
+    confidence: float
+    pixels_sampled: int
+    total_pixels: int
+
+
+class PixelSample(NamedTuple):
+    """Sampled flat pixel indices, grouped into strata"""
+    pixel_indices: np.ndarray
+    stratum: np.ndarray           # stratum of each sampled pixel
+    stratum_sizes: np.ndarray     # pixels per stratum in the image
+
+
+def z_score(confidence: float) -> float:
+    """Two-sided standard normal quantile for a confidence level"""
+    if not 0.0 < confidence < 1.0:
+        raise ValueError("confidence must be between 0 and 1")
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(p: float, n: float, confidence: float) -> Tuple[float, float]:
+    """Wilson score interval of a proportion p observed on (effective) n trials"""
+    z = z_score(confidence)
+    denom = 1.0 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denom
+    half = z * np.sqrt(p * (1.0 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return max(0.0, float(center - half)), min(1.0, float(center + half))
+
+
+def required_sample_size(epsilon: float, confidence: float, total_pixels: int) -> int:
+    """
+    Number of pixels needed for a half-width of epsilon at any match rate
+
+    Args:
+        epsilon: Target half-width of the interval, as a fraction (0.01 = ±1%)
+        confidence: Confidence level, e.g. 0.95
+        total_pixels: Image size N (finite-population correction)
+
+    Returns:
+        Sample size, at most total_pixels
+    """
+    if epsilon <= 0.0:
+        raise ValueError("epsilon must be positive")
+    n_infinite = z_score(confidence) ** 2 * 0.25 / epsilon ** 2
+    n = n_infinite / (1 + (n_infinite - 1) / total_pixels) if total_pixels else 0
+    return int(min(np.ceil(n), total_pixels))
+
+
+def sample_pixels(rng: np.random.Generator, image_shape: Tuple[int, int], sample_size: int,
+                  tile_shape: Optional[Tuple[int, int]] = None) -> PixelSample:
+    """
+    Draw pixels without replacement, optionally stratified by tile
+
+    With tiles, each tile gets a share of the sample proportional to its
+    size (largest remainders, at least one pixel per tile), so the sample
+    may slightly exceed sample_size when there are many small tiles.
+
+    Args:
+        rng: Generator to draw from
+        image_shape: (rows, cols) of the image
+        sample_size: Requested number of pixels
+        tile_shape: (rows, cols) of each stratum, or None for one stratum
+
+    Returns:
+        PixelSample
+    """
+    rows, cols = image_shape
+    total_pixels = rows * cols
+    if tile_shape is None:
+        indices = rng.choice(total_pixels, size=sample_size, replace=False)
+        return PixelSample(indices, np.zeros(len(indices), dtype=np.intp), np.array([total_pixels]))
+
+    tile_rows, tile_cols = tile_shape
+    if tile_rows < 1 or tile_cols < 1:
+        raise ValueError("Tile dimensions must be at least 1")
+    row_starts = np.arange(0, rows, tile_rows)
+    col_starts = np.arange(0, cols, tile_cols)
+    heights = np.minimum(tile_rows, rows - row_starts)
+    widths = np.minimum(tile_cols, cols - col_starts)
+    sizes = np.outer(heights, widths).ravel()
+
+    # Proportional allocation by largest remainders, 1 ≤ n_h ≤ N_h
+    quota = sample_size * sizes / total_pixels
+    allocation = np.floor(quota).astype(np.int64)
+    shortfall = sample_size - allocation.sum()
+    if shortfall > 0:
+        allocation[np.argsort(allocation - quota)[:shortfall]] += 1
+    allocation = np.clip(allocation, 1, sizes)
+
+    indices = []
+    for stratum, n_h in enumerate(allocation):
+        tile_row, tile_col = divmod(stratum, len(col_starts))
+        width = widths[tile_col]
+        local = rng.choice(sizes[stratum], size=n_h, replace=False)
+        local_row, local_col = np.divmod(local, width)
+        indices.append((row_starts[tile_row] + local_row) * cols + col_starts[tile_col] + local_col)
+    strata = np.repeat(np.arange(len(sizes)), allocation)
+    return PixelSample(np.concatenate(indices), strata, sizes)
+
+
+def estimate_match_rate(matches: np.ndarray, sample: PixelSample, confidence: float) -> MatchEstimate:
+    """
+    Estimate the match percentage from sampled outcomes
+
+    The point estimate weights each stratum by its share of the image; its
+    variance includes the finite-population correction (1 - n_h/N_h), so a
+    full census has a zero-width interval.
+
+    Args:
+        matches: Boolean outcome of each sampled pixel (sample order)
+        sample: The PixelSample the outcomes belong to
+        confidence: Confidence level of the interval
+
+    Returns:
+        MatchEstimate
+    """
+    matches = np.asarray(matches, dtype=bool)
+    total_pixels = int(sample.stratum_sizes.sum())
+    n_strata = len(sample.stratum_sizes)
+    n_h = np.bincount(sample.stratum, minlength=n_strata)
+    hits_h = np.bincount(sample.stratum, weights=matches, minlength=n_strata)
+    sampled = n_h > 0
+    weights = sample.stratum_sizes[sampled] / sample.stratum_sizes[sampled].sum()
+    p_h = hits_h[sampled] / n_h[sampled]
+    fpc_h = 1.0 - n_h[sampled] / sample.stratum_sizes[sampled]
+
+    p = float(np.dot(weights, p_h))
+    variance = float(np.sum(weights ** 2 * fpc_h * p_h * (1.0 - p_h) / n_h[sampled]))
+
+    n = len(matches)
+    fpc = 1.0 - n / total_pixels
+    if fpc <= 0.0:
+        low = high = p
+    else:
+        # Wilson score interval on the effective sample size of the design
+        n_eff = p * (1.0 - p) / variance if variance > 0.0 else n / fpc
+        low, high = wilson_interval(p, n_eff, confidence)
+
+    return MatchEstimate(p * 100, float(low) * 100, float(high) * 100, confidence, n, total_pixels)
@@ -0,0 +1,131 @@
+"""
+Sequential Threshold Test
+Wald's sequential probability ratio test (SPRT) for match-threshold decisions
+
+Many matches only need a yes/no answer ("at least 95% of pixels match").
+Pixel outcomes are fed in random order and the test stops as soon as the
+evidence settles the question with the requested error rates:
+- H1: match rate is at least the threshold (accept the candidate)
+- H0: match rate is at most threshold - indifference (reject it)
+- alpha = P(accept | H0), beta = P(reject | H1)
+
+Candidates far below the threshold are rejected after a handful of
+mismatches; if the pixels run out first, the decision is made exactly from
+the full count. Outcomes arrive in chunks, so the pixels actually simulated
+(whole chunks) can exceed the pixels the decision needed; both are reported.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+class ThresholdDecision(NamedTuple):
+    """Outcome of a threshold-matching run"""
+    accepted: bool
+    pixels_evaluated: int
+    pixels_matched: int
+    total_pixels: int
+    early_stop: bool
+    pixels_simulated: int   # all pixels fed to the test, incl. the rest of the final chunk
+
+    @property
+    def observed_match_rate(self) -> float:
+        """Fraction of evaluated pixels that matched"""
+        return self.pixels_matched / self.pixels_evaluated if self.pixels_evaluated else 0.0
+
+
+class SequentialThresholdTest:
+    """
+    SPRT on Bernoulli match outcomes, updated a chunk at a time
+    """
+
+    # Keeps log-likelihood ratios finite for thresholds of 0 or 1
+    EPSILON = 1e-9
+
+    def __init__(self, threshold: float = 0.95, alpha: float = 0.01, beta: float = 0.01,
+                 indifference: float = 0.02):
+        """
+        Initialize the test
+
+        Args:
+            threshold: Required match rate (0..1) to accept
+            alpha: Probability of accepting a candidate below the
+                   indifference region (false match)
+            beta: Probability of rejecting a candidate at the threshold
+                  (false non-match)
+            indifference: Width of the region below the threshold in which
+                          either decision is acceptable
+        """
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError("threshold must be between 0 and 1")
+        if not (0.0 < alpha < 1.0 and 0.0 < beta < 1.0):
+            raise ValueError("alpha and beta must be between 0 and 1")
+        if indifference <= 0.0:
+            raise ValueError("indifference must be positive")
+
+        self.threshold = threshold
+        self.alpha = alpha
+        self.beta = beta
+        p1 = min(max(threshold, self.EPSILON), 1.0 - self.EPSILON)
+        p0 = min(max(threshold - indifference, self.EPSILON / 2), p1 - self.EPSILON / 2)
+        self.match_llr = np.log(p1 / p0)
+        self.mismatch_llr = np.log((1.0 - p1) / (1.0 - p0))
+        self.accept_bound = np.log((1.0 - beta) / alpha)
+        self.reject_bound = np.log(beta / (1.0 - alpha))
+
+        self.llr = 0.0
+        self.n_observed = 0
+        self.n_matched = 0
+        self.n_fed = 0
+        self.decision = None
+
+    def update(self, matches: np.ndarray) -> Optional[bool]:
+        """
+        Feed a chunk of match outcomes in evaluation order
+
+        Outcomes after the point where the test settles are ignored, so
+        n_observed and n_matched reflect exactly the pixels needed for the
+        decision; n_fed counts every outcome passed in.
+
+        Args:
+            matches: Boolean match outcomes
+
+        Returns:
+            True (accept) or False (reject) once settled, otherwise None
+        """
+        matches = np.asarray(matches, dtype=bool)
+        self.n_fed += int(matches.size)
+        if self.decision is not None:
+            return self.decision
+        if not matches.size:
+            return None
+
+        path = self.llr + np.cumsum(np.where(matches, self.match_llr, self.mismatch_llr))
+        crossed = np.flatnonzero((path >= self.accept_bound) | (path <= self.reject_bound))
+        used = crossed[0] + 1 if crossed.size else matches.size
+
+        self.llr = path[used - 1]
+        self.n_observed += int(used)
+        self.n_matched += int(np.count_nonzero(matches[:used]))
+        if crossed.size:
+            self.decision = bool(self.llr >= self.accept_bound)
+        return self.decision
+
+    def finalize(self, total_pixels: int) -> ThresholdDecision:
+        """
+        Produce the decision, deciding exactly if every pixel was observed
+
+        Args:
+            total_pixels: Number of pixels in the image
+
+        Returns:
+            ThresholdDecision
+        """
+        early_stop = self.decision is not None
+        if early_stop:
+            accepted = self.decision
+        else:
+            accepted = self.n_matched >= self.threshold * self.n_observed
+        return ThresholdDecision(accepted, self.n_observed, self.n_matched, total_pixels, early_stop,
+                                 self.n_fed)
@@ -0,0 +1,97 @@
+"""Headless bench subcommand"""
+
+import argparse
+import csv
+import json
+import sys
+
+import pytest
+
+import rbe_quantum_ves
+from rbe_quantum_ves import BENCH_MODES, benchmark_matching
+
+ROW_KEYS = ['mode', 'size', 'pixels', 'participants', 'byzantine', 'engine', 'workers', 'repeat',
+            'wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'worker_peak_rss_mb', 'simulator_jobs',
+            'simulated_circuits', 'match_percentage']
+
+
+def test_rows_cover_the_grid():
+    rows = benchmark_matching(sizes=[4], participants=[3], byzantine_counts=[0, 1, 5], repeats=2, seed=1)
+    assert [(row['mode'], row['byzantine'], row['repeat']) for row in rows] == [
+        ('standard', 0, 0), ('standard', 0, 1),
+        ('replicated', 0, 0), ('replicated', 0, 1), ('replicated', 1, 0), ('replicated', 1, 1),
+        ('distributed', 0, 0), ('distributed', 0, 1), ('distributed', 1, 0), ('distributed', 1, 1)]
+    for row in rows:
+        assert list(row) == ROW_KEYS
+        assert row['pixels'] == 16 and row['match_percentage'] == 75.0
+        assert row['worker_peak_rss_mb'] is None
+        assert row['simulator_jobs'] == 1 and row['wall_seconds'] > 0
+    standard, replicated = rows[0], rows[2]
+    assert standard['simulated_circuits'] == 16
+    assert replicated['simulated_circuits'] == 16 * 3
+
+
+def test_worker_runs_report_worker_counts():
+    rows = benchmark_matching(sizes=[4], modes=['standard'], n_workers=2, seed=1, warmup=False)
+    row, = rows
+    assert row['workers'] == 2
+    assert row['simulated_circuits'] == 16 and row['simulator_jobs'] >= 2
+    assert row['worker_peak_rss_mb'] > 0
+
+
+def test_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        benchmark_matching(modes=['bogus'])
+
+
+@pytest.mark.parametrize('argv, seed, workers, engine', [
+    (['--seed', '7', '--workers', '3', '--engine', 'analytic', 'bench'], 7, 3, 'analytic'),
+    (['bench', '--seed', '5', '--workers', '2'], 5, 2, None),
+    (['bench'], None, 1, None),
+])
+def test_top_level_options_reach_bench(monkeypatch, argv, seed, workers, engine):
+    seen = {}
+    monkeypatch.setattr(rbe_quantum_ves, '_run_bench', lambda args: seen.update(vars(args)))
+    monkeypatch.setattr(sys, 'argv', ['rbe_quantum_ves.py'] + argv)
+    rbe_quantum_ves.main()
+    assert (seen['seed'], seen['workers'], seen['engine']) == (seed, workers, engine)
+
+
+@pytest.mark.parametrize('fmt', ['json', 'csv'])
+def test_output_formats(tmp_path, fmt):
+    path = tmp_path / f'bench.{fmt}'
+    args = argparse.Namespace(sizes=[2], participants=[3], byzantine=[1], modes=list(BENCH_MODES),
+                              engine=None, byzantine_engine='batched', repeats=1, seed=0, workers=1,
+                              keys=None, no_warmup=True, format=fmt, output=str(path))
+    rbe_quantum_ves._run_bench(args)
+    with open(path, newline='') as f:
+        rows = json.load(f) if fmt == 'json' else list(csv.DictReader(f))
+    assert [row['mode'] for row in rows] == list(BENCH_MODES)
+    assert list(rows[0]) == ROW_KEYS
+    assert rows[0]['engine'] == 'batched'
+
+
+def test_key_generation_rows(tmp_path, monkeypatch):
+    path = tmp_path / 'keys.json'
+    monkeypatch.setattr(sys, 'argv', ['rbe_quantum_ves.py', 'bench', '--keys', '2000', '-o', str(path)])
+    rbe_quantum_ves.main()
+    with open(path) as f:
+        rows = json.load(f)
+    assert [row['source'] for row in rows] == ['generate_key (per pixel)', 'secrets (per pixel)',
+                                               'generate_keys (vectorized)', 'generate_secure_keys (bulk CSPRNG)']
+    assert all(row['keys'] == 2000 and row['keys_per_second'] > 0 for row in rows)
+
+
+def test_markdown_report_restores_stdout_on_error(tmp_path):
+    path = tmp_path / 'report.md'
+    stdout = sys.stdout
+    with pytest.raises(RuntimeError):
+        with rbe_quantum_ves._MarkdownReport(str(path), '# Report\n\n', 'Report'):
+            print('partial output')
+            raise RuntimeError('demo failed')
+    assert sys.stdout is stdout
+    assert path.read_text() == '# Report\n\n```\npartial output\n```\n'
+
+    with rbe_quantum_ves._MarkdownReport(str(tmp_path / 'skipped.md'), '', 'Skipped', enabled=False):
+        print('to stdout')
+    assert not (tmp_path / 'skipped.md').exists()
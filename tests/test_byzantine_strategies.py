@@ -0,0 +1,99 @@
+"""Byzantine strategies and the Monte Carlo harness"""
+
+import numpy as np
+import pytest
+
+from byzantine_strategies import (STRATEGIES, Coalition, FlipAll, RandomFlip, SilentDrop, TargetedPixels,
+                                  estimate_wrong_majority)
+from qubit_assignment import build_assignment
+from rbe_quantum_ves import ByzantineResilientQVES
+
+N_PIXELS, N_C = 60, 5
+ASSIGNMENTS = build_assignment(N_PIXELS, N_C, 3).pixels_to_cs
+BYZANTINE = np.array([1, 3])
+
+
+def corrupt(strategy, seed=0):
+    return strategy.corrupt(BYZANTINE, ASSIGNMENTS, N_C, np.random.default_rng(seed))
+
+
+def honest_columns_untouched(corruption):
+    honest = np.setdiff1d(np.arange(N_C), BYZANTINE)
+    return not corruption.flips[:, honest].any() and not corruption.drops[:, honest].any()
+
+
+def test_flip_all():
+    corruption = corrupt(FlipAll())
+    assert corruption.flips.shape == (N_PIXELS, N_C)
+    assert corruption.flips[:, BYZANTINE].all() and not corruption.drops.any()
+    assert honest_columns_untouched(corruption)
+
+
+def test_random_flip_rate():
+    corruption = corrupt(RandomFlip(0.25))
+    assert honest_columns_untouched(corruption)
+    assert 0.1 < corruption.flips[:, BYZANTINE].mean() < 0.4
+    with pytest.raises(ValueError):
+        RandomFlip(1.5)
+
+
+def test_targeted_pixels():
+    corruption = corrupt(TargetedPixels([2, 7, 500]))
+    np.testing.assert_array_equal(np.flatnonzero(corruption.flips[:, 1]), [2, 7])
+    assert honest_columns_untouched(corruption)
+    shared = corrupt(TargetedPixels(fraction=0.5)).flips
+    assert shared[:, 1].sum() == 30
+    np.testing.assert_array_equal(shared[:, 1], shared[:, 3])
+
+
+def test_coalition_attacks_only_where_it_can_swing_the_vote():
+    flips = corrupt(Coalition()).flips
+    held = np.isin(ASSIGNMENTS, BYZANTINE).sum(axis=1)
+    np.testing.assert_array_equal(flips[:, BYZANTINE].any(axis=1), 2 * held >= 3)
+
+
+def test_silent_drop():
+    corruption = corrupt(SilentDrop())
+    assert corruption.drops[:, BYZANTINE].all() and not corruption.flips.any()
+    assert honest_columns_untouched(corruption)
+    assert 0.0 < corrupt(SilentDrop(0.5)).drops[:, BYZANTINE].mean() < 1.0
+
+
+def test_no_byzantine_participants():
+    corruption = FlipAll().corrupt([], ASSIGNMENTS, N_C, np.random.default_rng(0))
+    assert not corruption.flips.any() and not corruption.drops.any()
+    assert set(STRATEGIES) == {'flip_all', 'random_flip', 'targeted', 'coalition', 'silent_drop'}
+
+
+def test_majority_survives_minority_of_byzantine():
+    estimate = estimate_wrong_majority(5, 2, copies=5, n_trials=40, n_pixels=32, seed=0)
+    assert estimate.wrong_majority_rate == 0.0 and estimate.failed_trial_rate == 0.0
+    # No wrong pixel observed, but the interval still admits a nonzero rate
+    assert estimate.ci_low == pytest.approx(0.0, abs=1e-12) and 0.0 < estimate.ci_high < 0.1
+
+
+def test_coalition_estimate_is_reproducible_with_per_trial_interval():
+    kwargs = dict(copies=3, strategy=Coalition(), n_trials=200, n_pixels=64, seed=1)
+    estimate = estimate_wrong_majority(5, 2, **kwargs)
+    assert estimate == estimate_wrong_majority(5, 2, **kwargs)
+    assert 0.2 < estimate.wrong_majority_rate < 0.4
+    assert estimate.ci_low < estimate.wrong_majority_rate < estimate.ci_high
+    # Trials, not pixels, are the sampling unit: at least as wide as the
+    # naive interval on trials × pixels
+    p, n = estimate.wrong_majority_rate, 200 * 64
+    assert estimate.ci_high - estimate.ci_low >= 2 * 1.96 * np.sqrt(p * (1 - p) / n) * 0.99
+
+
+def test_harness_validates_counts():
+    with pytest.raises(ValueError):
+        estimate_wrong_majority(5, 6)
+    with pytest.raises(ValueError):
+        estimate_wrong_majority(5, 1, copies=6)
+
+
+def test_byzantine_participants_observe_flipped_float_candidate():
+    system = ByzantineResilientQVES(N_C, seed=0)
+    candidate = np.array([[0.0, 1.0], [1.0, 0.0]])
+    system._observe_candidate(candidate, [1], system._pixel_assignments(4))
+    np.testing.assert_array_equal(system.c_participants[0]._candidate_bits(), [0, 1, 1, 0])
+    np.testing.assert_array_equal(system.c_participants[1]._candidate_bits(), [1, 0, 0, 1])
@@ -0,0 +1,37 @@
+"""Byzantine matching with C and B worker processes"""
+
+import numpy as np
+import pytest
+
+from rbe_quantum_ves import ByzantineResilientQVES
+
+
+@pytest.mark.parametrize('engine', ['batched', 'aer'])
+def test_worker_votes_match_in_process_votes(engine):
+    rng = np.random.default_rng(0)
+    secret = rng.integers(0, 2, (6, 6))
+    candidate = secret.copy()
+    candidate[2] ^= 1
+
+    results = []
+    for n_workers in (1, 2):
+        system = ByzantineResilientQVES(5, distributed=True, engine=engine, seed=4)
+        system.setup_secret_image(secret)
+        results.append((system.perform_byzantine_resilient_matching(candidate, [1], n_workers=n_workers),
+                        system))
+    (local, local_system), (workers, worker_system) = results
+    assert local == workers
+    np.testing.assert_array_equal(local_system.vote_matrix.votes, worker_system.vote_matrix.votes)
+    assert worker_system.participant_B.simulated_circuits == 36 * 3
+    assert sum(c.qubits for c in worker_system.c_throughput) == 36 * 3
+    assert worker_system.worker_peak_rss
+
+
+def test_dead_worker_fails_fast():
+    secret = np.random.default_rng(1).integers(0, 2, (4, 4))
+    system = ByzantineResilientQVES(3, engine='batched', seed=0)
+    system.setup_secret_image(secret)
+    system._observe_candidate(secret, [], system._pixel_assignments(16))
+    system.c_participants[1].candidate_image = None   # C worker raises on its first chunk
+    with pytest.raises(RuntimeError, match='Worker process failed'):
+        system._collect_votes_workers(2)
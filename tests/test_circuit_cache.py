@@ -0,0 +1,53 @@
+"""LRU cache of transpiled circuit skeletons"""
+
+import pytest
+from qiskit import QuantumCircuit
+from qiskit_aer import AerSimulator
+
+from circuit_cache import TranspileCache
+
+
+def _circuit(gate):
+    qc = QuantumCircuit(1, 1)
+    getattr(qc, gate)(0)
+    qc.measure(0, 0)
+    return qc
+
+
+def test_same_structure_is_transpiled_once():
+    cache = TranspileCache()
+    simulator = AerSimulator()
+    first = cache.transpile(_circuit('x'), simulator)
+    assert cache.transpile(_circuit('x'), simulator) is first
+    assert cache.transpile(_circuit('h'), simulator) is not first
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_get_or_transpile_builds_only_on_a_miss():
+    cache = TranspileCache()
+    simulator = AerSimulator()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return _circuit('x')
+
+    compiled = cache.get_or_transpile(('x',), build, simulator)
+    assert cache.get_or_transpile(('x',), build, simulator) is compiled
+    assert len(builds) == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TranspileCache(max_size=2)
+    simulator = AerSimulator()
+    for gate in ('x', 'h', 'x', 'z'):
+        cache.transpile(_circuit(gate), simulator)
+    stats = cache.stats()
+    assert stats['size'] == 2 and stats['evictions'] == 1
+    cache.transpile(_circuit('x'), simulator)
+    assert cache.stats()['hits'] == 2
+
+    cache.clear()
+    assert cache.stats()['size'] == 0
+    with pytest.raises(ValueError):
+        TranspileCache(max_size=0)
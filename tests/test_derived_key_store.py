@@ -0,0 +1,57 @@
+"""Seed-derived per-pixel keys"""
+
+import hashlib
+
+import numpy as np
+import pytest
+
+from rbe_quantum_ves import DerivedKeyStore
+
+SEED = bytes(range(32))
+
+
+def test_same_seed_gives_same_keys():
+    first = DerivedKeyStore(SEED, 3000)
+    second = DerivedKeyStore(SEED, 3000)
+    np.testing.assert_array_equal(first.thetas, second.thetas)
+    np.testing.assert_array_equal(first.phis, second.phis)
+    other = DerivedKeyStore(bytes(32), 3000)
+    assert not np.array_equal(first.thetas, other.thetas)
+
+
+def test_words_are_little_endian():
+    # Key 0 is the first 8 bytes of block 0, read as a little-endian integer
+    n = DerivedKeyStore.BLOCK_KEYS
+    data = hashlib.shake_256(DerivedKeyStore.DOMAIN + SEED + (0).to_bytes(8, 'little')).digest(8 * n + n // 8)
+    word = int.from_bytes(data[:8], 'little')
+    theta, phi = DerivedKeyStore(SEED, 1)[0]
+    assert theta == (word >> 11) * (2 * np.pi / 2**53)
+    assert phi == (np.pi / 2 if data[8 * n] & 0x80 else -np.pi / 2)
+
+
+def test_sparse_lookup_matches_full_derivation():
+    store = DerivedKeyStore(SEED, 5000)
+    thetas, phis = store.key_arrays()
+    indices = np.array([4999, 3, 2048, 3, 1023, 1024])
+    sparse_thetas, sparse_phis = store.key_arrays(indices)
+    np.testing.assert_array_equal(sparse_thetas, thetas[indices])
+    np.testing.assert_array_equal(sparse_phis, phis[indices])
+
+
+def test_negative_and_out_of_range_indices():
+    store = DerivedKeyStore(SEED, 100)
+    thetas, phis = store.key_arrays()
+    assert store[-1] == (thetas[-1], phis[-1])
+    np.testing.assert_array_equal(store.phis_at([-1, -100]), phis[[-1, 0]])
+    with pytest.raises(IndexError):
+        store.key_arrays([100])
+    with pytest.raises(IndexError):
+        store.key_arrays([-101])
+
+
+def test_slices_continue_the_counter():
+    store = DerivedKeyStore(SEED, 3000)
+    window = store[1500:1600]
+    assert isinstance(window, DerivedKeyStore) and len(window) == 100
+    np.testing.assert_array_equal(window.thetas, store.thetas[1500:1600])
+    assert window.nbytes == len(SEED)
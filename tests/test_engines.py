@@ -0,0 +1,137 @@
+"""Matching engines, key sources and the A → C → B qubit representations"""
+
+import numpy as np
+import pytest
+from qiskit.quantum_info import Operator
+
+from rbe_quantum_ves import (ENGINES, KEY_SOURCES, AnalyticRBEEngine, ByzantineResilientQVES, QuantumVESSystem,
+                             RBEEncoder, TransitQubit)
+
+SECRET = np.array([[1, 0, 1], [0, 1, 1], [0, 0, 1]])
+CANDIDATE = np.array([[1, 1, 1], [0, 1, 0], [0, 0, 1]])
+
+
+def _match(engine, seed=7):
+    system = QuantumVESSystem(engine, seed=seed)
+    system.setup_secret_image(SECRET)
+    return system.perform_matching(CANDIDATE)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_agree_with_plaintext_comparison(engine):
+    match_results, percentage = _match(engine)
+    assert match_results == (SECRET == CANDIDATE).ravel().tolist()
+    assert percentage == pytest.approx(700 / 9)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        QuantumVESSystem('statevector')
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_candidate_size_must_match_secret(engine):
+    system = QuantumVESSystem(engine, seed=7)
+    system.setup_secret_image(SECRET)
+    for candidate in (np.ones((4, 4)), np.ones((2, 2))):
+        with pytest.raises(ValueError, match='Candidate has'):
+            system.perform_matching(candidate)
+
+
+def test_batched_engine_submits_one_job_per_round(monkeypatch):
+    system = QuantumVESSystem('batched')
+    system.setup_secret_image(SECRET)
+    simulator = system.participant_B.simulator
+    run, jobs = simulator.run, []
+
+    def counting_run(circuits, **options):
+        jobs.append(len(circuits))
+        return run(circuits, **options)
+
+    monkeypatch.setattr(simulator, 'run', counting_run)
+    system.perform_matching(CANDIDATE)
+    assert jobs == [SECRET.size]
+
+
+def test_rbe_template_binds_to_rbe_unitary():
+    encoder = RBEEncoder()
+    for dagger in (False, True):
+        template = RBEEncoder.rbe_template(dagger)
+        assert RBEEncoder.rbe_template(dagger) is template
+        bound = template.assign_parameters({RBEEncoder.THETA: 0.7, RBEEncoder.PHI: -np.pi / 2})
+        unitary = encoder.create_rbe_unitary(0.7, -np.pi / 2)
+        expected = Operator(unitary.conj().T if dagger else unitary)
+        assert Operator(bound).equiv(expected)
+
+
+def test_encrypted_states_are_contiguous_and_decrypt_to_the_image():
+    system = QuantumVESSystem('analytic')
+    system.setup_secret_image(SECRET)
+    states = system.participant_A.get_encrypted_states()
+    assert states.shape == (SECRET.size, 2) and states.dtype == complex
+    assert states.flags['C_CONTIGUOUS']
+    np.testing.assert_allclose(np.linalg.norm(states, axis=1), 1.0)
+
+    thetas, phis = system.participant_B.keys.key_arrays()
+    p_one = AnalyticRBEEngine.decrypt_probabilities(states, thetas, phis)
+    np.testing.assert_allclose(p_one, SECRET.ravel(), atol=1e-12)
+
+
+def test_transit_qubits_are_shared_not_copied():
+    system = QuantumVESSystem('aer')
+    system.setup_secret_image(SECRET)
+    system.participant_C.observe_candidate(CANDIDATE)
+
+    kept = system.participant_A.get_encrypted_qubit(3)
+    flipped = system.participant_A.get_encrypted_qubit(1)
+    assert isinstance(kept, TransitQubit)
+    assert system.participant_C.apply_cnot_if_needed(kept, 3) is kept
+    transformed = system.participant_C.apply_cnot_if_needed(flipped, 1)
+    assert transformed.gates == ('x',) and flipped.gates == ()
+    assert transformed.prefix is flipped.prefix
+    assert system.participant_B.decrypt_and_measure(transformed, 1) == 1
+
+
+def test_fixed_seed_reproduces_keys_and_measurements():
+    def run(seed):
+        system = QuantumVESSystem('analytic', seed=seed)
+        system.setup_secret_image(SECRET)
+        thetas, phis = system.participant_B.keys.key_arrays()
+        return thetas, phis, system.participant_B.engine.measure(np.full(64, 0.5))
+
+    first, again, other = run(11), run(11), run(12)
+    for a, b in zip(first, again):
+        np.testing.assert_array_equal(a, b)
+    assert not np.array_equal(first[0], other[0])
+
+
+def test_seeded_secure_systems_draw_fresh_keys():
+    systems = [QuantumVESSystem('analytic', seed=5, key_source='secure') for _ in range(2)]
+    for system in systems:
+        system.setup_secret_image(SECRET)
+    assert not np.array_equal(systems[0].participant_B.keys.thetas, systems[1].participant_B.keys.thetas)
+
+    byzantine = ByzantineResilientQVES(3, seed=5, key_source='secure')
+    byzantine.setup_secret_image(SECRET)
+    assert len(byzantine.participant_A.get_keys()) == SECRET.size
+
+
+def test_spawned_seeds_are_independent_and_reproducible():
+    first = [seed.generate_state(2).tolist() for seed in RBEEncoder.spawn_seeds(3, 2)]
+    again = [seed.generate_state(2).tolist() for seed in RBEEncoder.spawn_seeds(np.random.SeedSequence(3), 2)]
+    assert first == again and first[0] != first[1]
+    assert RBEEncoder.spawn_seeds(None, 3) == [None] * 3
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('key_source', KEY_SOURCES)
+def test_key_sources_agree(engine, key_source):
+    system = QuantumVESSystem(engine, seed=7, key_source=key_source)
+    system.setup_secret_image(SECRET)
+    thetas, phis = system.participant_B.keys.key_arrays()
+    assert len(thetas) == SECRET.size
+    assert np.all((thetas >= 0) & (thetas < 2 * np.pi))
+    assert set(np.round(np.abs(phis), 12)) == {round(np.pi / 2, 12)}
+
+    match_results, _ = system.perform_matching(CANDIDATE)
+    assert match_results == (SECRET == CANDIDATE).ravel().tolist()
@@ -0,0 +1,63 @@
+"""Array-backed RBE key store"""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from rbe_quantum_ves import RBEEncoder, RBEKeyStore
+
+
+def make_store(n=20):
+    thetas = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    phis = np.where(np.arange(n) % 3 == 0, np.pi / 2, -np.pi / 2)
+    return thetas, phis, RBEKeyStore.from_arrays(thetas, phis)
+
+
+def test_lookup_matches_input():
+    thetas, phis, store = make_store()
+    assert len(store) == 20
+    assert store[4] == (thetas[4], phis[4])
+    np.testing.assert_array_equal(store.thetas, thetas)
+    np.testing.assert_array_equal(store.phis, phis)
+
+
+def test_caller_arrays_stay_writeable():
+    thetas = np.random.default_rng(0).uniform(0, 2 * np.pi, 10)
+    phi_bits = np.packbits(np.ones(10, dtype=bool))
+    store = RBEKeyStore(thetas, phi_bits)
+    assert thetas.flags.writeable and phi_bits.flags.writeable
+    thetas[0] = -1.0
+    assert store[0][0] != -1.0
+    assert not store.thetas.flags.writeable
+
+
+def test_negative_and_out_of_range_indices():
+    thetas, phis, store = make_store()
+    assert store[-1] == (thetas[-1], phis[-1])
+    np.testing.assert_array_equal(store.phis_at([-1, -20, 0]), phis[[-1, -20, 0]])
+    with pytest.raises(IndexError):
+        store.phis_at([20])
+    with pytest.raises(IndexError):
+        store[20]
+
+
+def test_slices_are_views_and_pickle_compactly():
+    thetas, phis, store = make_store(4096)
+    window = store[1001:1011]
+    assert np.shares_memory(window.thetas, store.thetas)
+    np.testing.assert_array_equal(window.phis, phis[1001:1011])
+    np.testing.assert_array_equal(window.phis_at([-1]), phis[[1010]])
+
+    restored = pickle.loads(pickle.dumps(window))
+    np.testing.assert_array_equal(restored.thetas, thetas[1001:1011])
+    np.testing.assert_array_equal(restored.phis, phis[1001:1011])
+    assert len(pickle.dumps(window)) < len(pickle.dumps(store)) // 10
+
+
+def test_seeded_generation_is_reproducible():
+    first = RBEEncoder().generate_keys(100, seed=5)
+    second = RBEEncoder().generate_keys(100, seed=5)
+    np.testing.assert_array_equal(first.thetas, second.thetas)
+    np.testing.assert_array_equal(first.phis, second.phis)
+    assert set(np.unique(first.phis)) <= {-np.pi / 2, np.pi / 2}
@@ -0,0 +1,35 @@
+"""Matching many candidates against one secret"""
+
+import numpy as np
+import pytest
+
+from rbe_quantum_ves import QuantumVESSystem
+
+
+@pytest.mark.parametrize('engine', ['analytic', 'batched', 'parametric'])
+def test_match_batch_equals_repeated_matching(engine):
+    rng = np.random.default_rng(9)
+    secret = rng.integers(0, 2, (4, 4))
+    candidates = [secret ^ (rng.random(secret.shape) < rate) for rate in (0.0, 0.2, 0.5, 1.0)]
+
+    system = QuantumVESSystem(engine, seed=10)
+    system.setup_secret_image(secret)
+    percentages, bitmaps = system.match_batch(np.stack(candidates), return_bitmaps=True)
+
+    for k, candidate in enumerate(candidates):
+        match_results, percentage = system.perform_matching(candidate)
+        assert percentages[k] == pytest.approx(percentage)
+        assert bitmaps[k].tolist() == match_results
+    assert percentages[0] == 100.0
+
+
+def test_match_batch_accepts_a_sequence_and_skips_bitmaps():
+    secret = np.eye(3, dtype=int)
+    system = QuantumVESSystem('analytic', seed=10)
+    system.setup_secret_image(secret)
+    percentages, bitmaps = system.match_batch([secret, 1 - secret], chunk_pixels=3)
+    np.testing.assert_array_equal(percentages, [100.0, 0.0])
+    assert bitmaps is None
+
+    with pytest.raises(ValueError):
+        system.match_batch(np.zeros((2, 4)))
@@ -0,0 +1,47 @@
+"""Matching through noisy A → C → B channels"""
+
+import numpy as np
+import pytest
+
+from noise_channels import NoiseModel, amplitude_damping, dephasing, depolarizing
+from rbe_quantum_ves import QuantumVESSystem
+
+SECRET = np.array([[1, 0, 1, 1], [0, 1, 1, 0], [0, 0, 1, 1]])
+CANDIDATE = np.array([[1, 1, 1, 1], [0, 1, 0, 0], [1, 0, 1, 1]])
+
+
+def _system():
+    system = QuantumVESSystem('analytic', seed=12)
+    system.setup_secret_image(SECRET)
+    return system
+
+
+def test_identity_channels_equal_ideal_matching():
+    identity = NoiseModel.uniform([depolarizing(0.0), amplitude_damping(0.0), dephasing(0.0)])
+    for noise_model in (NoiseModel(), identity):
+        report = _system().perform_noisy_matching(CANDIDATE, noise_model)
+        assert report.match_results.tolist() == (SECRET == CANDIDATE).ravel().tolist()
+        assert report.match_percentage == report.ideal_match_percentage == pytest.approx(75.0)
+        assert report.accuracy == 1.0
+        np.testing.assert_allclose(report.error_rates, 0.0, atol=1e-12)
+
+
+def test_full_depolarization_gives_coin_flips():
+    report = _system().perform_noisy_matching(CANDIDATE, NoiseModel(c_to_b=[depolarizing(1.0)]),
+                                                 mitigate=False)
+    np.testing.assert_allclose(report.error_rates, 0.5)
+    assert report.expected_accuracy == pytest.approx(0.5)
+
+
+def test_noise_parameters_are_validated():
+    with pytest.raises(ValueError):
+        depolarizing(1.5)
+    with pytest.raises(ValueError):
+        NoiseModel(readout=(0.1, -0.1))
+
+
+def test_candidate_size_must_match_secret():
+    system = _system()
+    for candidate in (np.ones((4, 4)), np.ones((2, 2))):
+        with pytest.raises(ValueError, match='Candidate has'):
+            system.perform_noisy_matching(candidate, NoiseModel())
@@ -0,0 +1,65 @@
+"""Bit-packed binary images"""
+
+import numpy as np
+import pytest
+
+from packed_image import PackedBinaryImage
+from quantum_ves import QuantumVES
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 2, (5, 130)).astype(np.uint8)
+
+
+def test_round_trip(image):
+    packed = PackedBinaryImage.from_array(image)
+    assert packed.shape == (5, 130) and packed.size == 650
+    np.testing.assert_array_equal(packed.to_array(), image)
+    np.testing.assert_array_equal(np.asarray(packed), image)
+    np.testing.assert_array_equal(packed.flatten(), image.ravel())
+
+
+def test_bits_and_indexing(image):
+    packed = PackedBinaryImage.from_array(image)
+    indices = np.array([0, 63, 64, 129, 130, 649])
+    np.testing.assert_array_equal(packed.get_bits(indices), image.ravel()[indices])
+    assert packed[2, 100] == image[2, 100]
+    assert packed[-1, -1] == image[-1, -1]
+    for key in [(slice(1, 4), slice(3, 70)), (slice(None), slice(60, 130)), (2, slice(None)),
+                (slice(None), slice(None, None, 3))]:
+        np.testing.assert_array_equal(packed[key].to_array(), image[key].reshape(packed[key].shape))
+
+
+def test_xor_complement_and_counts(image):
+    other = np.random.default_rng(1).integers(0, 2, image.shape).astype(np.uint8)
+    a, b = PackedBinaryImage.from_array(image), PackedBinaryImage.from_array(other)
+    np.testing.assert_array_equal((a ^ b).to_array(), image ^ other)
+    np.testing.assert_array_equal((~a).to_array(), 1 - image)
+    assert (1 - a) == ~a
+    assert a.count_ones() == image.sum()
+    assert a.count_mismatches(b) == np.count_nonzero(image != other)
+    with pytest.raises(ValueError):
+        a ^ PackedBinaryImage.from_array(image[:, :-1])
+
+
+def test_rsub_only_accepts_scalar_one(image):
+    packed = PackedBinaryImage.from_array(image)
+    assert packed.__rsub__(2) is NotImplemented
+    assert packed.__rsub__(np.ones(3)) is NotImplemented
+    with pytest.raises(TypeError):
+        len(packed)
+
+
+def test_random_and_shares_follow_the_rng(image):
+    first = PackedBinaryImage.random((3, 70), np.random.default_rng(7))
+    second = PackedBinaryImage.random((3, 70), np.random.default_rng(7))
+    assert first == second
+    assert first.words[:, -1].max() < 1 << 6   # padding bits stay zero
+
+    packed = PackedBinaryImage.from_array(image)
+    qves = QuantumVES(image.shape)
+    _, _, share1, share2 = qves.xor_based_sharing(packed, np.random.default_rng(3))
+    _, _, again, _ = qves.xor_based_sharing(packed, np.random.default_rng(3))
+    assert share1 == again
+    assert qves.classical_xor_reconstruct(share1, share2) == packed
@@ -0,0 +1,35 @@
+"""Pipelined A → C → B matching"""
+
+import numpy as np
+import pytest
+
+from rbe_quantum_ves import ENGINES, QuantumVESSystem
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('chunk_size', [1, 4])
+def test_pipelined_matching_equals_sequential(engine, chunk_size):
+    rng = np.random.default_rng(6)
+    secret = rng.integers(0, 2, (3, 5))
+    candidate = secret ^ (rng.random(secret.shape) < 0.4)
+
+    system = QuantumVESSystem(engine, seed=8)
+    system.setup_secret_image(secret)
+    sequential = system.perform_matching(candidate)
+    match_results, percentage, stage_stats = system.perform_pipelined_matching(
+        candidate, chunk_size=chunk_size, queue_size=2)
+
+    assert (match_results, percentage) == sequential
+    for name in ('A', 'C', 'B'):
+        assert stage_stats[name]['pixels'] == secret.size
+        assert stage_stats[name]['max_queue_depth'] <= 2
+
+
+def test_pipeline_rejects_invalid_sizes():
+    system = QuantumVESSystem('analytic', seed=8)
+    system.setup_secret_image(np.ones((2, 2)))
+    with pytest.raises(ValueError):
+        system.perform_pipelined_matching(np.ones((2, 2)), chunk_size=0)
+    for candidate in (np.ones((3, 3)), np.ones(3)):
+        with pytest.raises(ValueError, match='Candidate has'):
+            system.perform_pipelined_matching(candidate)
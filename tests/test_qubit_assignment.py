@@ -0,0 +1,57 @@
+"""Qubit assignment engine"""
+
+import numpy as np
+import pytest
+
+from qubit_assignment import QubitAssignment, build_assignment, round_robin_slots
+
+
+@pytest.mark.parametrize('n_pixels, n_participants, copies', [(100, 9, 3), (25, 5, 3), (7, 3, 3), (50, 10, 1)])
+def test_balanced_distinct_assignment(n_pixels, n_participants, copies):
+    assignment = build_assignment(n_pixels, n_participants, copies)
+    table = assignment.pixels_to_cs
+    assert table.shape == (n_pixels, copies) and len(assignment) == n_pixels
+    assert all(len(set(row)) == copies for row in table.tolist())
+    assert assignment.loads.max() - assignment.loads.min() <= 1
+    assert assignment.loads.sum() == n_pixels * copies
+    assert assignment.loads.max() == -(-n_pixels * copies // n_participants)
+
+
+def test_cap_feasibility():
+    feasible = build_assignment(90, 9, 3)
+    assert feasible.feasible and feasible.cap_respected and feasible.max_share <= 1 / 3
+    infeasible = build_assignment(90, 5, 3)
+    assert not infeasible.feasible and not infeasible.cap_respected
+    assert infeasible.max_share == pytest.approx(0.6)
+
+
+def test_csr_matches_table():
+    for assignment in (build_assignment(37, 7, 3),
+                       QubitAssignment(np.array([[2, 0], [1, 2], [0, 1]], dtype=np.int32), 3)):
+        indptr, indices = assignment.csr()
+        for c_idx in range(assignment.n_participants):
+            expected = np.flatnonzero((assignment.pixels_to_cs == c_idx).any(axis=1))
+            np.testing.assert_array_equal(assignment.pixels_of(c_idx), expected)
+        assert indptr[-1] == len(indices) == assignment.pixels_to_cs.size
+
+
+def test_assignments_are_cached_and_read_only():
+    assignment = build_assignment(20, 5, 3)
+    assert build_assignment(20, 5, 3) is assignment
+    with pytest.raises(ValueError):
+        assignment.pixels_to_cs[0, 0] = 1
+    np.testing.assert_array_equal(assignment[3], round_robin_slots(60, 5)[9:12])
+
+
+def test_wrapping_leaves_the_callers_table_writeable():
+    table = np.array([[2, 0], [1, 2], [0, 1]], dtype=np.int32)
+    assignment = QubitAssignment(table, 3)
+    table[0, 0] = 1
+    assert assignment.pixels_to_cs[0, 0] == 2 and not assignment.pixels_to_cs.flags.writeable
+
+
+def test_rejects_invalid_copies():
+    with pytest.raises(ValueError):
+        build_assignment(10, 3, 4)
+    with pytest.raises(ValueError):
+        build_assignment(10, 3, 0)
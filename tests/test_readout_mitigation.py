@@ -0,0 +1,52 @@
+"""Cached readout calibration and match-rate correction"""
+
+import numpy as np
+import pytest
+
+from noise_channels import NoiseModel, depolarizing
+from readout_mitigation import ReadoutMitigator
+from rbe_quantum_ves import AnalyticRBEEngine, QuantumVESSystem
+
+
+def test_calibration_is_cached_per_noise_model_and_config():
+    mitigator = ReadoutMitigator()
+    calls = []
+
+    def calibrate(noise_model):
+        calls.append(noise_model)
+        return AnalyticRBEEngine.calibrate_readout(noise_model, n_samples=256)
+
+    noisy = NoiseModel(readout=(0.1, 0.2))
+    matrix = mitigator.calibration_matrix(noisy, ('analytic',), calibrate)
+    assert mitigator.calibration_matrix(NoiseModel(readout=(0.1, 0.2)), ('analytic',), calibrate) is matrix
+    mitigator.calibration_matrix(noisy, ('aer',), calibrate)
+    assert len(calls) == 2
+    assert not matrix.flags.writeable
+    np.testing.assert_allclose(matrix, [[0.9, 0.2], [0.1, 0.8]])
+
+    mitigator.invalidate(noisy)
+    assert mitigator.stats()['size'] == 0
+    with pytest.raises(ValueError):
+        mitigator.calibration_matrix(noisy, ('bad',), lambda _: np.ones((2, 2)))
+
+
+def test_correction_inverts_the_confusion_matrix():
+    matrix = np.array([[0.9, 0.2], [0.1, 0.8]])
+    true_rates = np.array([0.0, 0.3, 1.0])
+    observed = matrix[0, 0] * true_rates + matrix[0, 1] * (1 - true_rates)
+    np.testing.assert_allclose(ReadoutMitigator.correct_match_rates(observed, matrix), true_rates)
+    with pytest.raises(ValueError):
+        ReadoutMitigator.correct_match_rates(0.5, np.full((2, 2), 0.5))
+
+
+def test_mitigated_match_percentage_removes_readout_bias():
+    rng = np.random.default_rng(13)
+    secret = rng.integers(0, 2, (40, 50))
+    candidate = secret ^ (rng.random(secret.shape) < 0.05)
+    system = QuantumVESSystem('analytic', seed=14)
+    system.setup_secret_image(secret)
+
+    report = system.perform_noisy_matching(candidate, NoiseModel([depolarizing(0.1)], readout=(0.05, 0.15)))
+    assert abs(report.match_percentage - report.ideal_match_percentage) > 5
+    assert report.mitigated_match_percentage == pytest.approx(report.ideal_match_percentage, abs=3)
+    assert system.perform_noisy_matching(candidate, NoiseModel(), mitigate=False).mitigated_match_percentage is None
@@ -0,0 +1,59 @@
+"""Sampled match estimates"""
+
+import numpy as np
+import pytest
+
+from sampled_estimate import (estimate_match_rate, required_sample_size, sample_pixels,
+                              wilson_interval, z_score)
+
+
+def test_wilson_interval():
+    low, high = wilson_interval(0.5, 100, 0.95)
+    assert low == pytest.approx(0.4038, abs=1e-4)
+    assert high == pytest.approx(0.5962, abs=1e-4)
+    low, high = wilson_interval(0.0, 50, 0.95)
+    assert low == 0.0 and 0.0 < high < 0.1
+    assert wilson_interval(1.0, 50, 0.95)[1] == 1.0
+
+
+def test_required_sample_size():
+    assert z_score(0.95) == pytest.approx(1.959964, abs=1e-6)
+    assert required_sample_size(0.01, 0.95, 10**9) == 9604
+    assert required_sample_size(0.01, 0.95, 1000) < 1000
+    assert required_sample_size(0.001, 0.95, 500) == 500
+    with pytest.raises(ValueError):
+        required_sample_size(0.0, 0.95, 100)
+
+
+def test_simple_sample_without_replacement():
+    sample = sample_pixels(np.random.default_rng(0), (20, 30), 100)
+    assert len(np.unique(sample.pixel_indices)) == 100
+    assert sample.pixel_indices.max() < 600
+    assert list(sample.stratum_sizes) == [600]
+
+
+def test_stratified_sample_covers_every_tile():
+    sample = sample_pixels(np.random.default_rng(0), (20, 30), 60, tile_shape=(8, 8))
+    assert sample.stratum_sizes.sum() == 600 and len(sample.stratum_sizes) == 12
+    assert np.all(np.bincount(sample.stratum, minlength=12) >= 1)
+    assert len(np.unique(sample.pixel_indices)) == len(sample.pixel_indices)
+    rows, cols = np.divmod(sample.pixel_indices, 30)
+    np.testing.assert_array_equal(sample.stratum, (rows // 8) * 4 + cols // 8)
+
+
+def test_stratified_estimate_weights_strata():
+    # Left half of the image matches, right half does not
+    rng = np.random.default_rng(1)
+    sample = sample_pixels(rng, (10, 20), 40, tile_shape=(10, 10))
+    matches = sample.pixel_indices % 20 < 10
+    estimate = estimate_match_rate(matches, sample, 0.95)
+    assert estimate.percentage == pytest.approx(50.0)
+    assert estimate.ci_low < 50.0 < estimate.ci_high
+    assert estimate.pixels_sampled == len(matches) and estimate.total_pixels == 200
+
+
+def test_census_has_zero_width_interval():
+    sample = sample_pixels(np.random.default_rng(2), (4, 4), 16)
+    matches = np.arange(16)[sample.pixel_indices] < 12
+    estimate = estimate_match_rate(matches, sample, 0.95)
+    assert estimate.percentage == estimate.ci_low == estimate.ci_high == pytest.approx(75.0)
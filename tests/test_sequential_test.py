@@ -0,0 +1,68 @@
+"""Sequential threshold test (SPRT)"""
+
+import numpy as np
+import pytest
+
+from rbe_quantum_ves import QuantumVESSystem
+from sequential_test import SequentialThresholdTest
+
+
+def test_wald_bounds():
+    test = SequentialThresholdTest(threshold=0.95, alpha=0.01, beta=0.05)
+    assert test.accept_bound == pytest.approx(np.log(0.95 / 0.01))
+    assert test.reject_bound == pytest.approx(np.log(0.05 / 0.99))
+    assert test.match_llr > 0 > test.mismatch_llr
+
+
+def test_stops_at_first_crossing_and_counts_fed_pixels():
+    test = SequentialThresholdTest(threshold=0.95)
+    steps = int(np.ceil(test.reject_bound / test.mismatch_llr))
+    assert test.update(np.zeros(64, dtype=bool)) is False
+    decision = test.finalize(1000)
+    assert decision.early_stop and not decision.accepted
+    assert decision.pixels_evaluated == steps
+    assert decision.pixels_matched == 0
+    assert decision.pixels_simulated == 64
+
+
+def test_accepts_clean_match():
+    test = SequentialThresholdTest(threshold=0.95)
+    for _ in range(100):
+        if test.update(np.ones(16, dtype=bool)) is not None:
+            break
+    decision = test.finalize(10_000)
+    assert decision.accepted and decision.early_stop
+    assert decision.pixels_evaluated <= decision.pixels_simulated < 10_000
+    assert decision.observed_match_rate == 1.0
+
+
+def test_exact_decision_when_pixels_run_out():
+    test = SequentialThresholdTest(threshold=0.5, alpha=0.001, beta=0.001)
+    matches = np.array([True, False] * 5)
+    assert test.update(matches) is None
+    decision = test.finalize(10)
+    assert not decision.early_stop
+    assert decision.accepted   # 5/10 >= 0.5
+    assert decision.pixels_evaluated == decision.pixels_simulated == 10
+
+
+def test_threshold_bounds_stay_finite():
+    for threshold in (0.0, 1.0):
+        test = SequentialThresholdTest(threshold=threshold)
+        assert np.isfinite([test.match_llr, test.mismatch_llr]).all()
+
+
+@pytest.mark.parametrize('kwargs', [{'threshold': 1.5}, {'alpha': 0.0}, {'beta': 1.0}, {'indifference': 0.0}])
+def test_rejects_invalid_parameters(kwargs):
+    with pytest.raises(ValueError):
+        SequentialThresholdTest(**kwargs)
+
+
+@pytest.mark.parametrize('engine', ['analytic', 'batched'])
+def test_threshold_matching_checks_the_candidate_size(engine):
+    system = QuantumVESSystem(engine, seed=1)
+    system.setup_secret_image(np.ones((3, 3)))
+    assert system.perform_threshold_matching(np.ones((3, 3)), threshold=0.5, chunk_size=4).accepted
+    for candidate in (np.ones((4, 4)), np.ones((2, 2))):
+        with pytest.raises(ValueError, match='Candidate has'):
+            system.perform_threshold_matching(candidate)
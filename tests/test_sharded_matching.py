@@ -0,0 +1,33 @@
+"""Process-pool sharded matching"""
+
+import numpy as np
+import pytest
+
+from rbe_quantum_ves import QuantumVESSystem
+
+
+@pytest.mark.parametrize('engine', ['analytic', 'batched'])
+def test_sharded_matching_equals_in_process(engine):
+    rng = np.random.default_rng(4)
+    secret = rng.integers(0, 2, (6, 6))
+    candidate = secret ^ (rng.random(secret.shape) < 0.3)
+
+    system = QuantumVESSystem(engine, seed=5)
+    system.setup_secret_image(secret)
+    in_process = system.perform_matching(candidate)
+    sharded = system.perform_matching(candidate, n_workers=2)
+    assert sharded == in_process
+    assert sharded[0] == (secret == candidate).ravel().tolist()
+
+
+def test_n_workers_must_be_positive():
+    system = QuantumVESSystem('analytic', seed=5)
+    system.setup_secret_image(np.ones((2, 2)))
+    with pytest.raises(ValueError):
+        system.perform_matching(np.ones((2, 2)), n_workers=0)
+
+
+def test_empty_image_needs_no_shards():
+    system = QuantumVESSystem('analytic', seed=5)
+    system.setup_secret_image(np.zeros((0, 0), dtype=int))
+    assert system.perform_matching(np.zeros((0, 0)), n_workers=2) == ([], 0.0)
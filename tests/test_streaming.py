@@ -0,0 +1,50 @@
+"""Tile-based streaming matching"""
+
+import numpy as np
+
+from packed_image import PackedBinaryImage
+from rbe_quantum_ves import QuantumVESSystem
+
+
+def _images():
+    rng = np.random.default_rng(2)
+    secret = rng.integers(0, 2, (20, 30))
+    candidate = secret.copy()
+    candidate[::4] ^= 1
+    return secret, candidate
+
+
+def test_tiles_cover_the_image_in_row_major_order():
+    secret, candidate = _images()
+    system = QuantumVESSystem('analytic', seed=3)
+    tiles = list(system.stream_tile_matches(secret, candidate, tile_shape=(8, 8)))
+    assert [(tile.row, tile.col) for tile in tiles] == [(r, c) for r in (0, 8, 16) for c in (0, 8, 16, 24)]
+    matched = np.zeros(secret.shape, dtype=bool)
+    for tile in tiles:
+        matched[tile.row:tile.row + tile.match_results.shape[0],
+                tile.col:tile.col + tile.match_results.shape[1]] = tile.match_results
+    np.testing.assert_array_equal(matched, secret == candidate)
+
+    matched_pixels, total, _ = system.perform_streaming_matching(secret, candidate, tile_shape=(7, 9))
+    assert (matched_pixels, total) == (np.count_nonzero(secret == candidate), secret.size)
+
+
+def test_packed_images_stream_like_arrays():
+    secret, candidate = _images()
+    system = QuantumVESSystem('analytic', seed=3)
+    packed = system.perform_streaming_matching(PackedBinaryImage.from_array(secret),
+                                               PackedBinaryImage.from_array(candidate), tile_shape=(8, 8))
+    assert packed[:2] == (np.count_nonzero(secret == candidate), secret.size)
+
+
+def test_streaming_leaves_system_state_alone():
+    secret, candidate = _images()
+    system = QuantumVESSystem('analytic', seed=3)
+    system.setup_secret_image(secret[:3, :3])
+    keys, states = system.participant_B.keys, system.participant_A.get_encrypted_states()
+
+    list(system.stream_tile_matches(secret, candidate, tile_shape=(8, 8)))
+    assert system.participant_B.keys is keys
+    assert system.participant_A.get_encrypted_states() is states
+    _, percentage = system.perform_matching(secret[:3, :3])
+    assert percentage == 100.0
@@ -0,0 +1,71 @@
+"""Structured tracing"""
+
+import io
+import json
+
+import numpy as np
+
+from rbe_quantum_ves import QuantumVESSystem
+from tracing import JsonlSink, MarkdownSink, MemorySink, TraceEvent, Tracer, resolve_tracer
+
+
+def test_disabled_tracer_and_sinks():
+    assert not Tracer().enabled
+    sink = MemorySink()
+    tracer = Tracer([sink])
+    tracer.emit('match', 3, 'B', True, bit=0)
+    assert tracer.enabled
+    assert sink.events == [TraceEvent('match', 3, 'B', True, {'bit': 0})]
+    assert sink.events[0].to_dict() == {'stage': 'match', 'pixel': 3, 'participant': 'B',
+                                        'outcome': True, 'bit': 0}
+
+
+def test_jsonl_sink_serializes_numpy_values():
+    stream = io.StringIO()
+    with Tracer([JsonlSink(stream)]) as tracer:
+        tracer.emit('majority', np.int64(1), 'B', np.bool_(True), votes=np.int64(2), total=3)
+        tracer.emit('observe', participant='C')
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines[0] == {'stage': 'majority', 'pixel': 1, 'participant': 'B', 'outcome': True,
+                        'votes': 2, 'total': 3}
+    assert lines[1]['pixel'] == -1
+
+
+def test_markdown_sink_renders_pixel_blocks():
+    stream = io.StringIO()
+    sink = MarkdownSink(stream, keys={0: (1.0, -np.pi / 2)})
+    for event in (TraceEvent('send', 0, 'A', None, {'candidate': 1}),
+                  TraceEvent('measure', 0, 'B', 0, {}),
+                  TraceEvent('match', 0, 'B', True, {'bit': 0})):
+        sink.write(event)
+    text = stream.getvalue()
+    assert text.count('--- Pixel 0 ---') == 1
+    assert 'Candidate C[0] = 1' in text
+    assert 'θ=1.000, φ=-1.571' in text
+    assert '✓ MATCH' in text
+
+
+def test_resolve_tracer_never_shares_state():
+    first = resolve_tracer(None, verbose=False)
+    first.add_sink(MemorySink())
+    second = resolve_tracer(None, verbose=False)
+    assert first is not second and not second.enabled
+
+    own = Tracer([MemorySink()])
+    assert resolve_tracer(own, verbose=False) is own
+    verbose = resolve_tracer(own, verbose=True)
+    assert isinstance(verbose.sinks[0], MarkdownSink) and verbose.sinks[1:] == own.sinks
+
+
+def test_matching_events_carry_no_key_material(capsys):
+    image = np.array([[1, 0], [0, 1]])
+    system = QuantumVESSystem('aer', seed=0)
+    system.setup_secret_image(image)
+    sink = MemorySink()
+    system.perform_matching(image, verbose=True, tracer=Tracer([sink]))
+
+    stages = [event.stage for event in sink.events]
+    assert stages[0] == 'observe' and stages.count('measure') == 4 and stages.count('match') == 4
+    for event in sink.events:
+        assert not {'theta', 'phi', 'secret'} & set(event.data)
+    assert 'B applies RBE.Dec with key' in capsys.readouterr().out
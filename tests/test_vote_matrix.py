@@ -0,0 +1,41 @@
+"""Byzantine vote matrix"""
+
+import numpy as np
+import pytest
+
+from vote_matrix import VoteMatrix
+
+
+def make_votes():
+    # Pixel 0: 2 of 3 match, pixel 1: tie (1 of 2), pixel 2: no match votes
+    rows = np.array([0, 0, 0, 1, 1, 2, 2, 2])
+    cs = np.array([0, 1, 2, 1, 2, 0, 1, 2])
+    bits = np.array([0, 0, 1, 0, 1, 1, 1, 1])
+    return VoteMatrix.from_votes(rows, cs, bits, 3, 4)
+
+
+def test_majority_and_ties():
+    votes = make_votes()
+    assert votes.shape == (3, 4)
+    np.testing.assert_array_equal(votes.match_votes(), [2, 1, 0])
+    np.testing.assert_array_equal(votes.vote_counts(), [3, 2, 3])
+    np.testing.assert_array_equal(votes.majority(), [True, False, False])
+    np.testing.assert_array_equal(votes.ties(), [False, True, False])
+
+
+def test_participant_statistics():
+    votes = make_votes()
+    np.testing.assert_array_equal(votes.participant_load(), [2, 3, 3, 0])
+    rates = votes.disagreement_rates()
+    np.testing.assert_allclose(rates[:3], [0.0, 1 / 3, 1 / 3])
+    assert np.isnan(rates[3])
+    summary = votes.summary()
+    assert summary['match_percentage'] == pytest.approx(100 / 3)
+    assert summary['tie_count'] == 1
+
+
+def test_unassigned_votes_are_ignored():
+    votes = VoteMatrix(np.ones((2, 3), dtype=bool), np.array([[True, False, False], [False, False, False]]))
+    np.testing.assert_array_equal(votes.match_votes(), [1, 0])
+    np.testing.assert_array_equal(votes.majority(), [True, False])
+    assert votes.summary()['match_percentage'] == 50.0
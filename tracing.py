@@ -0,0 +1,212 @@
+"""
+Structured Tracing
+Per-pixel protocol events with pluggable sinks
+
+Verbose runs used to format f-strings for every pixel inside the matching
+loops. Matching now emits TraceEvents (stage, pixel, participant, outcome)
+to a Tracer, and sinks decide what to do with them:
+- MemorySink keeps the events in a list (tests, notebooks)
+- JsonlSink writes one JSON object per line (dashboards, log shipping)
+- MarkdownSink renders the familiar pixel-by-pixel text (verbose mode)
+
+A Tracer without sinks is disabled; matching code checks tracer.enabled
+once per round and skips all per-pixel event construction, so tracing
+costs nothing when it is off.
+
+Events never carry key material, so JSONL traces can be shipped off the
+machine. Only the local MarkdownSink can be given B's keys to show them.
+"""
+
+import json
+import sys
+from typing import Dict, IO, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+
+class TraceEvent(NamedTuple):
+    """One protocol step of one pixel (pixel -1 for round-level events)"""
+    stage: str
+    pixel: int
+    participant: str
+    outcome: object
+    data: Dict[str, object]
+
+    def to_dict(self) -> Dict[str, object]:
+        """Flat dictionary with the data fields merged in"""
+        return {'stage': self.stage, 'pixel': self.pixel, 'participant': self.participant,
+                'outcome': self.outcome, **self.data}
+
+
+class MemorySink:
+    """Collect events in memory"""
+
+    def __init__(self):
+        self.events: List[TraceEvent] = []
+
+    def write(self, event: TraceEvent):
+        self.events.append(event)
+
+    def close(self):
+        pass
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot serialize {type(value).__name__} in a trace event")
+
+
+class JsonlSink:
+    """Write events as JSON lines to a file (path or open stream)"""
+
+    def __init__(self, target: Union[str, IO[str]]):
+        self._owned = isinstance(target, str)
+        self.stream = open(target, 'w') if self._owned else target
+
+    def write(self, event: TraceEvent):
+        self.stream.write(json.dumps(event.to_dict(), default=_json_default, ensure_ascii=False) + '\n')
+
+    def close(self):
+        if self._owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+class MarkdownSink:
+    """
+    Render events as pixel-by-pixel text blocks
+
+    Each pixel starts with a "--- Pixel i ---" header. The stream defaults
+    to the current sys.stdout at write time, so output follows stdout
+    redirection (e.g. into a saved markdown report).
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, keys=None):
+        """
+        Args:
+            stream: Text stream (default: sys.stdout at write time)
+            keys: B's key store; if given, measure events show the key used
+        """
+        self.stream = stream
+        self.keys = keys
+        self._pixel = None
+
+    def write(self, event: TraceEvent):
+        lines = []
+        if event.pixel >= 0 and event.pixel != self._pixel:
+            lines.append(f"--- Pixel {event.pixel} ---")
+        self._pixel = event.pixel
+        lines.extend(self.render(event))
+        print('\n'.join(lines), file=self.stream if self.stream is not None else sys.stdout)
+
+    def render(self, event: TraceEvent) -> List[str]:
+        """Text lines describing one event"""
+        i, data, outcome = event.pixel, event.data, event.outcome
+        lines = []
+        if 'candidate' in data:
+            lines.append(f"  Candidate C[{i}] = {data['candidate']}")
+        if event.stage == 'observe':
+            lines.append(f"Participant {event.participant} observes candidate image\n")
+        elif event.stage == 'send':
+            if 'targets' in data:
+                lines.append(f"  A sends QT[{i}] to C participants {data['targets']}")
+            elif 'broadcast' in data:
+                lines.append(f"  A broadcasts QT[{i}] to all {data['broadcast']} C participants")
+            else:
+                lines.append(f"  A → C: QT[{i}] (encrypted quantum state)")
+        elif event.stage == 'transform':
+            if outcome:
+                lines.append(f"  C applies CNOT (C[{i}]=1): QT[{i}] → QT'[{i}]")
+            else:
+                lines.append(f"  C skips CNOT (C[{i}]=0): QT'[{i}] = QT[{i}]")
+            lines.append(f"  C → B: QT'[{i}]")
+        elif event.stage == 'measure':
+            if self.keys is not None:
+                theta, phi = self.keys[i]
+                lines.append(f"  B applies RBE.Dec with key (θ={theta:.3f}, φ={phi:.3f})")
+            lines.append(f"  B measures: {outcome}")
+        elif event.stage == 'vote':
+            if outcome is None:
+                lines.append(f"  {event.participant} → B: nothing (qubit dropped), Vote: NONE")
+            else:
+                lines.append(f"  {event.participant} → B: QT'[{i}], B measures: {data['bit']}, "
+                             f"Vote: {'MATCH' if outcome else 'MISMATCH'}")
+        elif event.stage == 'match':
+            lines.append(f"  Result: {'✓ MATCH' if outcome else '✗ MISMATCH'}")
+            if 'bit' in data:
+                lines.append(f"  Logic: Match when measurement = 0 (got {data['bit']})")
+            lines.append("")
+        elif event.stage == 'majority':
+            lines.append(f"  Majority Vote: {data['votes']}/{data['total']} → "
+                         f"{'✓ MATCH' if outcome else '✗ MISMATCH'}")
+            lines.append("")
+        else:
+            lines.append(f"  {event.participant} {event.stage}: {outcome}")
+        return lines
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.flush()
+
+
+class Tracer:
+    """
+    Fan protocol events out to sinks; disabled when there are none
+    """
+
+    def __init__(self, sinks: Sequence = ()):
+        """
+        Args:
+            sinks: Objects with write(event) and close() methods
+        """
+        self.sinks = list(sinks)
+        self.enabled = bool(self.sinks)
+
+    def add_sink(self, sink):
+        """Attach another sink (enables the tracer)"""
+        self.sinks.append(sink)
+        self.enabled = True
+
+    def emit(self, stage: str, pixel: int = -1, participant: str = '', outcome: object = None, **data):
+        """
+        Send one event to every sink
+
+        Callers on per-pixel paths should test self.enabled first, so
+        disabled tracing does not even build the arguments.
+        """
+        event = TraceEvent(stage, pixel, participant, outcome, data)
+        for sink in self.sinks:
+            sink.write(event)
+
+    def close(self):
+        """Close every sink"""
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self) -> 'Tracer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def resolve_tracer(tracer: Optional[Tracer], verbose: bool, keys=None) -> Tracer:
+    """
+    Tracer for one matching call
+
+    Args:
+        tracer: Caller's tracer, or None
+        verbose: Also render events as text on stdout
+        keys: B's key store, shown by the verbose text rendering only
+
+    Returns:
+        The caller's tracer (or a new disabled Tracer), with a
+        MarkdownSink on stdout added in verbose mode
+    """
+    if not verbose:
+        return tracer if tracer is not None else Tracer()
+    return Tracer([MarkdownSink(keys=keys)] + (tracer.sinks if tracer is not None else []))
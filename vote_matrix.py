@@ -0,0 +1,114 @@
+"""
+Byzantine Vote Matrix
+Pixels × C-participants voting layer for Byzantine-resilient matching
+
+Each C participant that processed a copy of pixel i's qubit contributes
+one vote (B measured 0 → match). Votes are kept as a boolean (N × M)
+matrix with a mask of assigned cells, so majorities and per-participant
+statistics are NumPy reductions over whole images:
+- majority(): strict majority of assigned votes (ties count as mismatch)
+- ties(): pixels with as many match as mismatch votes
+- disagreement_rates(): per C, how often it voted against the majority
+"""
+
+from typing import Dict
+
+import numpy as np
+
+
+class VoteMatrix:
+    """
+    Boolean match votes of M C participants on N pixels
+    """
+
+    def __init__(self, votes: np.ndarray, assigned: np.ndarray):
+        """
+        Wrap a vote matrix
+
+        Args:
+            votes: (N, M) boolean array, True = match vote (ignored where
+                   not assigned)
+            assigned: (N, M) boolean mask of cells that carry a vote
+        """
+        if votes.shape != assigned.shape or votes.ndim != 2:
+            raise ValueError(f"Votes {votes.shape} and mask {assigned.shape} must be equal 2D shapes")
+        self.assigned = assigned.astype(bool, copy=False)
+        self.votes = votes.astype(bool, copy=False) & self.assigned
+
+    @classmethod
+    def from_votes(cls, rows: np.ndarray, c_indices: np.ndarray, decrypted_bits: np.ndarray,
+                   n_pixels: int, n_participants: int) -> 'VoteMatrix':
+        """
+        Build the matrix from one measured bit per (pixel, C) copy
+
+        Args:
+            rows: Matrix row (pixel position) of each copy
+            c_indices: C participant of each copy
+            decrypted_bits: B's measured bit of each copy (0 = match)
+            n_pixels: Number of rows
+            n_participants: Number of C participants (columns)
+
+        Returns:
+            VoteMatrix
+        """
+        votes = np.zeros((n_pixels, n_participants), dtype=bool)
+        assigned = np.zeros((n_pixels, n_participants), dtype=bool)
+        assigned[rows, c_indices] = True
+        votes[rows, c_indices] = np.asarray(decrypted_bits) == 0
+        return cls(votes, assigned)
+
+    @property
+    def shape(self):
+        return self.votes.shape
+
+    def match_votes(self) -> np.ndarray:
+        """Number of match votes per pixel"""
+        return np.count_nonzero(self.votes, axis=1)
+
+    def vote_counts(self) -> np.ndarray:
+        """Number of votes cast per pixel"""
+        return np.count_nonzero(self.assigned, axis=1)
+
+    def majority(self) -> np.ndarray:
+        """Per-pixel match result: strictly more than half of the votes match"""
+        return 2 * self.match_votes() > self.vote_counts()
+
+    def ties(self) -> np.ndarray:
+        """Pixels whose votes split evenly (resolved as mismatch by majority())"""
+        counts = self.vote_counts()
+        return (counts > 0) & (2 * self.match_votes() == counts)
+
+    def participant_load(self) -> np.ndarray:
+        """Number of pixels assigned to each C participant"""
+        return np.count_nonzero(self.assigned, axis=0)
+
+    def disagreement_rates(self) -> np.ndarray:
+        """
+        Fraction of each C participant's votes that differ from the majority
+
+        Returns:
+            Array of shape (M,); NaN for participants without votes
+        """
+        against = (self.votes != self.majority()[:, None]) & self.assigned
+        load = self.participant_load()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(load > 0, np.count_nonzero(against, axis=0) / load, np.nan)
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Aggregate statistics of the vote
+
+        Returns:
+            Dictionary with match_percentage, tie_count, tie_rate,
+            participant_load and disagreement_rates
+        """
+        n_pixels = self.shape[0]
+        majority = self.majority()
+        tie_count = int(np.count_nonzero(self.ties()))
+        return {
+            'match_percentage': float(np.count_nonzero(majority) / n_pixels * 100) if n_pixels else 0.0,
+            'tie_count': tie_count,
+            'tie_rate': tie_count / n_pixels if n_pixels else 0.0,
+            'participant_load': self.participant_load(),
+            'disagreement_rates': self.disagreement_rates(),
+        }